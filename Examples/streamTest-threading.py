@@ -1,6 +1,6 @@
 """
-This example uses Python's built-in threading module to reach faster streaming 
-speeds than streamTest.py.
+This example uses Device.startStreamReader(), which reads the stream on a
+thread of its own, to reach faster streaming speeds than streamTest.py.
 
 On a Ubuntu 9.10 machine with a AMD Athlon(tm) 64 X2 Dual Core Processor 5200+,
 we got speeds up to 50kHz.
@@ -13,12 +13,8 @@ about 40kHz.
 """
 
 import u3, u6, ue9, LabJackPython
-from time import sleep
 from datetime import datetime
-import struct
-import threading
-import Queue
-import ctypes, copy, sys
+import sys
 
 # MAX_REQUESTS is the number of packets to be read.
 MAX_REQUESTS = 2500
@@ -76,83 +72,48 @@ if d is None:
     print "Configure a device first.\nPlease open streamTest-threading.py in a text editor and uncomment the lines for your device, starting at about line 16.\n\nExiting..."
     sys.exit(0)
     
-class StreamDataReader(object):
-    def __init__(self, device):
-        self.device = device
-        self.data = Queue.Queue()
-        self.dataCount = 0
-        self.missed = 0
-        self.running = False
-
-    def readStreamData(self):
-        self.running = True
-        
-        start = datetime.now()
-        self.device.streamStart()
-        while self.running:
-            # Calling with convert = False, because we are going to convert in
-            # the main thread.
-            returnDict = self.device.streamData(convert = False).next()
-            
-            self.data.put_nowait(copy.deepcopy(returnDict))
-            
-            self.dataCount += 1
-            if self.dataCount > MAX_REQUESTS:
-                self.running = False
-        
-        print "stream stopped."
-        self.device.streamStop()
-        stop = datetime.now()
-
-        total = self.dataCount * self.device.packetsPerRequest * self.device.streamSamplesPerPacket
-        print "%s requests with %s packets per request with %s samples per packet = %s samples total." % ( self.dataCount, d.packetsPerRequest, d.streamSamplesPerPacket, total )
-        
-        print "%s samples were lost due to errors." % self.missed
-        total -= self.missed
-        print "Adjusted number of samples = %s" % total
-        
-        runTime = (stop-start).seconds + float((stop-start).microseconds)/1000000
-        print "The experiment took %s seconds." % runTime
-        print "%s samples / %s seconds = %s Hz" % ( total, runTime, float(total)/runTime )
-
-sdr = StreamDataReader(d)
-
-sdrThread = threading.Thread(target = sdr.readStreamData)
-
-# Start the stream and begin loading the result into a Queue
-sdrThread.start()
+# The StreamReader reads the stream on a thread of its own into a ring of
+# preallocated blocks, so converting the data here can't hold up the reads.
+start = datetime.now()
+reader = d.startStreamReader()
 
+dataCount = 0
 errors = 0
 missed = 0
-while True:
-    try:
-        # Check if the thread is still running
-        if not sdr.running:
+try:
+    while dataCount < MAX_REQUESTS:
+        # Wait up to a second for the next block. It's converted to voltages
+        # here, in the main thread.
+        result = reader.getData(timeout = 1)
+        if result is None:
+            print "No stream data for a second. Stopping..."
             break
-        
-        # Pull results out of the Queue in a blocking manner.
-        result = sdr.data.get(True, 1)
+        dataCount += 1
         
         # If there were errors, print that.
         if result['errors'] != 0:
             errors += result['errors']
             missed += result['missed']
             print "+++++ Total Errors: %s, Total Missed: %s" % (errors, missed)
-            
-        # Convert the raw bytes (result['result']) to voltage data.
-        r = d.processStreamData(result['result'])
         
         # Do some processing on the data to show off.
-        print "Average of", len(r['AIN0']), "reading(s):", sum(r['AIN0'])/len(r['AIN0'])
-
-    except Queue.Empty:
-        print "Queue is empty. Stopping..."
-        sdr.running = False
-        break
-    except KeyboardInterrupt:
-        sdr.running = False
-    except Exception, e:
-        print type(e), e
-        sdr.running = False
-        break
-    
+        print "Average of", len(result['AIN0']), "reading(s):", sum(result['AIN0'])/len(result['AIN0'])
+except KeyboardInterrupt:
+    pass
+finally:
+    reader.stop()
+    print "stream stopped."
+
+stop = datetime.now()
+
+total = dataCount * d.packetsPerRequest * d.streamSamplesPerPacket
+print "%s requests with %s packets per request with %s samples per packet = %s samples total." % ( dataCount, d.packetsPerRequest, d.streamSamplesPerPacket, total )
+
+print "%s blocks were dropped because the main thread fell behind." % reader.overruns
+print "%s samples were lost due to errors." % missed
+total -= missed
+print "Adjusted number of samples = %s" % total
+
+runTime = (stop-start).seconds + float((stop-start).microseconds)/1000000
+print "The experiment took %s seconds." % runTime
+print "%s samples / %s seconds = %s Hz" % ( total, runTime, float(total)/runTime )
@@ -5,5 +5,5 @@ setup(name='LabJackPython',
       url='http://www.labjack.com/support/labjackpython',
       author='The LabJack crew',
       package_dir = {'': 'src'},
-      py_modules=['LabJackPython', 'Modbus', 'u3', 'u6', 'ue9', 'u12', 'skymote']
+      py_modules=['LabJackPython', 'Modbus', 'Checksum', 'u3', 'u6', 'ue9', 'u12', 'skymote', 'emulator']
       )
@@ -0,0 +1,222 @@
+# File: Checksum.py
+# Author: LabJack Corp.
+#
+# Checksums for the low-level command structure shared by the U3, U6 and
+# UE9. Every function takes a list of ints, a bytearray, a str or a
+# memoryview, and sums bytes in bulk with the built-in sum() rather than
+# a Python loop. Nothing here changes the buffer it's given, except the
+# set* functions, which exist to fill in the checksum bytes.
+#
+# Normal commands have a checksum8 of bytes 1 on in byte 0. Extended
+# commands (the ones whose byte 1 is 0xF8) have a checksum16 of bytes 6
+# on in bytes 4 and 5, and a checksum8 of bytes 1-5 in byte 0.
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _bytes(buffer):
+    """
+    Returns buffer as a bytearray. Values in a list outside of 0-255 are
+    wrapped to a byte, the same as the devices see them.
+    """
+    try:
+        return bytearray(buffer)
+    except ValueError:
+        return bytearray([ b & 0xff for b in buffer ])
+
+def _sum(buffer, start, stop = None):
+    """
+    Returns the sum of the bytes in buffer[start:stop].
+    """
+    if isinstance(buffer, bytearray):
+        return sum(buffer[start:stop])
+    return sum(_bytes(buffer[start:stop]))
+
+def fold8(total):
+    """
+    Folds a sum into the 8-bit end-around-carry checksum the devices use.
+    """
+    total = (total & 0xff) + ((total >> 8) & 0xff)
+    return (total & 0xff) + ((total >> 8) & 0xff)
+
+def isExtended(buffer):
+    """
+    Returns True if buffer holds an extended command or response.
+    """
+    return (_bytes(buffer[1:2])[0] & 0x78) >> 3 == 15
+
+def checksum8(buffer, numBytes = None):
+    """
+    Returns the checksum8 of bytes 1 up to numBytes (the whole buffer if
+    numBytes is None).
+    """
+    return fold8(_sum(buffer, 1, numBytes))
+
+def checksum16(buffer):
+    """
+    Returns the checksum16 of bytes 6 on.
+    """
+    return _sum(buffer, 6) & 0xffff
+
+def checksums(buffer):
+    """
+    Returns the (checksum8, checksum16) that belong in buffer. checksum16
+    is None for a normal command.
+    """
+    if isExtended(buffer):
+        total = checksum16(buffer)
+        head = _bytes(buffer[1:4])
+        return fold8(sum(head) + (total & 0xff) + (total >> 8)), total
+    return checksum8(buffer), None
+
+def verify(buffer):
+    """
+    Returns True if the checksums in buffer are right. buffer isn't
+    changed.
+    """
+    if len(buffer) < 2:
+        return False
+
+    bytes = _bytes(buffer[:6])
+    cs8, cs16 = checksums(buffer)
+
+    if cs16 is not None and (len(bytes) < 6 or bytes[4] != (cs16 & 0xff) or bytes[5] != (cs16 >> 8)):
+        return False
+    return bytes[0] == cs8
+
+def badStreamPackets(block, packetSize):
+    """
+    Returns the indices of the packets in a block of stream data whose
+    checksums are wrong. Stream packets are extended, and each one's
+    checksum16 covers the 2*byte2 bytes after the header, so the 2 bytes
+    the UE9 appends to its packets over USB aren't counted.
+
+    With NumPy, the block is viewed as a 2D array with a row per packet
+    and every packet is checked at once. Without it, they're checked one
+    at a time.
+    """
+    if isinstance(block, list):
+        block = _bytes(block)
+
+    numPackets = len(block) // packetSize
+    if numPackets == 0:
+        return []
+
+    if numpy is None:
+        bad = []
+        for i in range(numPackets):
+            packet = bytearray(block[i*packetSize:(i+1)*packetSize])
+            if not verify(packet[:6 + 2*packet[2]]):
+                bad.append(i)
+        return bad
+
+    packets = numpy.frombuffer(block, dtype = numpy.uint8, count = numPackets*packetSize).reshape(numPackets, packetSize)
+
+    # Running sums along each row give every packet's checksum16 however
+    # long its byte 2 says it is.
+    sums = packets.cumsum(axis = 1, dtype = numpy.uint32)
+    ends = numpy.clip(6 + 2*packets[:, 2].astype(numpy.intp), 6, packetSize)
+    total = (sums[numpy.arange(numPackets), ends - 1] - sums[:, 5]) & 0xffff
+
+    # checksum8 covers bytes 1-5 as they are in the packet.
+    head = sums[:, 5] - sums[:, 0]
+    head = (head & 0xff) + ((head >> 8) & 0xff)
+    head = (head & 0xff) + ((head >> 8) & 0xff)
+
+    good = (packets[:, 0] == head) & (packets[:, 4] == (total & 0xff)) & (packets[:, 5] == (total >> 8))
+    return [ int(i) for i in numpy.flatnonzero(~good) ]
+
+def setChecksum16(buffer):
+    total = checksum16(buffer)
+    buffer[4] = total & 0xff
+    buffer[5] = (total >> 8) & 0xff
+    return buffer
+
+def setChecksum8(buffer, numBytes):
+    buffer[0] = checksum8(buffer, numBytes)
+    return buffer
+
+def setChecksums(buffer):
+    """
+    Fills in the checksums of a normal or extended command in place and
+    returns it.
+    """
+    if isExtended(buffer):
+        setChecksum16(buffer)
+        setChecksum8(buffer, 6)
+    else:
+        setChecksum8(buffer, len(buffer))
+    return buffer
+
+class ChecksumTemplate(object):
+    """
+    A command whose payload changes only in a few bytes between sends. The
+    partial sums are computed once; changing a byte through the template
+    adjusts them, so getting the checksummed packet again costs the same
+    however long the command is.
+
+    >>> template = ChecksumTemplate(command)
+    >>> template[9] = 0x12
+    >>> device.write(template.packet(), checksum = False)
+    """
+    def __init__(self, command):
+        self.command = _bytes(command)
+        self._sumAll()
+
+    def _sumAll(self):
+        self.extended = isExtended(self.command)
+
+        if self.extended:
+            # checksum8 covers the header bytes 1-3 and the checksum16.
+            self.headTotal = sum(self.command[1:4])
+            self.total = sum(self.command[6:])
+        else:
+            self.headTotal = 0
+            self.total = sum(self.command[1:])
+
+    def __len__(self):
+        return len(self.command)
+
+    def __getitem__(self, index):
+        return self.command[index]
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            index += len(self.command)
+
+        change = value - self.command[index]
+        self.command[index] = value
+
+        if index == 1:
+            # The command byte decides what the checksums cover.
+            self._sumAll()
+        elif index == 0 or (self.extended and index in (4, 5)):
+            # Checksum bytes, they get overwritten.
+            return
+        elif self.extended and index < 6:
+            self.headTotal += change
+        else:
+            self.total += change
+
+    def update(self, offset, values):
+        """
+        Sets the bytes starting at offset to values.
+        """
+        for i, value in enumerate(values):
+            self[offset + i] = value
+
+    def packet(self):
+        """
+        Returns a copy of the command with its checksums filled in.
+        """
+        packet = bytearray(self.command)
+        if self.extended:
+            total = self.total & 0xffff
+            packet[4] = total & 0xff
+            packet[5] = total >> 8
+            packet[0] = fold8(self.headTotal + packet[4] + packet[5])
+        else:
+            packet[0] = fold8(self.total)
+        return packet
@@ -11,13 +11,25 @@ from __future__ import with_statement
 
 import collections
 import ctypes
+import ctypes.util
 import os
 import struct
 from decimal import Decimal
 import socket
 import Modbus
+import Checksum
 import atexit # For auto-closing devices
 import threading # For a thread-safe device lock
+import asyncore # For the async device classes
+import inspect # For FeedbackCommand signatures
+import select
+import sys
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 LABJACKPYTHON_VERSION = "10-22-2012"
 
@@ -145,12 +157,16 @@ class Device(object):
     write(writeBuffer) -- Writes a buffer.
     writeRegister(addr, value) -- Writes a value to a modbus register
     read(numBytes) -- Reads until a packet is received.
+    readBytes(numBytes) -- Like read, but returns a bytearray.
+    readInto(buffer) -- Reads into a caller-supplied buffer.
     readRegister(addr, numReg = None, format = None) -- Reads a modbus register.
     ping() -- Pings the device.  Returns true if communication worked.
     close() -- Closes the device.
     reset() -- Resets the device.
     """
     def __init__(self, handle, localId = None, serialNumber = None, ipAddress = "", devType = None):
+        # devType is needed to pick the transport when the handle is set.
+        self.devType = devType
         # Not saving the handle as a void* causes many problems on 64-bit machines.
         if isinstance(handle, int):
             self.handle = ctypes.c_void_p(handle)
@@ -159,205 +175,97 @@ class Device(object):
         self.localId = localId
         self.serialNumber = serialNumber
         self.ipAddress = ipAddress
-        self.devType = devType
         self.debug = False
         self.streamConfiged = False
         self.streamStarted = False
         self.streamPacketOffset = 0
+        self.streamCalibrationTables = dict()
         self._autoCloseSetup = False
         self.modbusPrependZeros = True
         self.deviceLock = threading.Lock()
         self.deviceName = "LabJack"
         
 
-    def _writeToLJSocketHandle(self, writeBuffer, modbus):
-        #if modbus is True and self.modbusPrependZeros:
-        #        writeBuffer = [ 0, 0 ] + writeBuffer
-            
-        packFormat = "B" * len(writeBuffer)
-        tempString = struct.pack(packFormat, *writeBuffer)
-        
-        if modbus:
-            self.handle.modbusSocket.send(tempString)
-        else:
-            self.handle.crSocket.send(tempString)
-        
-        return writeBuffer
-
-    def _writeToUE9TCPHandle(self, writeBuffer, modbus):
-        packFormat = "B" * len(writeBuffer)
-        tempString = struct.pack(packFormat, *writeBuffer)
-        
-        if modbus is True:
-            if self.handle.modbus is None:
-                raise LabJackException("Modbus port is not available.  Please upgrade to UE9 Comm firmware 1.43 or higher.")
-            self.handle.modbus.send(tempString)
-        else:
-            self.handle.data.send(tempString)
-        
-        return writeBuffer
-
-    def _writeToExodriver(self, writeBuffer, modbus):
-        if modbus is True and self.modbusPrependZeros:
-            writeBuffer = [ 0, 0 ] + writeBuffer
-        
-        newA = (ctypes.c_byte*len(writeBuffer))(0) 
-        for i in range(len(writeBuffer)):
-            newA[i] = ctypes.c_byte(writeBuffer[i])
-        
-        writeBytes = staticLib.LJUSB_Write(self.handle, ctypes.byref(newA), len(writeBuffer))
-        
-        if(writeBytes != len(writeBuffer)):
-            raise LabJackException( "Could only write %s of %s bytes." % (writeBytes, len(writeBuffer) ) )
-            
-        return writeBuffer
-            
-    def _writeToUDDriver(self, writeBuffer, modbus):
-        if self.devType == 0x501:
-            newA = (ctypes.c_byte*len(writeBuffer))(0) 
-            for i in range(len(writeBuffer)):
-                newA[i] = ctypes.c_byte(writeBuffer[i])
-            
-            writeBytes = skymoteLib.LJUSB_IntWrite(self.handle, 1, ctypes.byref(newA), len(writeBuffer))
-            
-            if(writeBytes != len(writeBuffer)):
-                raise LabJackException( "Could only write %s of %s bytes." % (writeBytes, len(writeBuffer) ) )
+    def _getHandle(self):
+        return self._handle
+    
+    def _setHandle(self, handle):
+        self._handle = handle
+        if handle is None:
+            self.transport = None
         else:
-            if modbus is True and self.devType == 9:
-                dataWords = len(writeBuffer)
-                writeBuffer = [0, 0xF8, 0, 0x07, 0, 0] + writeBuffer #modbus low-level function
-                if dataWords % 2 != 0:
-                    dataWords = (dataWords+1)/2
-                    writeBuffer.append(0)
-                else:
-                    dataWords = dataWords/2
-                writeBuffer[2] = dataWords
-                setChecksum(writeBuffer)
-            elif modbus is True and self.modbusPrependZeros:
-                writeBuffer = [ 0, 0 ] + writeBuffer
-            
-            eGetRaw(self.handle, LJ_ioRAW_OUT, 0, len(writeBuffer), writeBuffer)
-        
-        return writeBuffer
-
+            self.transport = makeTransport(handle, self.devType)
+    
+    handle = property(_getHandle, _setHandle, doc = """The device's driver handle, UE9TCPHandle or LJSocketHandle (or a
+        Transport). Setting it binds the transport that write() and read()
+        go through.""")
+    
     def write(self, writeBuffer, modbus = False, checksum = True):
         """write([writeBuffer], modbus = False)
             
-        Writes the data contained in writeBuffer to the device.  writeBuffer must be a list of 
-        bytes.
+        Writes the data contained in writeBuffer to the device.  writeBuffer
+        can be a list of bytes, or a str, bytearray or memoryview holding the
+        packet. Lists and bytearrays have their checksums set in place. A str
+        or memoryview is copied into a bytearray first if checksum is True,
+        and is sent as-is otherwise.
         """
-        if self.handle is None:
+        if self.transport is None:
             raise LabJackException("The device handle is None.")
 
         if checksum:
+            if not isinstance(writeBuffer, (list, bytearray)):
+                writeBuffer = bytearray(writeBuffer)
             setChecksum(writeBuffer)
 
-        if(isinstance(self.handle, LJSocketHandle)):
-            wb = self._writeToLJSocketHandle(writeBuffer, modbus)
-        elif(isinstance(self.handle, UE9TCPHandle)):
-            wb = self._writeToUE9TCPHandle(writeBuffer, modbus)
-        else:
-            if os.name == 'posix':
-                wb = self._writeToExodriver(writeBuffer, modbus)
-            elif os.name == 'nt':
-                wb = self._writeToUDDriver(writeBuffer, modbus)
+        wb = self.transport.write(writeBuffer, modbus, self.modbusPrependZeros)
         
         if self.debug: print "Sent: ", hexWithoutQuotes(wb)
     
     def read(self, numBytes, stream = False, modbus = False):
         """read(numBytes, stream = False, modbus = False)
             
-        Blocking read until a packet is received.
+        Blocking read until a packet is received. Command/response reads
+        return a list of bytes, stream reads return a str.
         """
-        readBytes = 0
-        
-        if self.handle is None:
+        if self.transport is None:
             raise LabJackException("The device handle is None.")
         
-        if(isinstance(self.handle, LJSocketHandle)):
-            return self._readFromLJSocketHandle(numBytes, modbus, stream)
-            
-        elif(isinstance(self.handle, UE9TCPHandle)):
-            return self._readFromUE9TCPHandle(numBytes, stream, modbus)
-        else:
-            if(os.name == 'posix'):
-                return self._readFromExodriver(numBytes, stream, modbus)
-            elif os.name == 'nt':
-                return self._readFromUDDriver(numBytes, stream, modbus)
+        return self.transport.read(numBytes, stream, modbus)
+    
+    def readBytes(self, numBytes, stream = False, modbus = False):
+        """readBytes(numBytes, stream = False, modbus = False)
         
-    def _readFromLJSocketHandle(self, numBytes, modbus, spont = False):
+        Like read(), but returns the bytearray the driver or socket wrote
+        into instead of converting it to a list or str. Use it to avoid
+        the conversion cost when the caller can work on the bytes directly.
         """
-        Reads from LJSocket. Returns the result as a list.
+        if self.transport is None:
+            raise LabJackException("The device handle is None.")
+        
+        return self.transport.readBytes(numBytes, stream, modbus)
+    
+    def readInto(self, buffer, numBytes = None, stream = True, modbus = False, offset = 0):
+        """readInto(buffer, numBytes = None, stream = True, modbus = False, offset = 0)
+        
+        Reads straight into buffer, starting at offset, and returns the
+        number of bytes read. buffer can be anything writable that exposes
+        its memory: a bytearray, array.array, NumPy array, ctypes array or
+        memoryview. numBytes defaults to the space left in buffer after
+        offset (pass it explicitly if buffer's items are wider than a
+        byte).
+        
+        Reusing the same buffer for every block of a long stream means the
+        acquisition loop allocates nothing per block.
         """
-        if modbus:
-            rcvString = self.handle.modbusSocket.recv(numBytes)
-        elif spont:
-            rcvString = self.handle.spontSocket.recv(numBytes)
-        else:
-            rcvString = self.handle.crSocket.recv(numBytes)
-        readBytes = len(rcvString)
-        packFormat = "B" * readBytes
-        rcvDataBuff = struct.unpack(packFormat, rcvString)
-        return list(rcvDataBuff)
-
-    def _readFromUE9TCPHandle(self, numBytes, stream, modbus):
-        if stream is True:
-            rcvString = self.handle.stream.recv(numBytes)
-            return rcvString
-        else:
-            if modbus is True:
-                if self.handle.modbus is None:
-                    raise LabJackException("Modbus port is not available.  Please upgrade to UE9 Comm firmware 1.43 or higher.")
-                rcvString = self.handle.modbus.recv(numBytes)
-            else:
-                rcvString = self.handle.data.recv(numBytes)
-        readBytes = len(rcvString)
-        packFormat = "B" * readBytes
-        rcvDataBuff = struct.unpack(packFormat, rcvString)
-        return list(rcvDataBuff)
-
-    def _readFromExodriver(self, numBytes, stream, modbus):
-        newA = (ctypes.c_byte*numBytes)()
+        if self.transport is None:
+            raise LabJackException("The device handle is None.")
         
-        if(stream):
-            readBytes = staticLib.LJUSB_Stream(self.handle, ctypes.byref(newA), numBytes)
-            if readBytes == 0:
-                return ''
-            # return the byte string in stream mode
-            return struct.pack('b' * readBytes, *newA)
-        else:
-            readBytes = staticLib.LJUSB_Read(self.handle, ctypes.byref(newA), numBytes)
-            # return a list of integers in command/response mode
-            return [(newA[i] & 0xff) for i in range(readBytes)]
-            
-    def _readFromUDDriver(self, numBytes, stream, modbus):
-        if self.devType == 0x501:
-            newA = (ctypes.c_byte*numBytes)()
-            readBytes = skymoteLib.LJUSB_IntRead(self.handle, 0x81, ctypes.byref(newA), numBytes)
-            return [(newA[i] & 0xff) for i in range(readBytes)]
-        else:
-            if modbus is True and self.devType == 9:
-                tempBuff = [0] * (8 + numBytes + numBytes%2)
-                eGetBuff = list()
-                eGetBuff = eGetRaw(self.handle, LJ_ioRAW_IN, 0, len(tempBuff), tempBuff)[1]
-
-                #parse the modbus response out (reponse is the Modbus extended low=level function)
-                retBuff = list()
-                if len(eGetBuff) >= 9 and eGetBuff[1] == 0xF8 and eGetBuff[3] == 0x07:
-                    #figuring out the length of the modbus response
-                    mbSize = len(eGetBuff) - 8
-                    if len(eGetBuff) >= 14:
-                        mbSize = min(mbSize, eGetBuff[13] + 6)
-                    i = min(mbSize, numBytes)
-                    i = max(i, 0)                    
-                    retBuff = eGetBuff[8:8+i] #getting the response only
-                return retBuff
-
-            tempBuff = [0] * numBytes
-            if stream:
-                return eGetRaw(self.handle, LJ_ioRAW_IN, 1, numBytes, tempBuff)[1]
-            return eGetRaw(self.handle, LJ_ioRAW_IN, 0, numBytes, tempBuff)[1]
+        if numBytes is None:
+            numBytes = len(buffer) - offset
+        
+        return self.transport.readInto(buffer, numBytes, stream, modbus, offset)
     
+
     def readRegister(self, addr, numReg = None, format = None, unitId = None):
         """ Reads a specific register from the device and returns the value.
         Requires Modbus.py
@@ -390,7 +298,7 @@ class Device(object):
         numReg = Modbus.calcNumberOfRegisters(addr, numReg = numReg)
         
         pkt = Modbus.readHoldingRegistersRequest(addr, numReg = numReg, unitId = unitId)
-        pkt = [ ord(c) for c in pkt ]
+        pkt = list(bytearray(pkt))
         
         numBytes = 9 + (2 * int(numReg))
         
@@ -407,9 +315,8 @@ class Device(object):
         if len(response) != numBytes:
             raise LabJackException(9001, "Got incorrect number of bytes from device. Expected %s bytes, got %s bytes. The packet recieved was: %s" % (numBytes, len(response),response))
 
-        if isinstance(response, list):
-            packFormat = ">" + "B" * numBytes
-            response = struct.pack(packFormat, *response)
+        if not isinstance(response, str):
+            response = str(bytearray(response))
 
         if format == None:
             format = Modbus.calcFormat(addr, numReg)
@@ -456,7 +363,7 @@ class Device(object):
             return self._buildWriteFloatToRegister(addr, value, unitId, fmt)
 
         request = Modbus.writeRegisterRequest(addr, value, unitId)
-        request = [ ord(c) for c in request ]
+        request = list(bytearray(request))
         numBytes = 12
         return request, numBytes
 
@@ -471,7 +378,7 @@ class Device(object):
         
         request = Modbus._buildHeaderBytes(length = len(payload)+1, unitId = unitId)
         request += payload
-        request = [ ord(c) for c in request ]
+        request = list(bytearray(request))
         numBytes = 12
 
         return (request, numBytes)
@@ -479,7 +386,7 @@ class Device(object):
         
     def _buildWriteMultipleRegisters(self, startAddr, values, unitId = None):
         request = Modbus.writeRegistersRequest(startAddr, values, unitId)
-        request = [ ord(c) for c in request ]
+        request = list(bytearray(request))
         numBytes = 12
 
         return (request, numBytes)
@@ -570,11 +477,13 @@ class Device(object):
             return False
         
 
-    def open(self, devType, Ethernet=False, firstFound = True, serial = None, localId = None, devNumber = None, ipAddress = None, handleOnly = False, LJSocket = None):
+    def open(self, devType, Ethernet=False, firstFound = True, serial = None, localId = None, devNumber = None, ipAddress = None, handleOnly = False, LJSocket = None, transport = None):
         """
-        Device.open(devType, Ethernet=False, firstFound = True, serial = None, localId = None, devNumber = None, ipAddress = None, handleOnly = False, LJSocket = None)
+        Device.open(devType, Ethernet=False, firstFound = True, serial = None, localId = None, devNumber = None, ipAddress = None, handleOnly = False, LJSocket = None, transport = None)
         
-        Open a device of type devType. 
+        Open a device of type devType. If transport is given, the device
+        talks through it (for example, an emulator.EmulatedU3) instead of
+        opening real hardware.
         """
         
         if self.handle is not None:
@@ -589,7 +498,12 @@ class Device(object):
             ct = LJ_ctLJSOCKET
         
         d = None
-        if devNumber:
+        if transport is not None:
+            if handleOnly:
+                d = Device(transport, devType = devType)
+            else:
+                d = _makeDeviceFromHandle(transport, devType)
+        elif devNumber:
             d = openLabJack(devType, ct, firstFound = False, devNumber = devNumber, handleOnly = handleOnly, LJSocket = LJSocket)
         elif serial:
             d = openLabJack(devType, ct, firstFound = False, pAddress = serial, handleOnly = handleOnly, LJSocket = LJSocket)
@@ -635,12 +549,8 @@ class Device(object):
         
         For Windows, Linux, and Mac
         """
-        if isinstance(self.handle, UE9TCPHandle) or isinstance(self.handle, LJSocketHandle):
-            self.handle.close()
-        elif os.name == 'posix':
-            staticLib.LJUSB_CloseDevice(self.handle)
-        elif self.devType == 0x501:
-            skymoteLib.LJUSB_CloseDevice(self.handle)
+        if self.transport is not None:
+            self.transport.close()
             
         self.handle = None
 
@@ -723,10 +633,162 @@ class Device(object):
         l = str(packet)
         l = l[HEADER_SIZE:]
         l = l[:-FOOTER_SIZE]
-        while len(l) > 0:
-            yield l[:BYTES_PER_PACKET]
-            l = l[BYTES_PER_PACKET:]
+        # Slice each sample out where it is rather than cutting it off the
+        # front, which copied the rest of the packet every time.
+        for i in range(0, len(l), BYTES_PER_PACKET):
+            yield l[i:i+BYTES_PER_PACKET]
             
+    def _streamSampleArray(self, result, numBytes, footerSize = 2):
+        """
+        Returns the samples in a block of stream packets as one flat
+        array of unsigned 16-bit ints. The block is viewed as a row per
+        packet, and the 12 byte header and footerSize bytes at the end of
+        each row are sliced off. Needs NumPy.
+        """
+        numPackets = len(result) // numBytes
+        packets = numpy.frombuffer(result, dtype = numpy.uint8, count = numPackets*numBytes).reshape(numPackets, numBytes)
+        return numpy.ascontiguousarray(packets[:, 12:numBytes - footerSize]).view('<u2').ravel()
+    
+    def _dealStreamSamples(self, samples, convert):
+        """
+        Deals a flat array of stream samples out to the channels of the
+        scan list, starting at streamPacketOffset, and moves
+        streamPacketOffset on past them. convert(j, values) converts the
+        samples from scan list position j. Returns a dictionary with an
+        array for each channel, like processStreamData() has lists.
+        """
+        numChannels = len(self.streamChannelNumbers)
+        offset = self.streamPacketOffset % numChannels
+        numSamples = len(samples)
+        
+        starts = collections.defaultdict(list)
+        values = collections.defaultdict(list)
+        for j in range(numChannels):
+            start = (j - offset) % numChannels
+            if start >= numSamples:
+                continue
+            key = "AIN%s" % self.streamChannelNumbers[j]
+            starts[key].append(start)
+            values[key].append(convert(j, numpy.ascontiguousarray(samples[start::numChannels])))
+        
+        returnDict = dict()
+        for key in values:
+            if len(values[key]) == 1:
+                returnDict[key] = values[key][0]
+            else:
+                # The channel is in the scan list more than once, so put
+                # its readings back in the order they were taken.
+                order = numpy.concatenate([ numpy.arange(first, numSamples, numChannels) for first in starts[key] ]).argsort(kind = 'mergesort')
+                returnDict[key] = numpy.concatenate(values[key])[order]
+        
+        self.streamPacketOffset = (offset + numSamples) % numChannels
+        return returnDict
+    
+    def _streamArraysToLists(self, arrays):
+        """
+        Turns the arrays from processStreamDataArrays() into the lists
+        processStreamData() returns. The digital port readings of channels
+        193 and 194, rows of two bytes, become tuples.
+        """
+        returnDict = collections.defaultdict(list)
+        for key, values in arrays.items():
+            if values.ndim == 2:
+                returnDict[key] = [ tuple(row) for row in values.tolist() ]
+            else:
+                returnDict[key] = values.tolist()
+        return returnDict
+    
+    def _streamCalibrationTable(self, j):
+        """
+        Returns the reading for each of the 65536 codes under the
+        calibration of position j of the scan list, an array with NumPy or
+        a list without. Converting samples is then just looking them up.
+        
+        A table is made by _calibrateStreamSamples() the first time it's
+        needed and kept in streamCalibrationTables under
+        _streamCalibrationKey(j), so positions with the same gain or range
+        share one. streamConfig() and getCalibrationData() throw them away.
+        """
+        key = self._streamCalibrationKey(j)
+        table = self.streamCalibrationTables.get(key)
+        if table is None:
+            table = self._calibrateStreamSamples(j, range(65536))
+            if numpy is not None:
+                table = numpy.array(table)
+            self.streamCalibrationTables[key] = table
+        return table
+    
+    # Structs that unpack whole blocks of stream packets, by packet size,
+    # footer size and number of packets.
+    _streamStructs = dict()
+    MAX_STREAM_STRUCTS = 64
+    
+    def _unpackStreamSamples(self, result, numBytes, footerSize = 2):
+        """
+        Returns the samples in a block of stream packets as one flat tuple
+        of ints, without NumPy. A Struct that skips each packet's 12 byte
+        header and footerSize byte footer is made once for the block's
+        layout, so the block is unpacked in a single call.
+        """
+        numPackets = len(result) // numBytes
+        key = (numBytes, footerSize, numPackets)
+        
+        unpacker = self._streamStructs.get(key)
+        if unpacker is None:
+            samplesPerPacket = (numBytes - 12 - footerSize) // 2
+            unpacker = struct.Struct("<" + ("12x%sH%sx" % (samplesPerPacket, footerSize)) * numPackets)
+            if len(self._streamStructs) >= self.MAX_STREAM_STRUCTS:
+                self._streamStructs.clear()
+            self._streamStructs[key] = unpacker
+        
+        return unpacker.unpack_from(result)
+    
+    def _dealStreamSampleLists(self, samples, convert):
+        """
+        Like _dealStreamSamples(), but for the tuple from
+        _unpackStreamSamples(). convert(j, values) turns the samples from
+        scan list position j into a list. Returns the dictionary of lists
+        processStreamData() returns.
+        
+        The samples are sliced straight out of the tuple and converted to
+        lists, not copied into array('H') and array('d'): callers of
+        processStreamData() have always got lists (and append to them,
+        add them together and so on), so arrays would only be turned back
+        into lists. processStreamDataArrays() is there for callers that
+        want arrays.
+        """
+        numChannels = len(self.streamChannelNumbers)
+        offset = self.streamPacketOffset % numChannels
+        numSamples = len(samples)
+        
+        starts = collections.defaultdict(list)
+        values = collections.defaultdict(list)
+        for j in range(numChannels):
+            start = (j - offset) % numChannels
+            if start >= numSamples:
+                continue
+            key = "AIN%s" % self.streamChannelNumbers[j]
+            starts[key].append(start)
+            values[key].append(convert(j, samples[start::numChannels]))
+        
+        returnDict = collections.defaultdict(list)
+        for key in values:
+            if len(values[key]) == 1:
+                returnDict[key] = values[key][0]
+            else:
+                # The channel is in the scan list more than once, so put
+                # its readings back in the order they were taken.
+                indexes = []
+                for start in starts[key]:
+                    indexes.extend(range(start, numSamples, numChannels))
+                readings = []
+                for value in values[key]:
+                    readings.extend(value)
+                returnDict[key] = [ reading for index, reading in sorted(zip(indexes, readings), key = lambda pair: pair[0]) ]
+        
+        self.streamPacketOffset = (offset + numSamples) % numChannels
+        return returnDict
+    
     def streamStart(self):
         """
         Name: Device.streamStart()
@@ -748,12 +810,15 @@ class Device(object):
         
         self.streamStarted = True
     
-    def streamData(self, convert=True):
+    def streamData(self, convert=True, validateChecksums=False):
         """       
         Name: Device.streamData()
         Args: convert, should the packets be converted as they are read.
                        set to False to get much faster speeds, but you will 
                        have to process the results later.
+              validateChecksums, check the checksums of every packet. The
+                       readings from packets that fail are NaN, and their
+                       indices are listed under badPackets.
         Desc: Reads stream data from a LabJack device. See our stream example
               to get an idea of how this function should be called. The return
               value of streamData is a dictionary with the following keys:
@@ -768,6 +833,9 @@ class Device(object):
               * AINi, where i is an entry in the passed in PChannels. If called
                         with convert = True, this is a list of all the readings
                         in this block.
+              * badPackets: The indices of the packets in this block with
+                            bad checksums. Only there with
+                            validateChecksums = True.
         Note: You must start the stream by calling streamStart() before calling
               this function.
         """
@@ -784,26 +852,135 @@ class Device(object):
                 yield None
                 continue
 
-            numPackets = len(result) // numBytes
-
-            errors = 0
-            missed = 0
-            firstPacket = ord(result[10])
-            for i in range(numPackets):
-                e = ord(result[11+(i*numBytes)])
-                if e != 0:
-                    errors += 1
-                    if self.debug and e != 60 and e != 59: print e
-                    if e == 60:
-                        missed += struct.unpack('<I', result[6+(i*numBytes):10+(i*numBytes)] )[0]
-            
-            returnDict = dict(numPackets = numPackets, result = result, errors = errors, missed = missed, firstPacket = firstPacket )
+            returnDict = self._streamBlockInfo(result, numBytes, validateChecksums)
             
             if convert:
-                returnDict.update(self.processStreamData(result, numBytes = numBytes))
+                returnDict.update(self._processStreamBlock(result, numBytes, returnDict.get('badPackets')))
             
             yield returnDict
     
+    def _streamBlockInfo(self, result, numBytes, validateChecksums = False):
+        """
+        Returns the streamData() dictionary for a block of stream packets,
+        without the converted readings.
+        """
+        numPackets = len(result) // numBytes
+
+        errors = 0
+        missed = 0
+        firstPacket = ord(result[10])
+        for i in range(numPackets):
+            e = ord(result[11+(i*numBytes)])
+            if e != 0:
+                errors += 1
+                if self.debug and e != 60 and e != 59: print e
+                if e == 60:
+                    missed += struct.unpack('<I', result[6+(i*numBytes):10+(i*numBytes)] )[0]
+        
+        returnDict = dict(numPackets = numPackets, result = result, errors = errors, missed = missed, firstPacket = firstPacket )
+        
+        if validateChecksums:
+            returnDict['badPackets'] = Checksum.badStreamPackets(result, numBytes)
+            if self.debug and returnDict['badPackets']: print "Bad checksums in packets", returnDict['badPackets']
+        
+        return returnDict
+    
+    def _processStreamBlock(self, result, numBytes, badPackets = None):
+        """
+        Converts a block of stream packets with processStreamData(), and
+        replaces the readings that came from the packets in badPackets with
+        NaN. The block is converted a run of good or bad packets at a time,
+        so the channel order carries on through the bad ones.
+        """
+        if not badPackets:
+            return self.processStreamData(result, numBytes = numBytes)
+        
+        returnDict = collections.defaultdict(list)
+        numPackets = len(result) // numBytes
+        bad = set(badPackets)
+        
+        start = 0
+        while start < numPackets:
+            stop = start + 1
+            while stop < numPackets and ((stop in bad) == (start in bad)):
+                stop += 1
+            
+            readings = self.processStreamData(result[start*numBytes:stop*numBytes], numBytes = numBytes)
+            for key, values in readings.items():
+                if start in bad:
+                    values = [ float('nan') ] * len(values)
+                returnDict[key].extend(values)
+            
+            start = stop
+        
+        return returnDict
+    
+    def startStreamReader(self, numBlocks = 64):
+        """
+        Name: Device.startStreamReader(numBlocks = 64)
+        Args: numBlocks, how many blocks of stream data to buffer. A block
+                         is what one streamData() request reads.
+        Desc: Starts streaming (if streamStart() hasn't been called yet)
+              and reads the stream on a thread of its own into a ring of
+              preallocated blocks. A slow consumer then can't stall the
+              reads and overflow the device's buffer. Returns the
+              StreamReader; call its stop() when done.
+        Note: You must call streamConfig() before calling this function.
+        
+        >>> d.streamConfig(NumChannels = 1, ChannelNumbers = [0], ChannelOptions = [0], ScanFrequency = 50000)
+        >>> reader = d.startStreamReader()
+        >>> reader.getData()
+        {'AIN0': [...], 'errors': 0, 'missed': 0, ...}
+        >>> reader.stop()
+        """
+        reader = StreamReader(self, numBlocks)
+        reader.start()
+        return reader
+    
+    def controlLoop(self, inputs, outputs, callback, period):
+        """
+        Name: Device.controlLoop(inputs, outputs, callback, period)
+        Args: inputs, the FeedbackCommands to read every cycle (AIN24,
+                      Counter0, QuadratureInputTimer, ...)
+              outputs, the FeedbackCommands that set the outputs (DAC0_16,
+                       BitStateWrite, Timer0, ...)
+              callback, called each cycle with the list of input results.
+                        It returns the outputs for the next cycle, a list
+                        with a command (or None to leave it alone) for each
+                        of outputs, or None to change nothing.
+              period, seconds between cycles
+        Desc: Returns a ControlLoop, which writes the outputs and reads the
+              inputs in a single Feedback packet each cycle.
+        
+        >>> def control(results):
+        ...     return [ u6.DAC0_16(pid.update(results[0])) ]
+        >>> loop = d.controlLoop([ u6.AIN24(0) ], [ u6.DAC0_16(0) ], control, 0.002)
+        >>> loop.run(cycles = 5000)
+        >>> print loop.statistics
+        """
+        return ControlLoop(self, inputs, outputs, callback, period)
+    
+    def waveformPlayer(self, rate, samples = None, function = None, duration = None, dacNumber = 0):
+        """
+        Name: Device.waveformPlayer(rate, samples = None, function = None,
+                                    duration = None, dacNumber = 0)
+        Args: rate, DAC updates a second
+              samples, the voltages to play, one per update
+              function, instead of samples, a function of the time in
+                        seconds that returns the voltage
+              duration, with function, the length of the waveform in
+                        seconds
+              dacNumber, 0 or 1
+        Desc: Returns a WaveformPlayer, which has a prebuilt Feedback
+              packet for every sample and plays them on a fixed schedule.
+        
+        >>> sine = lambda t: 2.5 + 2 * math.sin(2 * math.pi * 10 * t)
+        >>> player = d.waveformPlayer(500, function = sine, duration = 0.1)
+        >>> player.play(duration = 5)
+        >>> print player
+        """
+        return WaveformPlayer(self, rate, samples, function, duration, dacNumber)
+    
     def streamStop(self):
         """
         Name: Device.streamStop()
@@ -962,109 +1139,1360 @@ class Device(object):
         
         device = None
 
-# --------------------- BEGIN LabJackPython ---------------------------------
-
-def setChecksum(command):
-    """Returns a command with checksums places in the proper locations
-
-    For Windows, Mac, and Linux
+class StreamReader(object):
+    """
+    Name: StreamReader(device, numBlocks = 64)
+    Args: device, a configured U3, U6 or UE9
+          numBlocks, how many blocks the ring holds
+    Desc: Reads stream data from device on a thread of its own. Each read
+          goes straight into a block of a preallocated ring, one
+          packetsPerRequest packets in size, so nothing is allocated or
+          copied per read. If the consumer falls behind and the ring fills
+          up, the oldest block is dropped and counted in overruns, so the
+          device is always read on time.
+          
+          readBlock(), returns the next block's raw bytes as a memoryview
+              into the ring, without copying. It stays valid until the next
+              readBlock(), getData() or releaseBlock().
+          getData(), returns the next block as a dictionary like the ones
+              streamData() yields
+          blocksAvailable(), the fill level of the ring in blocks
+          overruns, the number of blocks dropped because the ring was full
+    
+          Use Device.startStreamReader() to make one.
+    """
+    def __init__(self, device, numBlocks = 64):
+        if numBlocks < 2:
+            raise LabJackException("A StreamReader needs at least 2 blocks.")
+        
+        self.device = device
+        self.numBlocks = numBlocks
+        
+        # Only the UE9 has packets of a different size than this.
+        self.packetSize = getattr(device, 'streamPacketSize', 14 + (device.streamSamplesPerPacket * 2))
+        self.blockSize = self.packetSize * device.packetsPerRequest
+        
+        self.ring = bytearray(self.blockSize * numBlocks)
+        self.lengths = [ 0 ] * numBlocks
+        self.free = collections.deque(range(numBlocks))
+        self.filled = collections.deque()
+        self.held = None
+        
+        self.condition = threading.Condition()
+        self.overruns = 0
+        self.blocksRead = 0
+        self.exception = None
+        self.running = False
+        self.thread = None
+    
+    def start(self):
+        if not self.device.streamStarted:
+            self.device.streamStart()
+        
+        self.running = True
+        self.thread = threading.Thread(target = self._run, name = "StreamReader")
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def stop(self):
+        """
+        Stops the reader thread and then the stream.
+        """
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        with self.condition:
+            self.condition.notifyAll()
+        
+        if self.device.streamStarted:
+            self.device.streamStop()
+    
+    def _nextFreeBlock(self):
+        with self.condition:
+            if self.free:
+                return self.free.popleft()
+            
+            self.overruns += 1
+            return self.filled.popleft()
     
-    Sample Usage:
+    def _run(self):
+        try:
+            while self.running:
+                block = self._nextFreeBlock()
+                offset = block * self.blockSize
+                
+                # Keep going until the block ends on a packet boundary. Over
+                # USB every read does, but TCP can split packets. Empty
+                # packets are dropped as they complete, as streamData()
+                # does, so they don't take up room in the block.
+                length = 0
+                ready = 0
+                while length < self.blockSize and self.running:
+                    numBytes = self.device.readInto(self.ring, self.blockSize - length, stream = True, offset = offset + length)
+                    length += numBytes
+                    
+                    position = ready + ((length - ready) // self.packetSize) * self.packetSize
+                    kept = _dropEmptyStreamPackets(self.ring, offset + ready, offset + position, self.packetSize) - offset
+                    if kept != position:
+                        self.ring[offset+kept:offset+kept+length-position] = self.ring[offset+position:offset+length]
+                        length = kept + length - position
+                    ready = kept
+                    
+                    if numBytes == 0 and length % self.packetSize == 0:
+                        break
+                
+                with self.condition:
+                    if length == 0:
+                        self.free.appendleft(block)
+                        continue
+                    self.lengths[block] = length
+                    self.filled.append(block)
+                    self.blocksRead += 1
+                    self.condition.notifyAll()
+        except Exception, e:
+            self.exception = e
+            self.running = False
+            with self.condition:
+                self.condition.notifyAll()
     
-    >>> from LabJackPython import *
-    >>> command = [0] * 12
-    >>> command[1] = 0xf8
-    >>> command[2] = 0x03
-    >>> command[3] = 0x0b
-    >>> command = SetChecksum(command)
-    >>> command
-    [7, 248, 3, 11, 0, 0, 0, 0, 0, 0, 0, 0]
-
-    @type  command: List
-    @param command: The command by which to calculate the checksum
-
-            
-    @rtype: List
-    @return: A command list with checksums in the proper locations.
-    """  
+    def blocksAvailable(self):
+        return len(self.filled)
     
-    if len(command) < 6:
-        raise LabJackException("Command does not contain enough bytes.")
+    def releaseBlock(self):
+        """
+        Gives the block from the last readBlock() back to the ring.
+        """
+        with self.condition:
+            if self.held is not None:
+                self.free.append(self.held)
+                self.held = None
+    
+    def readBlock(self, timeout = None):
+        """
+        Name: StreamReader.readBlock(timeout = None)
+        Args: timeout, seconds to wait for a block, None to wait as long as
+                       the reader is running
+        Desc: Returns the next block of raw stream packets as a memoryview
+              into the ring, or None if none arrived in time.
+        """
+        self.releaseBlock()
+        
+        with self.condition:
+            if timeout is not None:
+                deadline = time.time() + timeout
+            while not self.filled and self.running:
+                if timeout is None:
+                    self.condition.wait(1)
+                elif deadline > time.time():
+                    self.condition.wait(deadline - time.time())
+                else:
+                    break
+            
+            if not self.filled:
+                if self.exception is not None:
+                    raise self.exception
+                return None
+            
+            self.held = self.filled.popleft()
+            offset = self.held * self.blockSize
+            return memoryview(self.ring)[offset:offset + self.lengths[self.held]]
     
-    try:        
-        a = command[1]
+    def getData(self, convert = True, timeout = None, validateChecksums = False):
+        """
+        Name: StreamReader.getData(convert = True, timeout = None,
+                                   validateChecksums = False)
+        Args: convert, convert the readings to voltages
+              timeout, seconds to wait for a block
+              validateChecksums, check the packets' checksums, as
+                                 Device.streamData() does
+        Desc: Returns the next block as a dictionary like streamData()
+              yields, or None if no block arrived in time.
+        """
+        block = self.readBlock(timeout)
+        if block is None:
+            return None
         
-        a = (a & 0x78) >> 3
+        result = block.tobytes()
+        self.releaseBlock()
         
-        #Check if the command is an extended command
-        if a == 15:
-            command = setChecksum16(command)
-            command = setChecksum8(command, 6)
-            return command
-        else:
-            command = setChecksum8(command, len(command))
-            return command
-    except LabJackException, e:
-        raise e
-    except Exception, e:
-        raise LabJackException("SetChecksum Exception:" + str(e))
-
-
+        returnDict = self.device._streamBlockInfo(result, self.packetSize, validateChecksums)
+        if convert:
+            returnDict.update(self.device._processStreamBlock(result, self.packetSize, returnDict.get('badPackets')))
+        return returnDict
 
-def verifyChecksum(buffer):
-    """Verifies the checksum of a given buffer using the traditional U3/UE9 Command Structure.
+class StreamReassembler(object):
     """
+    Name: StreamReassembler(packetSize, capacity)
+    Args: packetSize, the number of bytes in a stream packet
+          capacity, how many bytes to preallocate. The buffer grows if a
+                    read needs more room than this.
+    Desc: Puts stream packets back together from reads that can end
+          anywhere, as reads from a TCP socket do. Reads go straight into a
+          preallocated bytearray. As packets complete they are checked
+          and the empty ones (all zeros, which the UE9 pads its stream
+          with) are dropped by sliding the next packets down over them.
+          With NumPy, all the packets a read completed are checked at
+          once.
+          Every byte is copied a bounded number of times, so the cost of
+          reassembling is linear in the amount streamed.
+          
+          readFrom(device, numBytes), reads up to numBytes of stream data
+              from device into the buffer
+          feed(data), adds bytes that were read some other way
+          packetsReady(), the number of complete packets waiting
+          take(numPackets), removes numPackets packets and returns them as
+              a str
+    """
+    def __init__(self, packetSize, capacity):
+        self.packetSize = packetSize
+        self.buffer = bytearray(max(capacity, packetSize))
+        
+        # buffer[start:ready] holds complete packets, and buffer[ready:end]
+        # the start of the next one.
+        self.start = 0
+        self.ready = 0
+        self.end = 0
+    
+    def readFrom(self, device, numBytes):
+        self._makeRoom(numBytes)
+        readBytes = device.readInto(self.buffer, numBytes, stream = True, offset = self.end)
+        self.end += readBytes
+        self._collect()
+        return readBytes
+    
+    def feed(self, data):
+        self._makeRoom(len(data))
+        self.buffer[self.end:self.end+len(data)] = data
+        self.end += len(data)
+        self._collect()
+    
+    def packetsReady(self):
+        return (self.ready - self.start) // self.packetSize
+    
+    def take(self, numPackets):
+        stop = self.start + numPackets*self.packetSize
+        if stop > self.ready:
+            raise LabJackException("Only %s packets are ready." % self.packetsReady())
+        result = str(self.buffer[self.start:stop])
+        self.start = stop
+        if self.start == self.end:
+            self.start = self.ready = self.end = 0
+        return result
+    
+    def _makeRoom(self, numBytes):
+        """
+        Makes sure numBytes more fit after end, by moving what's left down
+        to the front of the buffer, and growing it if that isn't enough.
+        """
+        if self.end + numBytes <= len(self.buffer):
+            return
+        
+        left = self.end - self.start
+        if left + numBytes > len(self.buffer):
+            self.buffer.extend(bytearray(left + numBytes - len(self.buffer)))
+        if self.start:
+            self.buffer[:left] = self.buffer[self.start:self.end]
+            self.ready -= self.start
+            self.end -= self.start
+            self.start = 0
+    
+    def _collect(self):
+        """
+        Moves each packet that has completed since the last call onto the
+        end of the ready packets, skipping the empty ones.
+        """
+        n = self.packetSize
+        buffer = self.buffer
+        position = self.ready + ((self.end - self.ready) // n) * n
+        ready = _dropEmptyStreamPackets(buffer, self.ready, position, n)
+        
+        if position != ready:
+            # Slide the partial packet down against the ready ones.
+            buffer[ready:ready+self.end-position] = buffer[position:self.end]
+            self.end = ready + self.end - position
+        self.ready = ready
+
+def _dropEmptyStreamPackets(buffer, start, stop, packetSize):
+    """
+    Drops the empty packets (all zeros, which the UE9 pads its stream
+    with) from the whole packets in buffer[start:stop], by sliding the
+    packets after them down. Returns where the packets kept now end.
+    """
+    n = packetSize
+    count = (stop - start) // n
+    ready = start
+    
+    if numpy is not None and count > 1:
+        # One row-wise test on a 2D view finds the empty packets.
+        packets = numpy.frombuffer(buffer, dtype = numpy.uint8, count = count*n, offset = start).reshape(count, n)
+        keep = packets.any(axis = 1)
+        if keep.all():
+            ready = stop
+        else:
+            kept = packets[keep].tostring()
+            buffer[ready:ready+len(kept)] = kept
+            ready += len(kept)
+        # The view has to go before the buffer can grow.
+        del packets
+    else:
+        emptyPacket = bytearray(n)
+        for packetStart in range(start, stop, n):
+            # Real packets have a non-zero command byte, so the full
+            # comparison only happens for the empty ones.
+            if buffer[packetStart+1] != 0 or buffer[packetStart:packetStart+n] != emptyPacket:
+                if packetStart != ready:
+                    buffer[ready:ready+n] = buffer[packetStart:packetStart+n]
+                ready += n
+    
+    return ready
+
+class FeedbackCommandType(type):
+    """
+    Name: FeedbackCommandType
+    Desc: The metaclass of the U3 and U6 FeedbackCommands. Commands are
+          flyweights: making one with the same arguments as one made
+          before returns that same instance, so AIN24(0) in a polling loop
+          costs a dictionary lookup instead of building a new object and
+          its cmdBytes each time. The arguments are matched up with the
+          constructor's signature first, so AIN24(0), AIN24(0, 0) and
+          AIN24(0, ResolutionIndex = 0) are the same command.
+          
+          Only classes that declare __slots__ of their own are cached, so
+          a subclass without them (which may keep state of its own) gets a
+          new instance every time. So does a command with an argument that
+          isn't an int, bool or None, like PortStateWrite's lists. Cached
+          commands are shared, so they are immutable: their attributes
+          can't be set, and cmdBytes returns a new list every time.
+          
+          The cache holds at most MAX_CACHED_COMMANDS commands and is
+          emptied when it fills up. clearCache() empties it.
+    """
+    MAX_CACHED_COMMANDS = 4096
+    CACHEABLE_TYPES = frozenset([ int, long, bool, type(None) ])
+    cache = dict()
     
-    buff0 = buffer[0]
-    buff4 = buffer[4]
-    buff5 = buffer[5]
-
-    tempBuffer = setChecksum(buffer)
+    # Stands in for the arguments without a default in a signature.
+    _REQUIRED = object()
     
-    if (buff0 == tempBuffer[0]) and (buff4 == tempBuffer[4]) \
-    and (buff5 == tempBuffer[5]):
-        return True
-
-    return False
-
+    def __init__(cls, name, bases, attrs):
+        super(FeedbackCommandType, cls).__init__(name, bases, attrs)
+        cls._cacheable = '__slots__' in attrs
+        cls._signature = FeedbackCommandType._signatureOf(cls.__init__)
+    
+    @staticmethod
+    def _signatureOf(init):
+        """
+        Returns the argument names of init, where each one is, and their
+        defaults, or None if its arguments can't be matched up.
+        """
+        try:
+            spec = inspect.getargspec(init)
+        except TypeError:
+            # object.__init__, which takes no arguments.
+            return (), dict(), ()
+        if spec.varargs or spec.keywords:
+            return None
+        
+        names = spec.args[1:]
+        defaults = spec.defaults or ()
+        required = (FeedbackCommandType._REQUIRED, ) * (len(names) - len(defaults))
+        return names, dict((name, i) for i, name in enumerate(names)), required + tuple(defaults)
+    
+    def _normalize(cls, args, kargs):
+        """
+        Returns every argument to the constructor in order, defaults
+        included, or None if they don't fit its signature.
+        """
+        if cls._signature is None:
+            return None
+        names, positions, defaults = cls._signature
+        if len(args) > len(names):
+            return None
+        
+        values = list(args) + list(defaults[len(args):])
+        for name, value in kargs.iteritems():
+            i = positions.get(name)
+            if i is None or i < len(args):
+                return None
+            values[i] = value
+        if any(value is FeedbackCommandType._REQUIRED for value in values):
+            return None
+        return tuple(values)
+    
+    def _build(cls, args, kargs):
+        command = type.__call__(cls, *args, **kargs)
+        # Kept so the command can be pickled.
+        command._args = (args, kargs)
+        return command
+    
+    def __call__(cls, *args, **kargs):
+        if not cls._cacheable:
+            return cls._build(args, kargs)
+        
+        # Only commands made from ints are cached, and the argument types
+        # are part of the key, since 8.0 == 8 and True == 1 hash the same.
+        # AIN24(0, 8.0) then can't be handed out for AIN24(0, 8), nor
+        # BitStateWrite(0, 1) for BitStateWrite(0, True).
+        cacheableTypes = FeedbackCommandType.CACHEABLE_TYPES
+        argTypes = tuple(map(type, args))
+        if not cacheableTypes.issuperset(argTypes):
+            return cls._build(args, kargs)
+        if kargs:
+            kargTypes = frozenset((name, value, type(value)) for name, value in kargs.iteritems())
+            if not all(valueType in cacheableTypes for name, value, valueType in kargTypes):
+                return cls._build(args, kargs)
+            key = (cls, args, argTypes, kargTypes)
+        else:
+            key = (cls, args, argTypes)
+        
+        cache = FeedbackCommandType.cache
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        
+        # A new way of writing the arguments. Look the command up by the
+        # full set of arguments, and remember this way of writing them.
+        values = cls._normalize(args, kargs)
+        if values is None:
+            # Let the constructor complain about them.
+            return cls._build(args, kargs)
+        valueTypes = tuple(map(type, values))
+        if not cacheableTypes.issuperset(valueTypes):
+            return cls._build(values, dict())
+        
+        if len(cache) >= FeedbackCommandType.MAX_CACHED_COMMANDS - 1:
+            cache.clear()
+        fullKey = (cls, values, valueTypes, None)
+        command = cache.get(fullKey)
+        if command is None:
+            command = cls._build(values, dict())
+            cache[fullKey] = command
+        cache[key] = command
+        return command
+    
+    @staticmethod
+    def clearCache():
+        FeedbackCommandType.cache.clear()
+
+def _rebuildFeedbackCommand(cls, args, kargs):
+    """
+    Unpickles a FeedbackCommand by making it again, so a cached command
+    comes back as the shared instance.
+    """
+    return cls(*args, **kargs)
 
-# 1 = LJ_ctUSB
-def listAll(deviceType, connectionType = 1):
-    """listAll(deviceType, connectionType) -> [[local ID, Serial Number, IP Address], ...]
+class FeedbackCommandBase(object):
+    """
+    Name: FeedbackCommandBase
+    Desc: What the U3 and U6 FeedbackCommand classes have in common. The
+          command's bytes are kept in a tuple, and cmdBytes returns them
+          as a new list, so a shared command's bytes can't be changed
+          through it. Setting cmdBytes, as a subclass's constructor does,
+          stores a tuple of them.
+          
+          Commands pickle as the arguments they were made with.
+    """
+    __metaclass__ = FeedbackCommandType
+    __slots__ = ( '_cmdBytes', '_args' )
     
-    Searches for all devices of a given type over a given connection type and returns a list 
-    of all devices found.
+    @property
+    def cmdBytes(self):
+        return list(self._cmdBytes)
     
-    WORKS on WINDOWS, MAC, UNIX
+    @cmdBytes.setter
+    def cmdBytes(self, cmdBytes):
+        self._cmdBytes = tuple(cmdBytes)
+    
+    def __reduce__(self):
+        args, kargs = self._args
+        return _rebuildFeedbackCommand, (type(self), args, kargs)
+
+class FeedbackProgram(object):
     """
+    Name: FeedbackProgram(device, commands, split = False)
+    Args: device, the U3 or U6 to run the program on
+          commands, a flat list of the device's FeedbackCommands
+          split, pack the commands into as many Feedback packets as they
+                 need, instead of raising an exception when they don't fit
+                 in one
+    Desc: A getFeedback() call that has been worked out ahead of time. The
+          packets, their checksums, the response lengths, and where in the
+          responses each command's reply sits are all computed once, so
+          run() only writes, reads and hands each slice to its command's
+          handle(). Get one from the device's compileFeedback().
+          
+          With split, the commands are packed in order into the fewest
+          packets that keep both the command and the response within
+          MAX_USB_PACKET_LENGTH. run() writes all of them before reading
+          any responses, holding the device lock throughout, and returns
+          one list of results in the original order.
+          
+          A command can be swapped for another of the same size with
+          program[i] = command (or patch(i, command)), which rewrites just
+          its bytes and adjusts the checksums. That's how a DAC or timer
+          value is changed between runs.
+    
+    >>> program = d.compileFeedback(u6.AIN24(0), u6.DAC0_16(0))
+    >>> program[1] = u6.DAC0_16(32768)
+    >>> program.run()
+    [8388608, None]
+    """
+    def __init__(self, device, commands, split = False):
+        self.device = device
+        self.commands = list(commands)
+        
+        # Each packet is [ ChecksumTemplate, readLen, index of its first
+        # command ]. sendOffsets holds (packet number, offset) and decoders
+        # (packet number, handle, start, stop) for each command.
+        self.packets = []
+        self.sendOffsets = []
+        self.decoders = []
+        
+        start = 0
+        while start < len(self.commands) or not self.packets:
+            if split:
+                stop = self._fit(start)
+            else:
+                stop = len(self.commands)
+            self._addPacket(start, stop)
+            start = stop
     
-    if connectionType == LJ_ctLJSOCKET:
-        ipAddress, port = deviceType.split(":")
-        port = int(port)
+    def _fit(self, start):
+        """
+        Returns the end of the longest run of commands from start that
+        fits in one packet (at least one command).
+        """
+        sendLen = 7
+        readLen = 9
+        stop = start
+        while stop < len(self.commands):
+            cmd = self.commands[stop]
+            sendLen += len(cmd._cmdBytes)
+            readLen += cmd.readLen
+            if (sendLen + sendLen % 2 > MAX_USB_PACKET_LENGTH or readLen + readLen % 2 > MAX_USB_PACKET_LENGTH) and stop > start:
+                break
+            stop += 1
+        return stop
+    
+    def _addPacket(self, start, stop):
+        number = len(self.packets)
+        packet = [ 0, 0xF8, 0, 0x00, 0, 0, 0 ]
+        readLen = 9
+        for cmd in self.commands[start:stop]:
+            self.sendOffsets.append((number, len(packet)))
+            packet += cmd._cmdBytes
+            self.decoders.append((number, cmd.handle, readLen, readLen + cmd.readLen))
+            readLen += cmd.readLen
         
-        serverSocket = socket.socket()
-        serverSocket.connect((ipAddress, port))
-        serverSocket.settimeout(10)
+        if len(packet) % 2:
+            packet += [ 0 ]
+        packet[2] = len(packet) // 2 - 3
         
-        f = serverSocket.makefile(bufsize = 0)
-        f.write("scan\r\n")
+        if readLen % 2:
+            readLen += 1
         
-        l = f.readline().strip()
+        if len(packet) > MAX_USB_PACKET_LENGTH:
+            raise LabJackException("ERROR: The feedback command you are attempting to send is bigger than 64 bytes ( %s bytes ). Break your commands up into separate calls to getFeedback()." % len(packet))
+        
+        if readLen > MAX_USB_PACKET_LENGTH:
+            raise LabJackException("ERROR: The feedback command you are attempting to send would yield a response that is greater than 64 bytes ( %s bytes ). Break your commands up into separate calls to getFeedback()." % readLen)
+        
+        self.packets.append([ Checksum.ChecksumTemplate(packet), readLen, start ])
+    
+    def __len__(self):
+        return len(self.commands)
+    
+    def __getitem__(self, index):
+        return self.commands[index]
+    
+    def __setitem__(self, index, command):
+        self.patch(index, command)
+    
+    def patch(self, index, command):
+        """
+        Name: FeedbackProgram.patch(index, command)
+        Args: index, which command to replace
+              command, the FeedbackCommand to put in its place
+        Desc: Replaces a command with one that sends and receives the same
+              number of bytes.
+        """
+        old = self.commands[index]
+        if len(command._cmdBytes) != len(old._cmdBytes) or command.readLen != old.readLen:
+            raise LabJackException("%s can't be patched over %s, they aren't the same size. Compile a new program instead." % (command, old))
+        
+        number, offset = self.sendOffsets[index]
+        self.packets[number][0].update(offset, command._cmdBytes)
+        number, handle, start, stop = self.decoders[index]
+        self.decoders[index] = (number, command.handle, start, stop)
+        self.commands[index] = command
+    
+    def packet(self, number = 0):
+        """
+        Returns the packet run() sends, checksums and all. number picks
+        which one for a program that was split.
+        """
+        return self.packets[number][0].packet()
+    
+    def _checkResponse(self, rcvBuffer, first):
         try:
-            status, numLines = l.split(' ')
-        except ValueError:
-            raise Exception("Got invalid line from server: %s" % l)
-            
-        if status.lower().startswith('ok'):
-            lines = []
-            marked = None
-            for i in range(int(numLines)):
-                l = f.readline().strip()
-                dev = parseline(l)
-                lines.append(dev)       
-            
-            f.close()
-            serverSocket.close()
+            self.device._checkCommandBytes(rcvBuffer, [0xF8])
+            
+            if rcvBuffer[3] != 0x00:
+                raise LabJackException("Got incorrect command bytes")
+        except LowlevelErrorException:
+            culprit = self.commands[ first + (rcvBuffer[7] -1) ]
+            raise LowlevelErrorException("\nThis Command\n    %s\nreturned an error:\n    %s" %  (culprit , lowlevelErrorToString(rcvBuffer[6])))
+    
+    def run(self):
+        """
+        Name: FeedbackProgram.run()
+        Args: None
+        Desc: Sends the program to the device and returns the list of
+              results, the same as getFeedback() would.
+        """
+        device = self.device
+        
+        if len(self.packets) == 1:
+            template, readLen, first = self.packets[0]
+            responses = [ device._writeRead(template.packet(), readLen, [], checkBytes = False, stream = False, checksum = False) ]
+        else:
+            with device.deviceLock:
+                for template, readLen, first in self.packets:
+                    device.write(template.packet(), checksum = False)
+                
+                responses = []
+                for template, readLen, first in self.packets:
+                    rcvBuffer = device.read(readLen)
+                    if device.debug: print "Response: ", hexWithoutQuotes(rcvBuffer)
+                    responses.append(rcvBuffer)
+        
+        # Check the responses for errors
+        for (template, readLen, first), rcvBuffer in zip(self.packets, responses):
+            self._checkResponse(rcvBuffer, first)
+        
+        return [ handle(responses[number][start:stop]) for number, handle, start, stop in self.decoders ]
+
+class PreparedRead(object):
+    """
+    Name: PreparedRead(device, command, readLen, decode)
+    Args: device, the device to read from
+          command, the command to send. Its checksums are set here, once.
+          readLen, the length of the response
+          decode, a function that checks the response and returns the
+                  value read from it
+    Desc: A read worked out ahead of time. read() writes the packet built
+          when the PreparedRead was made and hands the response to decode,
+          which has whatever it needs, like calibration constants, looked
+          up already. So a read costs little more than the round trip.
+          Get one from the device's prepareAIN().
+    
+    >>> reader = d.prepareAIN(0)
+    >>> reader.read()
+    1.4712159633636475
+    """
+    def __init__(self, device, command, readLen, decode):
+        self.device = device
+        self.packet = setChecksum(bytearray(command))
+        self.readLen = readLen
+        self.decode = decode
+    
+    def read(self):
+        return self.decode(self.device._writeRead(self.packet, self.readLen, [], checkBytes = False, checksum = False))
+
+def _makeMonotonic():
+    """
+    Returns a function that reads a clock that never jumps, for timing.
+    Python 2 doesn't have time.monotonic(), so this uses the
+    platform's own clock.
+    """
+    if os.name == 'nt':
+        # time.clock() reads QueryPerformanceCounter on Windows.
+        return time.clock
+    
+    if sys.platform.startswith('linux'):
+        clockId = 1 # CLOCK_MONOTONIC
+    elif sys.platform == 'darwin':
+        clockId = 6 # CLOCK_MONOTONIC, macOS 10.12 and up
+    else:
+        return time.time
+    
+    class timespec(ctypes.Structure):
+        _fields_ = [ ('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long) ]
+    
+    try:
+        libName = ctypes.util.find_library('rt') or ctypes.util.find_library('c')
+        clock_gettime = ctypes.CDLL(libName).clock_gettime
+        clock_gettime.argtypes = [ ctypes.c_int, ctypes.POINTER(timespec) ]
+        now = timespec()
+        if clock_gettime(clockId, ctypes.byref(now)) != 0:
+            return time.time
+    except (OSError, AttributeError, TypeError):
+        return time.time
+    
+    def monotonic():
+        # Each call gets its own timespec. ctypes lets go of the GIL during
+        # the call, so threads sharing one could read each other's halves.
+        now = timespec()
+        clock_gettime(clockId, ctypes.byref(now))
+        return now.tv_sec + now.tv_nsec * 1e-9
+    
+    return monotonic
+
+monotonic = _makeMonotonic()
+monotonic.__doc__ = """monotonic() -> seconds
+
+Returns the time of a clock that only goes forward, for measuring
+intervals. Only differences between readings mean anything."""
+
+class TimingStatistics(object):
+    """
+    Name: TimingStatistics(period = None)
+    Args: period, the interval the events are meant to happen at
+    Desc: Keeps running statistics of the intervals between events, such as
+          the cycles of a ControlLoop. Nothing is stored per event.
+          
+          mark(now = None), records an event at now (or monotonic())
+          add(interval), records an interval directly
+          miss(count = 1), counts events that missed their deadline
+          
+          count, minimum, maximum, mean and stdDev describe the intervals.
+          maxJitter is the largest difference between an interval and
+          period, and misses the number of missed deadlines.
+    """
+    def __init__(self, period = None):
+        self.period = period
+        self.reset()
+    
+    def reset(self):
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self.mean = 0.0
+        self.maxJitter = 0.0
+        self.misses = 0
+        self.last = None
+        self._sumSquares = 0.0
+    
+    def mark(self, now = None):
+        if now is None:
+            now = monotonic()
+        if self.last is not None:
+            self.add(now - self.last)
+        self.last = now
+    
+    def add(self, interval):
+        self.count += 1
+        if self.minimum is None or interval < self.minimum:
+            self.minimum = interval
+        if self.maximum is None or interval > self.maximum:
+            self.maximum = interval
+        
+        # Welford's method, so the variance doesn't lose precision.
+        delta = interval - self.mean
+        self.mean += delta / self.count
+        self._sumSquares += delta * (interval - self.mean)
+        
+        if self.period is not None:
+            self.maxJitter = max(self.maxJitter, abs(interval - self.period))
+    
+    def miss(self, count = 1):
+        self.misses += count
+    
+    def _getStdDev(self):
+        if self.count < 2:
+            return 0.0
+        return (self._sumSquares / (self.count - 1)) ** 0.5
+    
+    stdDev = property(_getStdDev)
+    
+    def summary(self):
+        return dict(count = self.count, minimum = self.minimum, maximum = self.maximum, mean = self.mean, stdDev = self.stdDev, maxJitter = self.maxJitter, misses = self.misses)
+    
+    def __str__(self):
+        if self.count == 0:
+            return "No intervals recorded."
+        return "%s intervals: mean %.6f s, std dev %.6f s, min %.6f s, max %.6f s, max jitter %.6f s, %s missed" % (self.count, self.mean, self.stdDev, self.minimum, self.maximum, self.maxJitter, self.misses)
+
+class ControlLoop(object):
+    """
+    Name: ControlLoop(device, inputs, outputs, callback, period)
+    Args: device, a U3 or U6
+          inputs, the FeedbackCommands to read every cycle
+          outputs, the FeedbackCommands that set the outputs
+          callback, called each cycle with the list of input results. It
+                    returns the outputs for the next cycle (see setOutputs),
+                    or None to leave them alone.
+          period, seconds between cycles
+    Desc: Runs a read-compute-write loop at a fixed rate with one round trip
+          a cycle. The outputs the callback returned last cycle and this
+          cycle's inputs go in the same Feedback packet, outputs first, as
+          a compiled FeedbackProgram. So the outputs are written and the
+          inputs read in the same transaction, instead of a transaction for
+          each.
+          
+          Cycles start on a fixed schedule, period apart. A cycle that
+          starts after its scheduled time has passed is counted in
+          statistics.misses, and the schedule skips ahead rather than
+          trying to catch up. statistics, a TimingStatistics, also has the
+          intervals between cycle starts.
+          
+          run(cycles = None), runs the loop until stop() or for cycles
+              cycles
+          start(), runs the loop on a thread of its own
+          stop(), stops the loop after the current cycle
+          setOutputs(outputs), changes the outputs for the next cycle
+          
+          Use the device's controlLoop() to make one.
+    """
+    def __init__(self, device, inputs, outputs, callback, period):
+        self.device = device
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.callback = callback
+        self.period = period
+        self.statistics = TimingStatistics(period)
+        self.cycles = 0
+        self.exception = None
+        self.running = False
+        self.thread = None
+        self._compile()
+    
+    def _compile(self):
+        self.program = self.device.compileFeedback(*(self.outputs + self.inputs))
+    
+    def _transact(self):
+        """
+        Writes the outputs, reads the inputs and returns the input results.
+        """
+        return self.program.run()[len(self.outputs):]
+    
+    def setOutputs(self, outputs):
+        """
+        Name: ControlLoop.setOutputs(outputs)
+        Args: outputs, a list with a FeedbackCommand for each output, or
+                       None to keep the one that's there. Each command must
+                       be the same size as the one it replaces, like a
+                       DAC0_16 for a DAC0_16.
+        Desc: Sets the outputs the next cycle writes.
+        """
+        for i, command in enumerate(outputs):
+            if command is not None:
+                self.program[i] = command
+                self.outputs[i] = command
+    
+    def run(self, cycles = None):
+        self.running = True
+        self._loop(cycles)
+    
+    def _loop(self, cycles = None):
+        self.statistics.last = None
+        deadline = monotonic()
+        try:
+            while self.running and (cycles is None or cycles > 0):
+                now = monotonic()
+                self.statistics.mark(now)
+                
+                outputs = self.callback(self._transact())
+                if outputs is not None:
+                    self.setOutputs(outputs)
+                self.cycles += 1
+                if cycles is not None:
+                    cycles -= 1
+                
+                deadline += self.period
+                now = monotonic()
+                if now > deadline:
+                    missed = int((now - deadline) / self.period) + 1
+                    self.statistics.miss(missed)
+                    deadline += missed * self.period
+                time.sleep(deadline - now)
+        finally:
+            self.running = False
+    
+    def _runThread(self):
+        try:
+            self._loop()
+        except Exception, e:
+            self.exception = e
+    
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target = self._runThread, name = "ControlLoop")
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def stop(self):
+        """
+        Stops the loop after the cycle it's in. If the loop stopped because
+        of an exception, it's raised here.
+        """
+        self.running = False
+        if self.thread is not None and self.thread is not threading.currentThread():
+            self.thread.join()
+            self.thread = None
+        if self.exception is not None:
+            exception, self.exception = self.exception, None
+            raise exception
+
+class PollTask(object):
+    """
+    Name: PollTask
+    Desc: A read registered with a PollScheduler. After each read, value
+          holds the command's result and timestamp the monotonic() time it
+          arrived. If the read failed, exception holds why. statistics is a
+          TimingStatistics of the intervals between reads and the deadlines
+          missed.
+    """
+    def __init__(self, device, command, period, callback, name):
+        self.device = device
+        self.command = command
+        self.period = period
+        self.callback = callback
+        self.name = name
+        self.nextDue = None
+        self.value = None
+        self.timestamp = None
+        self.exception = None
+        self.statistics = TimingStatistics(period)
+    
+    def __repr__(self):
+        return "<PollTask %s every %s s>" % (self.name, self.period)
+
+class PollScheduler(object):
+    """
+    Name: PollScheduler()
+    Desc: Reads channels at rates of their own without streaming. Each
+          read is a FeedbackCommand registered with add(). At each tick,
+          every read that's due on a device goes into the fewest Feedback
+          packets that hold them, so ten reads due together cost one
+          transaction, not ten. The compiled programs are cached by the set
+          of reads that were due, so a schedule that repeats doesn't
+          compile anything after the first time round.
+          
+          Results are timestamped with monotonic(). A read that's serviced
+          after its next one was due counts as a missed deadline, and its
+          schedule skips ahead instead of reading several times to catch
+          up.
+          
+          add(device, command, rate, callback = None, name = None), reads
+              command on device rate times a second. callback is called
+              with (task, value, timestamp) after each read.
+          remove(task), stops a read
+          tick(), does the reads that are due and returns when the next
+              one is
+          run(duration = None), ticks until stop() or for duration seconds
+          start(), runs on a thread of its own
+          stop(), stops running
+          
+          Works with devices that have compileFeedback(), the U3 and U6.
+    
+    >>> scheduler = PollScheduler()
+    >>> thermocouple = scheduler.add(d, u6.AIN24(0, ResolutionIndex = 8), 2)
+    >>> pressure = scheduler.add(d, u6.AIN24(1), 50)
+    >>> scheduler.add(d, u6.PortStateRead(), 100, callback = logDIO)
+    >>> scheduler.start()
+    >>> pressure.value, pressure.timestamp
+    (8388608, 1324.21735...)
+    """
+    MAX_CACHED_PROGRAMS = 256
+    
+    def __init__(self):
+        self.tasks = []
+        self.programs = dict()
+        self.lock = threading.Lock()
+        self.ticks = 0
+        self.exception = None
+        self.running = False
+        self.thread = None
+    
+    def add(self, device, command, rate, callback = None, name = None):
+        if not hasattr(device, 'compileFeedback'):
+            raise LabJackException("PollScheduler needs a device with compileFeedback(), such as a U3 or U6.")
+        if rate <= 0:
+            raise LabJackException("The rate must be more than 0.")
+        
+        if name is None:
+            name = str(command)
+        
+        task = PollTask(device, command, 1.0 / rate, callback, name)
+        task.nextDue = monotonic()
+        with self.lock:
+            self.tasks.append(task)
+            self.programs.clear()
+        return task
+    
+    def remove(self, task):
+        with self.lock:
+            self.tasks.remove(task)
+            self.programs.clear()
+    
+    def _program(self, device, due):
+        key = (id(device), tuple(id(task) for task in due))
+        program = self.programs.get(key)
+        if program is None:
+            if len(self.programs) >= self.MAX_CACHED_PROGRAMS:
+                self.programs.clear()
+            program = device.compileFeedback(split = True, *[ task.command for task in due ])
+            self.programs[key] = program
+        return program
+    
+    def tick(self):
+        """
+        Name: PollScheduler.tick()
+        Args: None
+        Desc: Does every read that's due, and returns the monotonic() time
+              the next one is due (None with nothing registered).
+        """
+        with self.lock:
+            now = monotonic()
+            byDevice = collections.OrderedDict()
+            for task in self.tasks:
+                if task.nextDue <= now:
+                    byDevice.setdefault(id(task.device), []).append(task)
+            
+            for due in byDevice.values():
+                device = due[0].device
+                try:
+                    values = self._program(device, due).run()
+                    exception = None
+                except LabJackException, e:
+                    values = [ None ] * len(due)
+                    exception = e
+                timestamp = monotonic()
+                
+                for task, value in zip(due, values):
+                    task.exception = exception
+                    if exception is None:
+                        task.value = value
+                        task.timestamp = timestamp
+                        task.statistics.mark(timestamp)
+                    
+                    task.nextDue += task.period
+                    if task.nextDue <= timestamp:
+                        missed = int((timestamp - task.nextDue) / task.period) + 1
+                        task.statistics.miss(missed)
+                        task.nextDue += missed * task.period
+            
+            self.ticks += 1
+            tasks = list(self.tasks)
+        
+        for due in byDevice.values():
+            for task in due:
+                if task.callback is not None and task.exception is None:
+                    task.callback(task, task.value, task.timestamp)
+        
+        if not tasks:
+            return None
+        return min(task.nextDue for task in tasks)
+    
+    def run(self, duration = None):
+        self.running = True
+        self._loop(duration)
+    
+    def _loop(self, duration = None):
+        end = None
+        if duration is not None:
+            end = monotonic() + duration
+        try:
+            while self.running:
+                nextDue = self.tick()
+                now = monotonic()
+                if end is not None and now >= end:
+                    break
+                if nextDue is None:
+                    nextDue = now + 0.1
+                if end is not None:
+                    nextDue = min(nextDue, end)
+                if nextDue > now:
+                    time.sleep(nextDue - now)
+        finally:
+            self.running = False
+    
+    def _runThread(self):
+        try:
+            self._loop()
+        except Exception, e:
+            self.exception = e
+    
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target = self._runThread, name = "PollScheduler")
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def stop(self):
+        """
+        Stops the scheduler. If it stopped because of an exception, it's
+        raised here.
+        """
+        self.running = False
+        if self.thread is not None and self.thread is not threading.currentThread():
+            self.thread.join()
+            self.thread = None
+        if self.exception is not None:
+            exception, self.exception = self.exception, None
+            raise exception
+
+class WaveformPlayer(object):
+    """
+    Name: WaveformPlayer(device, rate, samples = None, function = None,
+                         duration = None, dacNumber = 0)
+    Args: device, a U3 or U6
+          rate, DAC updates a second
+          samples, the voltages to play, one per update
+          function, instead of samples, a function of the time in seconds
+                    that returns the voltage
+          duration, with function, how many seconds of it make up the
+                    waveform
+          dacNumber, 0 or 1
+    Desc: Plays a waveform on a DAC with software-timed updates. Every
+          sample is turned into calibrated DAC bits with voltageToDACBits()
+          and built into a Feedback packet, checksums and all, before
+          anything is played. So an update is just a write and a read.
+          
+          Sample k of a play is due at start + k/rate, worked out from the
+          start each time so errors don't add up. An update that's late but
+          still within its period is sent straight away, and the next one
+          is still due on schedule, so playback catches up. If a whole
+          period or more has gone by, the samples that were missed are
+          skipped, counted in statistics.misses, so the waveform stays in
+          phase with the clock.
+          
+          play(cycles = None, duration = None), plays the waveform cycles
+              times over, for duration seconds, or until stop()
+          start(cycles = None, duration = None), plays on a thread of its
+              own
+          stop(), stops playing
+          
+          updates is the number of updates sent and achievedRate the rate
+          they went out at. timingError is a TimingStatistics of how late
+          each update was sent, and statistics one of the intervals
+          between them.
+          
+          Use the device's waveformPlayer() to make one.
+    """
+    def __init__(self, device, rate, samples = None, function = None, duration = None, dacNumber = 0):
+        if rate <= 0:
+            raise LabJackException("The rate must be more than 0.")
+        
+        if samples is None:
+            if function is None or duration is None:
+                raise LabJackException("Give either samples, or a function and a duration.")
+            samples = [ function(float(i) / rate) for i in range(int(round(duration * rate))) ]
+        
+        self.device = device
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.dacNumber = dacNumber
+        self.bits = [ self._toBits(volts) for volts in samples ]
+        if not self.bits:
+            raise LabJackException("The waveform has no samples.")
+        
+        self.packets = self._buildPackets()
+        self.statistics = TimingStatistics(self.period)
+        self.timingError = TimingStatistics()
+        self.updates = 0
+        self.first = None
+        self.last = None
+        self.exception = None
+        self.running = False
+        self.thread = None
+    
+    def __len__(self):
+        return len(self.packets)
+    
+    def _toBits(self, volts):
+        bits = self.device.voltageToDACBits(volts, dacNumber = self.dacNumber, is16Bits = True)
+        return max(0, min(bits, 0xffff))
+    
+    def _buildPackets(self):
+        self.program = self.device.compileFeedback(self.device._dac16Command(self.dacNumber, 0))
+        self.readLen = self.program.packets[0][1]
+        
+        packets = []
+        for bits in self.bits:
+            self.program[0] = self.device._dac16Command(self.dacNumber, bits)
+            packets.append(self.program.packet())
+        return packets
+    
+    def _transact(self, packet):
+        response = self.device._writeRead(packet, self.readLen, [], checkBytes = False, checksum = False)
+        self.program._checkResponse(response, 0)
+    
+    def _getAchievedRate(self):
+        if self.updates < 2 or self.last == self.first:
+            return None
+        return (self.updates - 1) / (self.last - self.first)
+    
+    achievedRate = property(_getAchievedRate)
+    
+    def summary(self):
+        return dict(updates = self.updates, rate = self.rate, achievedRate = self.achievedRate, skipped = self.statistics.misses, meanError = self.timingError.mean, maxError = self.timingError.maximum)
+    
+    def __str__(self):
+        if self.updates < 2:
+            return "%s updates sent." % self.updates
+        return "%s updates at %.3f Hz (asked for %s Hz), %s skipped, timing error mean %.6f s, max %.6f s" % (self.updates, self.achievedRate, self.rate, self.statistics.misses, self.timingError.mean, self.timingError.maximum)
+    
+    def play(self, cycles = None, duration = None):
+        self.running = True
+        self._loop(cycles, duration)
+    
+    def _loop(self, cycles = None, duration = None):
+        numSamples = len(self.packets)
+        total = None
+        if cycles is not None:
+            total = cycles * numSamples
+        
+        self.statistics.reset()
+        self.timingError.reset()
+        self.updates = 0
+        self.first = self.last = None
+        
+        start = monotonic()
+        end = None
+        if duration is not None:
+            end = start + duration
+        
+        k = 0
+        try:
+            while self.running:
+                deadline = start + k * self.period
+                now = monotonic()
+                if now < deadline:
+                    time.sleep(deadline - now)
+                    now = monotonic()
+                elif now - deadline >= self.period:
+                    missed = int((now - deadline) / self.period)
+                    self.statistics.miss(missed)
+                    k += missed
+                    deadline = start + k * self.period
+                
+                if (total is not None and k >= total) or (end is not None and deadline >= end):
+                    break
+                
+                self._transact(self.packets[k % numSamples])
+                
+                self.timingError.add(now - deadline)
+                self.statistics.mark(now)
+                if self.first is None:
+                    self.first = now
+                self.last = now
+                self.updates += 1
+                k += 1
+        finally:
+            self.running = False
+    
+    def _runThread(self, cycles, duration):
+        try:
+            self._loop(cycles, duration)
+        except Exception, e:
+            self.exception = e
+    
+    def start(self, cycles = None, duration = None):
+        self.running = True
+        self.thread = threading.Thread(target = self._runThread, args = (cycles, duration), name = "WaveformPlayer")
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def stop(self):
+        """
+        Stops playing after the update in progress. If playing stopped
+        because of an exception, it's raised here.
+        """
+        self.running = False
+        if self.thread is not None and self.thread is not threading.currentThread():
+            self.thread.join()
+            self.thread = None
+        if self.exception is not None:
+            exception, self.exception = self.exception, None
+            raise exception
+
+# --------------------- BEGIN LabJackPython ---------------------------------
+
+def setChecksum(command):
+    """Returns a command with checksums places in the proper locations
+
+    For Windows, Mac, and Linux
+    
+    Sample Usage:
+    
+    >>> from LabJackPython import *
+    >>> command = [0] * 12
+    >>> command[1] = 0xf8
+    >>> command[2] = 0x03
+    >>> command[3] = 0x0b
+    >>> command = SetChecksum(command)
+    >>> command
+    [7, 248, 3, 11, 0, 0, 0, 0, 0, 0, 0, 0]
+
+    @type  command: List
+    @param command: The command by which to calculate the checksum
+
+            
+    @rtype: List
+    @return: A command list with checksums in the proper locations.
+    """  
+    
+    if len(command) < 6:
+        raise LabJackException("Command does not contain enough bytes.")
+    
+    try:
+        return Checksum.setChecksums(command)
+    except LabJackException, e:
+        raise e
+    except Exception, e:
+        raise LabJackException("SetChecksum Exception:" + str(e))
+
+
+
+def verifyChecksum(buffer):
+    """Verifies the checksum of a given buffer using the traditional U3/UE9 Command Structure.
+    
+    The buffer isn't changed.
+    """
+    return Checksum.verify(buffer)
+
+
+# 1 = LJ_ctUSB
+def listAll(deviceType, connectionType = 1):
+    """listAll(deviceType, connectionType) -> [[local ID, Serial Number, IP Address], ...]
+    
+    Searches for all devices of a given type over a given connection type and returns a list 
+    of all devices found.
+    
+    WORKS on WINDOWS, MAC, UNIX
+    """
+    
+    if connectionType == LJ_ctLJSOCKET:
+        ipAddress, port = deviceType.split(":")
+        port = int(port)
+        
+        serverSocket = socket.socket()
+        serverSocket.connect((ipAddress, port))
+        serverSocket.settimeout(10)
+        
+        f = serverSocket.makefile(bufsize = 0)
+        f.write("scan\r\n")
+        
+        l = f.readline().strip()
+        try:
+            status, numLines = l.split(' ')
+        except ValueError:
+            raise Exception("Got invalid line from server: %s" % l)
+            
+        if status.lower().startswith('ok'):
+            lines = []
+            marked = None
+            for i in range(int(numLines)):
+                l = f.readline().strip()
+                dev = parseline(l)
+                lines.append(dev)       
+            
+            f.close()
+            serverSocket.close()
             
             #print "Result of scan:"
             #print lines
@@ -1334,16 +2762,13 @@ def _openUE9OverEthernet(firstFound, pAddress, devNumber):
     sndDataBuff[1] = 0x78
     sndDataBuff[3] = 0xa9
 
-    outBuff = ""
-    for item in sndDataBuff:
-        outBuff += chr(item)
-    s.sendto(outBuff, ("255.255.255.255", 52362))
+    s.sendto(str(bytearray(sndDataBuff)), ("255.255.255.255", 52362))
 
     try:
         count = 1
         while True:
             rcvDataBuff = s.recv(128)
-            rcvDataBuff = [ord(val) for val in rcvDataBuff]
+            rcvDataBuff = list(bytearray(rcvDataBuff))
             if verifyChecksum(rcvDataBuff):
                 #Parse the packet
                 macAddress = rcvDataBuff[28:34]
@@ -1867,31 +3292,25 @@ def eGetRaw(Handle, IOType, Channel, pValue, x1):
             #Initialize newA
             newA = None
             if type(x1[0]) == int:
-                newA = (ctypes.c_byte*len(x1))()
-                for i in range(0, len(x1), 1):
-                    newA[i] = ctypes.c_byte(x1[i])
+                # Back the array with a bytearray so it can be filled and
+                # read back without a Python loop over every byte.
+                byteBuffer = bytearray(asBytearray(x1))
+                newA = (ctypes.c_ubyte*len(byteBuffer)).from_buffer(byteBuffer)
             else:
                 x1Type = "float"
-                newA = (ctypes.c_double*len(x1))()
-                for i in range(0, len(x1), 1):
-                    newA[i] = ctypes.c_double(x1[i])
+                newA = (ctypes.c_double*len(x1))(*x1)
 
             ec = staticLib.eGet(Handle, IOType, Channel, ctypes.byref(pv), ctypes.byref(newA))
             
             if IOType == LJ_ioRAW_IN and Channel == 1:
                 # We return the raw byte string if we are streaming
-                x1 = struct.pack('b' * len(x1), *newA)
+                x1 = str(byteBuffer)
             elif IOType == LJ_ioRAW_IN and Channel == 0:
-                x1 = [0] * int(pv.value)
-                for i in range(len(x1)):
-                    x1[i] = newA[i] & 0xff
-                
+                x1 = list(byteBuffer[:int(pv.value)])
+            elif x1Type == "int":
+                x1 = list(byteBuffer)
             else:
-                x1 = [0] * len(x1)
-                for i in range(len(x1)):
-                    x1[i] = newA[i]
-                    if(x1Type == "int"):
-                        x1[i] = x1[i] & 0xff
+                x1 = list(newA)
             
         if ec != 0: raise LabJackException(ec)
         return pv.value, x1
@@ -2705,7 +4124,7 @@ def __listAllUE9Unix(connectionType):
             while True:
                 rcvDataBuff = s.recv(128)
                 try:
-                    rcvDataBuff = [ord(val) for val in rcvDataBuff]
+                    rcvDataBuff = list(bytearray(rcvDataBuff))
                     if verifyChecksum(rcvDataBuff):
                         #Parse the packet
                         macAddress = rcvDataBuff[28:34]
@@ -2791,27 +4210,11 @@ def __listAllBridgesUnix():
     return deviceList
 
 def setChecksum16(buffer):
-    total = 0;
-
-    for i in range(6, len(buffer)):
-        total += (buffer[i] & 0xff)
-
-    buffer[4] = (total & 0xff)
-    buffer[5] = ((total >> 8) & 0xff)
-
-    return buffer
+    return Checksum.setChecksum16(buffer)
 
 
 def setChecksum8(buffer, numBytes):
-    total = 0
-
-    for i in range(1, numBytes):
-        total += (buffer[i] & 0xff)
-
-    buffer[0] = (total & 0xff) + ((total >> 8) & 0xff)
-    buffer[0] = (buffer[0] & 0xff) + ((buffer[0] >> 8) & 0xff)
-
-    return buffer
+    return Checksum.setChecksum8(buffer, numBytes)
 
 
 class LJSocketHandle(object):
@@ -2834,30 +4237,12 @@ class LJSocketHandle(object):
                 raise Exception("Got invalid line from server: %s" % l)
                 
             if status.lower().startswith('ok'):
-                lines = []
-                marked = None
-                for i in range(int(numLines)):
-                    l = f.readline().strip()
-                    dev = parseline(l)
-                    
-                    if devType == dev['prodId']:
-                        lines.append(dev)
-                        
-                        if not firstFound and (dev['localId'] == pAddress or dev['serial'] == pAddress):
-                            marked = dev                 
+                lines = [ f.readline() for i in range(int(numLines)) ]
                 
                 f.close()
                 serverSocket.close()
                 
-                #print "Result of scan:"
-                #print lines
-                
-                if firstFound and len(lines) > 0:
-                    marked = lines[0]
-                elif marked is not None:
-                    pass
-                else:
-                    raise Exception("LabJack not found.")
+                marked = findInScan(lines, devType, firstFound, pAddress)
                     
                 if marked['crPort'] != 'x':
                     self.crSocket = socket.socket()
@@ -2897,6 +4282,33 @@ class LJSocketHandle(object):
             self.spontSocket.close()
 
         
+def findInScan(lines, devType, firstFound, pAddress):
+    """
+    Name: findInScan(lines, devType, firstFound, pAddress)
+    Args: lines, the device lines of an LJSocket scan
+          devType, the product ID to look for
+          firstFound, if True, take the first device of type devType
+          pAddress, the local ID or serial number to look for otherwise
+    Desc: Returns the parseline() dictionary of the device to open.
+    """
+    devices = []
+    marked = None
+    for l in lines:
+        dev = parseline(l.strip())
+        
+        if devType == dev['prodId']:
+            devices.append(dev)
+            
+            if not firstFound and (dev['localId'] == pAddress or dev['serial'] == pAddress):
+                marked = dev
+    
+    if firstFound and len(devices) > 0:
+        marked = devices[0]
+    elif marked is None:
+        raise Exception("LabJack not found.")
+    
+    return marked
+
 def parseline(line):
     try:
         prodId, crPort, modbusPort, spontPort, localId, serial = line.split(' ')
@@ -2953,13 +4365,965 @@ class UE9TCPHandle(object):
 
 
     
+class Transport(object):
+    """
+    Name: Transport
+    Args: handle, whatever the backend needs to talk to the device
+    Desc: Moves packets between a Device and the hardware. Device.handle
+          binds one of these when it's set (see makeTransport()), so
+          write() and read() go straight to the right backend instead of
+          working it out on every call.
+          
+          To add a new backend, subclass Transport, implement write(),
+          readBytes() and close(), and assign an instance to a Device's
+          handle. read() and readInto() are built on readBytes(), but
+          backends that can fill memory in place should override
+          readInto() too.
+    """
+    def __init__(self, handle):
+        self.handle = handle
+        self._buffers = {}
+        # Device.write() is public and can be called without the device's
+        # deviceLock, so the pooled buffers get a lock of their own.
+        self._bufferLock = threading.Lock()
+    
+    def write(self, writeBuffer, modbus = False, modbusPrependZeros = True):
+        """
+        Sends writeBuffer (a list of bytes, str, bytearray or memoryview)
+        and returns what was actually sent, for debug printing.
+        """
+        raise NotImplementedError("write() is not implemented by %s." % self.__class__.__name__)
+    
+    def readBytes(self, numBytes, stream = False, modbus = False):
+        """
+        Reads at most numBytes and returns them as a bytearray.
+        """
+        raise NotImplementedError("readBytes() is not implemented by %s." % self.__class__.__name__)
+    
+    def read(self, numBytes, stream = False, modbus = False):
+        """
+        Reads at most numBytes. Returns a str for stream reads and a list
+        of bytes otherwise.
+        """
+        result = self.readBytes(numBytes, stream, modbus)
+        if stream:
+            return str(result)
+        return list(result)
+    
+    def readInto(self, buffer, numBytes, stream = True, modbus = False, offset = 0):
+        """
+        Reads at most numBytes into buffer at offset, and returns the number
+        of bytes read.
+        """
+        result = self.readBytes(numBytes, stream, modbus)
+        buffer[offset:offset+len(result)] = result
+        return len(result)
+    
+    def close(self):
+        pass
+    
+    def _getBuffer(self, kind, size):
+        """
+        Returns a (bytearray, ctypes array) pair of the given size that
+        share the same memory. The pair is allocated the first time it's
+        asked for and reused after that, so repeated transfers of the same
+        size don't allocate anything. Hold _bufferLock for as long as the
+        pair is in use.
+        """
+        try:
+            return self._buffers[(kind, size)]
+        except KeyError:
+            buf = bytearray(size)
+            pair = (buf, (ctypes.c_ubyte * size).from_buffer(buf))
+            self._buffers[(kind, size)] = pair
+            return pair
+
+class ExodriverTransport(Transport):
+    """
+    Talks to a USB device through the Exodriver (liblabjackusb) on Linux
+    and Mac OS X.
+    """
+    def write(self, writeBuffer, modbus = False, modbusPrependZeros = True):
+        if modbus is True and modbusPrependZeros:
+            offset = 2
+        else:
+            offset = 0
+        
+        if offset == 0 and isinstance(writeBuffer, str):
+            self._write(writeBuffer, len(writeBuffer))
+            return writeBuffer
+        
+        with self._bufferLock:
+            # Copy the packet into the pooled write buffer for packets of
+            # this size. Same-length slice assignment is done in C and
+            # never resizes the buffer.
+            buf, cBuffer = self._getBuffer('write', offset + len(writeBuffer))
+            buf[0:offset] = '\x00' * offset
+            try:
+                buf[offset:] = writeBuffer
+            except ValueError:
+                buf[offset:] = asBytearray(writeBuffer)
+            self._write(cBuffer, len(buf))
+            if offset:
+                # The pooled buffer gets reused, so hand back a copy.
+                writeBuffer = list(buf)
+        
+        return writeBuffer
+    
+    def _write(self, cBuffer, numBytes):
+        writeBytes = staticLib.LJUSB_Write(self.handle, cBuffer, numBytes)
+        
+        if(writeBytes != numBytes):
+            raise LabJackException( "Could only write %s of %s bytes." % (writeBytes, numBytes) )
+    
+    def readBytes(self, numBytes, stream = False, modbus = False):
+        result = bytearray(numBytes)
+        cBuffer = _asCBuffer(result)
+        
+        if(stream):
+            readBytes = staticLib.LJUSB_Stream(self.handle, cBuffer, numBytes)
+        else:
+            readBytes = staticLib.LJUSB_Read(self.handle, cBuffer, numBytes)
+        
+        del cBuffer # Release the export so the bytearray can be resized.
+        del result[readBytes:]
+        return result
+    
+    def readInto(self, buffer, numBytes, stream = True, modbus = False, offset = 0):
+        if stream:
+            readFunction = staticLib.LJUSB_Stream
+        else:
+            readFunction = staticLib.LJUSB_Read
+        
+        try:
+            cBuffer = (ctypes.c_ubyte * numBytes).from_buffer(buffer, offset)
+        except TypeError:
+            # ctypes can't wrap some writable buffers (memoryviews in
+            # particular), so go through the pooled read buffer instead.
+            with self._bufferLock:
+                pooled, cBuffer = self._getBuffer('read', numBytes)
+                readBytes = readFunction(self.handle, cBuffer, numBytes)
+                buffer[offset:offset+readBytes] = memoryview(pooled)[:readBytes]
+            return readBytes
+        
+        return readFunction(self.handle, cBuffer, numBytes)
+    
+    def close(self):
+        staticLib.LJUSB_CloseDevice(self.handle)
+
+class UE9TCPTransport(Transport):
+    """
+    Talks to a UE9 over Ethernet through the sockets of a UE9TCPHandle.
+    """
+    def _socket(self, stream, modbus):
+        if stream is True:
+            return self.handle.stream
+        elif modbus is True:
+            if self.handle.modbus is None:
+                raise LabJackException("Modbus port is not available.  Please upgrade to UE9 Comm firmware 1.43 or higher.")
+            return self.handle.modbus
+        else:
+            return self.handle.data
+    
+    def write(self, writeBuffer, modbus = False, modbusPrependZeros = True):
+        self._socket(False, modbus).sendall(_asSendable(writeBuffer))
+        return writeBuffer
+    
+    def readBytes(self, numBytes, stream = False, modbus = False):
+        return _recvBytes(self._socket(stream, modbus), numBytes)
+    
+    def readInto(self, buffer, numBytes, stream = True, modbus = False, offset = 0):
+        return _recvInto(self._socket(stream, modbus), buffer, numBytes, offset)
+    
+    def _reconnect(self, stream, modbus):
+        sock = _reconnectSocket(self._socket(stream, modbus))
+        if stream is True:
+            self.handle.stream = sock
+        elif modbus is True:
+            self.handle.modbus = sock
+        else:
+            self.handle.data = sock
+    
+    def close(self):
+        self.handle.close()
+
+class LJSocketTransport(Transport):
+    """
+    Talks to a device shared by an LJSocket server through the sockets of
+    an LJSocketHandle. Stream reads come from the spontaneous data socket.
+    """
+    def _socket(self, stream, modbus):
+        if modbus:
+            return self.handle.modbusSocket
+        elif stream:
+            return self.handle.spontSocket
+        else:
+            return self.handle.crSocket
+    
+    def write(self, writeBuffer, modbus = False, modbusPrependZeros = True):
+        self._socket(False, modbus).sendall(_asSendable(writeBuffer))
+        return writeBuffer
+    
+    def readBytes(self, numBytes, stream = False, modbus = False):
+        return _recvBytes(self._socket(stream, modbus), numBytes)
+    
+    def read(self, numBytes, stream = False, modbus = False):
+        # LJSocket has always returned lists, even for spontaneous data.
+        return list(self.readBytes(numBytes, stream, modbus))
+    
+    def readInto(self, buffer, numBytes, stream = True, modbus = False, offset = 0):
+        return _recvInto(self._socket(stream, modbus), buffer, numBytes, offset)
+    
+    def _reconnect(self, stream, modbus):
+        sock = _reconnectSocket(self._socket(stream, modbus))
+        if modbus:
+            self.handle.modbusSocket = sock
+        elif stream:
+            self.handle.spontSocket = sock
+        else:
+            self.handle.crSocket = sock
+    
+    def close(self):
+        self.handle.close()
+
+class UDDriverTransport(Transport):
+    """
+    Talks to a device through the raw I/O functions of the LabJackUD
+    driver on Windows.
+    """
+    def __init__(self, handle, devType):
+        Transport.__init__(self, handle)
+        self.devType = devType
+    
+    def write(self, writeBuffer, modbus = False, modbusPrependZeros = True):
+        writeBuffer = list(asBytearray(writeBuffer))
+        if modbus is True and self.devType == 9:
+            dataWords = len(writeBuffer)
+            writeBuffer = [0, 0xF8, 0, 0x07, 0, 0] + writeBuffer #modbus low-level function
+            if dataWords % 2 != 0:
+                dataWords = (dataWords+1)/2
+                writeBuffer.append(0)
+            else:
+                dataWords = dataWords/2
+            writeBuffer[2] = dataWords
+            setChecksum(writeBuffer)
+        elif modbus is True and modbusPrependZeros:
+            writeBuffer = [ 0, 0 ] + writeBuffer
+        
+        eGetRaw(self.handle, LJ_ioRAW_OUT, 0, len(writeBuffer), writeBuffer)
+        
+        return writeBuffer
+    
+    def readBytes(self, numBytes, stream = False, modbus = False):
+        if modbus is True and self.devType == 9:
+            tempBuff = [0] * (8 + numBytes + numBytes%2)
+            eGetBuff = list()
+            eGetBuff = eGetRaw(self.handle, LJ_ioRAW_IN, 0, len(tempBuff), tempBuff)[1]
+
+            #parse the modbus response out (reponse is the Modbus extended low=level function)
+            retBuff = list()
+            if len(eGetBuff) >= 9 and eGetBuff[1] == 0xF8 and eGetBuff[3] == 0x07:
+                #figuring out the length of the modbus response
+                mbSize = len(eGetBuff) - 8
+                if len(eGetBuff) >= 14:
+                    mbSize = min(mbSize, eGetBuff[13] + 6)
+                i = min(mbSize, numBytes)
+                i = max(i, 0)                    
+                retBuff = eGetBuff[8:8+i] #getting the response only
+            return bytearray(retBuff)
+
+        tempBuff = [0] * numBytes
+        if stream:
+            return bytearray(eGetRaw(self.handle, LJ_ioRAW_IN, 1, numBytes, tempBuff)[1])
+        return bytearray(eGetRaw(self.handle, LJ_ioRAW_IN, 0, numBytes, tempBuff)[1])
+
+class SkyMoteTransport(Transport):
+    """
+    Talks to a SkyMote Bridge through liblabjackusb on Windows.
+    """
+    def write(self, writeBuffer, modbus = False, modbusPrependZeros = True):
+        writeBytes = skymoteLib.LJUSB_IntWrite(self.handle, 1, _asCBuffer(writeBuffer), len(writeBuffer))
+        
+        if(writeBytes != len(writeBuffer)):
+            raise LabJackException( "Could only write %s of %s bytes." % (writeBytes, len(writeBuffer) ) )
+        
+        return writeBuffer
+    
+    def readBytes(self, numBytes, stream = False, modbus = False):
+        result = bytearray(numBytes)
+        cBuffer = _asCBuffer(result)
+        readBytes = skymoteLib.LJUSB_IntRead(self.handle, 0x81, cBuffer, numBytes)
+        del cBuffer
+        del result[readBytes:]
+        return result
+    
+    def close(self):
+        skymoteLib.LJUSB_CloseDevice(self.handle)
+
+def makeTransport(handle, devType = None):
+    """
+    Name: makeTransport(handle, devType = None)
+    Args: handle, a driver handle, UE9TCPHandle, LJSocketHandle or Transport
+          devType, the device's product ID
+    Desc: Returns the Transport for handle. A Transport is returned as-is.
+    """
+    if isinstance(handle, Transport):
+        return handle
+    elif isinstance(handle, LJSocketHandle):
+        return LJSocketTransport(handle)
+    elif isinstance(handle, UE9TCPHandle):
+        return UE9TCPTransport(handle)
+    elif os.name == 'posix':
+        return ExodriverTransport(handle)
+    elif devType == 0x501:
+        return SkyMoteTransport(handle)
+    else:
+        return UDDriverTransport(handle, devType)
+
+
+class Future(object):
+    """
+    Name: Future
+    Desc: The result of a command that hasn't finished yet. The async
+          classes (such as ue9.AsyncUE9) return these instead of blocking.
+          
+          result(timeout = None), waits for the command to finish and
+              returns its value, or raises the exception it failed with
+          done(), returns True once there is a result or an exception
+          addDoneCallback(fn), calls fn(future) when the future finishes
+          
+          Something has to run the asyncore loop for a future to finish:
+          another thread calling asyncore.loop(), or runUntilComplete().
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._done = False
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+    
+    def done(self):
+        return self._done
+    
+    def result(self, timeout = None):
+        with self._condition:
+            if not self._done:
+                self._condition.wait(timeout)
+            if not self._done:
+                raise LabJackException("Timed out waiting for a result.")
+            if self._exception is not None:
+                raise self._exception
+            return self._result
+    
+    def exception(self):
+        return self._exception
+    
+    def addDoneCallback(self, fn):
+        with self._condition:
+            if not self._done:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+    
+    def setResult(self, result):
+        self._finish(result, None)
+    
+    def setException(self, exception):
+        self._finish(None, exception)
+    
+    def _finish(self, result, exception):
+        with self._condition:
+            if self._done:
+                return
+            self._result = result
+            self._exception = exception
+            self._done = True
+            self._condition.notifyAll()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn(self)
+
+def chainFuture(future, fn):
+    """
+    Name: chainFuture(future, fn)
+    Args: future, a Future
+          fn, called with the result of future
+    Desc: Returns a new Future for fn(future.result()). An exception from
+          future or fn ends up in the new Future.
+    """
+    chained = Future()
+    def callback(f):
+        try:
+            chained.setResult(fn(f.result()))
+        except Exception, e:
+            chained.setException(e)
+    future.addDoneCallback(callback)
+    return chained
+
+def gatherFutures(futures):
+    """
+    Name: gatherFutures(futures)
+    Args: futures, a list of Futures
+    Desc: Returns a Future for the list of results of futures, in order. It
+          fails with the first exception any of them fails with.
+    """
+    gathered = Future()
+    results = [ None ] * len(futures)
+    remaining = [ len(futures) ]
+    
+    def callback(i, f):
+        if f.exception() is not None:
+            gathered.setException(f.exception())
+            return
+        results[i] = f.result()
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            gathered.setResult(results)
+    
+    if len(futures) == 0:
+        gathered.setResult(results)
+    for i, f in enumerate(futures):
+        f.addDoneCallback(lambda f, i = i: callback(i, f))
+    return gathered
+
+def expectedPacketLength(packet, default):
+    """
+    Name: expectedPacketLength(packet, default)
+    Args: packet, the bytes received so far of a low-level response
+          default, the length of the response that was asked for
+    Desc: Returns how long the response starting with packet is, or None if
+          more bytes are needed to tell. Extended responses carry their own
+          length and a bad checksum reply is 2 bytes, so a TCP stream can be
+          split into responses without trusting default.
+    """
+    if len(packet) < 2:
+        return None
+    if packet[0] == 0xB8 and packet[1] == 0xB8:
+        return 2
+    if (packet[1] & 0x78) >> 3 == 15:
+        if len(packet) < 3:
+            return None
+        return 6 + 2*packet[2]
+    return default
+
+class AsyncChannel(asyncore.dispatcher):
+    """
+    Name: AsyncChannel(address, map = None, timeout = SOCKET_TIMEOUT,
+                       frameLength = expectedPacketLength)
+    Args: address, the (host, port) to connect to
+          map, the asyncore map to join, None for asyncore's global one
+          timeout, seconds a request can wait for its response
+          frameLength, a function(received, numBytes) that returns the
+                       length of the response at the start of received, or
+                       None if it can't tell yet
+    Desc: A non-blocking TCP connection for request/response protocols.
+          Requests are queued with request() and written as the socket
+          allows, and responses are handed to their futures in order. A
+          listener can be set to consume unsolicited data instead, like
+          stream packets.
+    """
+    def __init__(self, address, map = None, timeout = SOCKET_TIMEOUT, frameLength = expectedPacketLength):
+        asyncore.dispatcher.__init__(self, map = map)
+        self.timeout = timeout
+        self.frameLength = frameLength
+        self.outgoing = bytearray()
+        self.received = bytearray()
+        self.pending = collections.deque()
+        self.listener = None
+        self.address = address
+        
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.connect(address)
+    
+    def request(self, packet, numBytes, parse = None):
+        """
+        Queues packet to be sent and returns a Future for the numBytes
+        response, passed through parse if it's given.
+        """
+        future = Future()
+        self.outgoing += asBytearray(packet)
+        self.pending.append((numBytes, future, parse, time.time() + self.timeout))
+        return future
+    
+    def writable(self):
+        return not self.connected or len(self.outgoing) > 0
+    
+    def handle_connect(self):
+        pass
+    
+    def handle_write(self):
+        sent = self.send(self.outgoing)
+        del self.outgoing[:sent]
+    
+    def handle_read(self):
+        data = self.recv(65536)
+        if data:
+            self.received += data
+            self._deliver()
+    
+    def _deliver(self):
+        while self.pending:
+            numBytes, future, parse, deadline = self.pending[0]
+            length = self.frameLength(self.received, numBytes)
+            if length is None or len(self.received) < length:
+                break
+            
+            self.pending.popleft()
+            response = self.received[:length]
+            del self.received[:length]
+            try:
+                if parse is not None:
+                    response = parse(response)
+                future.setResult(response)
+            except Exception, e:
+                future.setException(e)
+        
+        if self.listener is not None and not self.pending and self.received:
+            self.listener(self.received)
+    
+    def checkTimeouts(self, now = None):
+        """
+        Fails the requests that have waited too long. The connection can't
+        be trusted to be in step after that, so it is closed.
+        """
+        if now is None:
+            now = time.time()
+        if self.pending and self.pending[0][3] < now:
+            self._fail(LabJackException("Timed out waiting for a response from %s:%s." % self.address))
+    
+    def handle_close(self):
+        self._fail(LabJackException("The connection to %s:%s was closed." % self.address))
+    
+    def handle_error(self):
+        e = sys.exc_info()[1]
+        self._fail(LabJackException("Error on the connection to %s:%s: %s" % (self.address[0], self.address[1], e)))
+    
+    def _fail(self, exception):
+        self.close()
+        while self.pending:
+            self.pending.popleft()[1].setException(exception)
+
+def runUntilComplete(futures, map = None, timeout = None):
+    """
+    Name: runUntilComplete(futures, map = None, timeout = None)
+    Args: futures, a Future or a list of Futures
+          map, the asyncore map the connections are on, None for asyncore's
+               global one
+          timeout, how long to wait in seconds, None for no limit
+    Desc: Runs the asyncore loop until all of futures are done, and returns
+          their results (a list, if futures was a list). Every connection on
+          map keeps running meanwhile, so this drives any number of devices
+          from a single thread.
+    
+    >>> f = [ d.feedback() for d in ue9s ]
+    >>> results = runUntilComplete(f)
+    """
+    if map is None:
+        map = asyncore.socket_map
+    
+    single = isinstance(futures, Future)
+    if single:
+        futures = [ futures ]
+    
+    start = time.time()
+    while not all(f.done() for f in futures):
+        if len(map) == 0:
+            raise LabJackException("No open connections left to finish on.")
+        
+        asyncore.loop(timeout = 0.05, map = map, use_poll = True, count = 1)
+        
+        now = time.time()
+        for channel in map.values():
+            if isinstance(channel, AsyncChannel):
+                channel.checkTimeouts(now)
+        
+        if timeout is not None and now - start > timeout:
+            raise LabJackException("Timed out waiting for results.")
+    
+    results = [ f.result() for f in futures ]
+    if single:
+        return results[0]
+    return results
+
+
+def _scanResponseLength(received, numBytes = None):
+    """
+    The AsyncChannel frameLength for an LJSocket scan: a status line with
+    the number of device lines that follow it.
+    """
+    end = received.find("\n")
+    if end < 0:
+        return None
+    
+    try:
+        numLines = int(str(received[:end]).split(' ')[1])
+    except (IndexError, ValueError):
+        # An error line has nothing after it.
+        return end + 1
+    
+    for i in range(numLines):
+        end = received.find("\n", end + 1)
+        if end < 0:
+            return None
+    return end + 1
+
+class AsyncLJSocket(Device):
+    """
+    Name: AsyncLJSocket(ipAddress, port, devType, firstFound = True,
+                        pAddress = None, map = None,
+                        timeout = LJSOCKET_TIMEOUT)
+    Args: ipAddress, port, where the LJSocket server is
+          devType, the product ID of the device to open
+          firstFound, if True, open the first device of type devType
+          pAddress, the local ID or serial number to open otherwise
+          map, the asyncore map to put the connections on. None uses
+               asyncore's global map.
+          timeout, seconds to wait for a response before failing
+    Desc: A non-blocking client for a device shared by an LJSocket server.
+          The command/response, Modbus and spontaneous data sockets are
+          run by asyncore, so one thread can serve connections to any
+          number of servers (see runUntilComplete()).
+          
+          open() scans the server and connects to the device's sockets.
+          writeRead(), readRegister() and writeRegister() return Futures.
+          spontaneousData() calls a callback with each packet the server
+          sends on its own.
+    
+    >>> d = AsyncLJSocket("localhost", 6000, LJ_dtU3)
+    >>> runUntilComplete(d.open())
+    >>> runUntilComplete(d.readRegister(0))
+    1.4223...
+    """
+    def __init__(self, ipAddress, port, devType, firstFound = True, pAddress = None, map = None, timeout = LJSOCKET_TIMEOUT):
+        Device.__init__(self, None, devType = devType)
+        
+        self.ipAddress = ipAddress
+        self.port = port
+        self.firstFound = firstFound
+        self.pAddress = pAddress
+        self.map = map
+        self.timeout = timeout
+        
+        self.crChannel = self.modbusChannel = self.spontChannel = None
+        
+        if devType == 0x501:
+            self.modbusPrependZeros = False
+    
+    def open(self):
+        """
+        Name: AsyncLJSocket.open()
+        Args: None
+        Desc: Scans the LJSocket server and connects to the device's
+              sockets. Returns a Future for the device's scan line, as a
+              parseline() dictionary.
+        """
+        scan = AsyncChannel((self.ipAddress, self.port), self.map, SOCKET_TIMEOUT, frameLength = _scanResponseLength)
+        
+        def scanned(response):
+            scan.close()
+            lines = str(response).splitlines()
+            try:
+                status, numLines = lines[0].strip().split(' ')
+            except ValueError:
+                raise LabJackException(ec = LJE_LABJACK_NOT_FOUND, errorString = "Got invalid line from server: %s" % lines[0])
+            
+            if not status.lower().startswith('ok'):
+                raise LabJackException(ec = LJE_LABJACK_NOT_FOUND, errorString = "Got an error from LJSocket. It said '%s'" % lines[0])
+            
+            try:
+                marked = findInScan(lines[1:], self.devType, self.firstFound, self.pAddress)
+            except Exception, e:
+                raise LabJackException(ec = LJE_LABJACK_NOT_FOUND, errorString = "Couldn't connect to a LabJack at %s:%s. The error was: %s" % (self.ipAddress, self.port, str(e)))
+            
+            self.localId = marked['localId']
+            self.serialNumber = marked['serial']
+            
+            if marked['crPort'] != 'x':
+                self.crChannel = AsyncChannel((self.ipAddress, marked['crPort']), self.map, self.timeout)
+            if marked['modbusPort'] != 'x':
+                self.modbusChannel = AsyncChannel((self.ipAddress, marked['modbusPort']), self.map, self.timeout, frameLength = Modbus.getPacketLength)
+            if marked['spontPort'] != 'x':
+                self.spontChannel = AsyncChannel((self.ipAddress, marked['spontPort']), self.map, self.timeout)
+            
+            return marked
+        
+        return scan.request("scan\r\n", None, scanned)
+    
+    def _channel(self, channel, name):
+        if channel is None:
+            raise LabJackException("The LJSocket server doesn't offer a %s port for this device. Has open() finished?" % name)
+        return channel
+    
+    def writeRead(self, command, readLen, commandBytes = None, checksum = True):
+        """
+        Name: AsyncLJSocket.writeRead(command, readLen, commandBytes = None,
+                                      checksum = True)
+        Args: command, the low-level command to send
+              readLen, the length of the response
+              commandBytes, if given, the command bytes the response must
+                            have (see Device._checkCommandBytes)
+              checksum, set the checksums of command before sending
+        Desc: Sends a low-level command. Returns a Future for the response,
+              as a list.
+        """
+        if checksum:
+            command = setChecksum(command)
+        
+        def check(result):
+            result = list(result)
+            if commandBytes is not None:
+                self._checkCommandBytes(result, commandBytes)
+            return result
+        
+        return self._channel(self.crChannel, "command/response").request(command, readLen, check)
+    
+    def readRegister(self, addr, numReg = None, format = None, unitId = None):
+        pkt, numBytes = self._buildReadRegisterPacket(addr, numReg, unitId)
+        return self._channel(self.modbusChannel, "Modbus").request(pkt, numBytes, lambda response: self._parseReadRegisterResponse(response, numBytes, addr, format, numReg))
+    
+    def writeRegister(self, addr, value, unitId = None):
+        pkt, numBytes = self._buildWriteRegisterPacket(addr, value, unitId)
+        return self._channel(self.modbusChannel, "Modbus").request(pkt, numBytes, lambda response: self._parseWriteRegisterResponse(response, pkt, value))
+    
+    def spontaneousData(self, callback, packetLength = None):
+        """
+        Name: AsyncLJSocket.spontaneousData(callback, packetLength = None)
+        Args: callback, a function to call with each packet, or None to
+                        stop calling it
+              packetLength, the size of the packets. None splits the data
+                            into Modbus packets by their headers.
+        Desc: Calls callback from the asyncore loop with each packet that
+              arrives on the spontaneous data socket, as a list.
+        """
+        channel = self._channel(self.spontChannel, "spontaneous data")
+        
+        if callback is None:
+            channel.listener = None
+            return
+        
+        def listener(received):
+            while True:
+                if packetLength is None:
+                    length = Modbus.getPacketLength(received)
+                else:
+                    length = packetLength
+                if length is None or len(received) < length:
+                    break
+                
+                packet = list(received[:length])
+                del received[:length]
+                callback(packet)
+        
+        channel.listener = listener
+        listener(channel.received)
+    
+    def close(self):
+        for channel in (self.crChannel, self.modbusChannel, self.spontChannel):
+            if channel is not None:
+                channel.close()
+        self.crChannel = self.modbusChannel = self.spontChannel = None
+
+
+def _readableSockets(sockets, timeout):
+    """
+    Waits up to timeout seconds for some of sockets to be readable, and
+    returns those that are. Uses poll() where the platform has it, since
+    select() can't take file descriptors past FD_SETSIZE.
+    """
+    if hasattr(select, 'poll'):
+        poller = select.poll()
+        byFileno = dict()
+        for sock in sockets:
+            byFileno[sock.fileno()] = sock
+            poller.register(sock, select.POLLIN | select.POLLERR | select.POLLHUP)
+        return [ byFileno[fd] for fd, event in poller.poll(timeout * 1000) ]
+    else:
+        return select.select(sockets, [], [], timeout)[0]
+
+class DevicePoller(object):
+    """
+    Name: DevicePoller(devices, timeout = SOCKET_TIMEOUT)
+    Args: devices, a list of devices opened over Ethernet (UE9s) or through
+                   LJSocket
+          timeout, seconds to wait for the responses to one poll
+    Desc: Sends a command to many devices at once and collects the
+          responses in whatever order they arrive, so a poll takes about as
+          long as the slowest device rather than the sum of them all. It
+          uses the sockets the devices were opened with and waits on all of
+          them from one thread.
+          
+          Every poll returns a dictionary keyed by device. A device that
+          failed or didn't answer in time has the exception as its value
+          instead of a result. The device locks are held for the whole
+          poll.
+          
+          writeRead(command, readLen, commandBytes, ...), sends a low-level
+              command
+          readRegister(addr, numReg = None, format = None, unitId = None)
+              and writeRegister(addr, value, unitId = None), go through the
+              Modbus sockets
+          poll(request, timeout = None), sends whatever request(device)
+              returns
+    
+    >>> devices = [ ue9.UE9(ethernet = True, ipAddress = ip) for ip in ips ]
+    >>> poller = DevicePoller(devices)
+    >>> poller.readRegister(0)
+    {<ue9.UE9 object at 0x...>: 1.4223..., <ue9.UE9 object at 0x...>: 0.2103...}
+    """
+    def __init__(self, devices, timeout = SOCKET_TIMEOUT):
+        for device in devices:
+            if not hasattr(device.transport, '_socket'):
+                raise LabJackException("DevicePoller needs devices opened over Ethernet or through LJSocket.")
+        
+        self.devices = list(devices)
+        self.timeout = timeout
+    
+    def writeRead(self, command, readLen, commandBytes, checkBytes = True, parse = None, checksum = True):
+        """
+        Name: DevicePoller.writeRead(command, readLen, commandBytes,
+                                     checkBytes = True, parse = None,
+                                     checksum = True)
+        Args: command, the command as a list of bytes, or a function that
+                       takes a device and returns its command
+              readLen, commandBytes, checkBytes and checksum, the same as
+                       for Device._writeRead()
+              parse, a function called with (device, response) that returns
+                     the device's result. None returns the response.
+        Desc: Sends a low-level command to every device.
+        
+        >>> poller.writeRead([ 0, 0xF8, 0x01, 0x2A, 0, 0, 0, 0 ], 136, [ 0xF8, 0x41, 0x2A ])
+        """
+        def request(device):
+            packet = command(device) if callable(command) else list(command)
+            if checksum:
+                packet = setChecksum(packet)
+            
+            def finish(response):
+                response = list(response)
+                if checkBytes:
+                    device._checkCommandBytes(response, commandBytes)
+                if parse is None:
+                    return response
+                return parse(device, response)
+            
+            return packet, readLen, False, finish
+        
+        return self.poll(request)
+    
+    def readRegister(self, addr, numReg = None, format = None, unitId = None):
+        def request(device):
+            packet, numBytes = device._buildReadRegisterPacket(addr, numReg, unitId)
+            return packet, numBytes, True, lambda response: device._parseReadRegisterResponse(response, numBytes, addr, format, numReg)
+        
+        return self.poll(request)
+    
+    def writeRegister(self, addr, value, unitId = None):
+        def request(device):
+            packet, numBytes = device._buildWriteRegisterPacket(addr, value, unitId)
+            return packet, numBytes, True, lambda response: device._parseWriteRegisterResponse(response, packet, value)
+        
+        return self.poll(request)
+    
+    def poll(self, request, timeout = None):
+        """
+        Name: DevicePoller.poll(request, timeout = None)
+        Args: request, a function called with each device that returns a
+                       tuple of (packet, readLen, modbus, finish). finish is
+                       called with the response and returns the device's
+                       result.
+              timeout, seconds to wait for the responses, None for the
+                       poller's timeout
+        Desc: Writes each device's packet, then reads the responses as they
+              arrive. Low-level responses are framed by their own length
+              where they have one, Modbus ones by their header.
+              
+              A device that times out or sends something that doesn't
+              frame as its response can't be trusted to be in step any
+              more, so its socket is reconnected before the poll returns.
+              A late response then can't be taken for the next one.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        
+        results = dict()
+        pending = dict()
+        outOfStep = []
+        locked = []
+        try:
+            for device in self.devices:
+                device.deviceLock.acquire()
+                locked.append(device)
+            
+            for device in self.devices:
+                sock = None
+                try:
+                    packet, readLen, modbus, finish = request(device)
+                    sock = device.transport._socket(False, modbus)
+                    if sock is None:
+                        raise LabJackException("%s has no %s socket." % (device.deviceName, "Modbus" if modbus else "command/response"))
+                    if device.debug: print "Sent: ", hexWithoutQuotes(packet)
+                    sock.sendall(_asSendable(packet))
+                    
+                    frameLength = Modbus.getPacketLength if modbus else expectedPacketLength
+                    pending[sock] = (device, modbus, bytearray(), readLen, frameLength, finish)
+                except Exception, e:
+                    if sock is not None:
+                        # The packet may have been partly sent.
+                        outOfStep.append((device, modbus))
+                    results[device] = e
+            
+            deadline = time.time() + timeout
+            while pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                
+                for sock in _readableSockets(pending.keys(), remaining):
+                    device, modbus, received, readLen, frameLength, finish = pending[sock]
+                    try:
+                        chunk = sock.recv(4096)
+                        if not chunk:
+                            raise LabJackException("%s closed the connection." % device.deviceName)
+                        received += chunk
+                        
+                        length = frameLength(received, readLen)
+                        if length is None or len(received) < length:
+                            continue
+                        
+                        del pending[sock]
+                        if len(received) > length:
+                            outOfStep.append((device, modbus))
+                        response = received[:length]
+                        if device.debug: print "Response: ", hexWithoutQuotes(response)
+                        results[device] = finish(response)
+                    except Exception, e:
+                        pending.pop(sock, None)
+                        outOfStep.append((device, modbus))
+                        results[device] = e
+            
+            for device, modbus, received, readLen, frameLength, finish in pending.values():
+                outOfStep.append((device, modbus))
+                results[device] = LabJackException("Timed out waiting for %s to respond." % device.deviceName)
+            
+            for device, modbus in set(outOfStep):
+                try:
+                    device.transport._reconnect(False, modbus)
+                except Exception, e:
+                    results[device] = LabJackException("Couldn't reconnect to %s after: %s. The error was: %s" % (device.deviceName, results[device], e))
+        finally:
+            for device in locked:
+                device.deviceLock.release()
+        
+        return results
+
+
 def toDouble(bytes):
     """
     Name: toDouble(buffer)
     Args: buffer, an array with 8 bytes
     Desc: Converts the 8 byte array into a floating point number.
     """
-    right, left = struct.unpack("<Ii", struct.pack("B" * 8, *bytes[0:8]))
+    right, left = struct.unpack("<Ii", str(bytearray(bytes[0:8])))
     
     return float(left) + float(right)/(2**32)
     
@@ -2971,8 +5335,79 @@ def hexWithoutQuotes(l):
     [0x0, 0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0x7, 0x8, 0x9]
 
     """
+    if isinstance(l, (str, memoryview)):
+        l = bytearray(l)
     return str([hex (i) for i in l]).replace("'", "")
 
+def asBytearray(buffer):
+    """
+    Name: asBytearray(buffer)
+    Args: buffer, a list of bytes, str, bytearray or memoryview
+    Desc: Returns buffer as a bytearray. A bytearray is returned as-is, and
+          everything else is converted in a single pass in C. Values
+          outside of 0-255 are wrapped to a byte, the same as ctypes.c_byte
+          does.
+    """
+    if isinstance(buffer, bytearray):
+        return buffer
+    try:
+        return bytearray(buffer)
+    except ValueError:
+        return bytearray([ b & 0xff for b in buffer ])
+
+def _asCBuffer(buffer):
+    """
+    Returns something that can be passed to the driver as a byte pointer
+    without copying buffer if possible. A str is passed as-is, and a
+    bytearray is wrapped by a ctypes array that shares its memory.
+    """
+    if isinstance(buffer, str):
+        return buffer
+    buffer = asBytearray(buffer)
+    return (ctypes.c_ubyte * len(buffer)).from_buffer(buffer)
+
+def _asSendable(buffer):
+    """
+    Returns buffer in a form socket.send accepts. str, bytearray and
+    memoryview already are, so only lists are converted.
+    """
+    if isinstance(buffer, list):
+        return asBytearray(buffer)
+    return buffer
+
+def _reconnectSocket(sock):
+    """
+    Closes sock and returns a new socket connected to the same address
+    with the same timeout. Anything still on its way to the old socket,
+    like a late response, is thrown away with it.
+    """
+    address, timeout = sock.getpeername(), sock.gettimeout()
+    sock.close()
+    
+    newSock = socket.socket()
+    newSock.settimeout(timeout)
+    newSock.connect(address)
+    return newSock
+
+def _recvInto(sock, buffer, numBytes, offset):
+    """
+    Does one recv on sock into buffer at offset. Returns the number of
+    bytes received.
+    """
+    if offset:
+        buffer = memoryview(buffer)[offset:]
+    return sock.recv_into(buffer, numBytes)
+
+def _recvBytes(sock, numBytes):
+    """
+    Does one recv on sock straight into a new bytearray, and trims the
+    bytearray to the number of bytes received.
+    """
+    result = bytearray(numBytes)
+    readBytes = sock.recv_into(result, numBytes)
+    del result[readBytes:]
+    return result
+
 # device types:
 LJ_dtUE9 = 9
 LJ_dtU3 = 3
@@ -311,6 +311,19 @@ def getProtocolId(packet):
     else:
         return unpack(">H", packet[2:4])[0]
         
+def getPacketLength(packet, numBytes = None):
+    """
+    Returns the full length of the Modbus packet that packet starts with,
+    from the length field of its header. Returns None if the header hasn't
+    all arrived yet. numBytes is ignored; it lets this be used as an
+    AsyncChannel frameLength.
+    """
+    if len(packet) < 6:
+        return None
+    if isinstance(packet, str):
+        return 6 + unpack(">H", packet[4:6])[0]
+    return 6 + (packet[4] << 8) + packet[5]
+
 def parseIntoPackets(packet):
     while True:
         if isinstance(packet, list):
@@ -0,0 +1,986 @@
+"""
+Name: emulator.py
+Desc: Emulated U3, U6 and UE9 devices that answer the low-level protocol
+      in-process. Each emulator is a Transport, so it can be handed to a
+      device class in place of real hardware:
+
+      >>> import u3, emulator
+      >>> d = u3.U3(transport = emulator.EmulatedU3(signal = lambda channel, t: 32768))
+      >>> d.getFeedback(u3.AIN(0))
+      [32768]
+
+      The emulators check the checksums of the packets they receive and
+      answer with correctly checksummed responses: ConfigU3/ConfigU6 and
+      CommConfig/ControlConfig identity, Feedback, ReadMem/ReadCal with
+      nominal calibration constants, StreamConfig/StreamStart/StreamStop,
+      stream data packets with packet counters, and a Modbus register map.
+
+      Latency, throughput and real-time pacing are configurable so code
+      can be exercised and benchmarked reproducibly without hardware:
+      latency, seconds added to every command/response transaction
+      bytesPerSecond, limits how fast bytes move in either direction
+      realTime, if True, stream data is produced at the configured scan
+                rate (overflowing the device's stream buffer if it isn't
+                read fast enough) and Wait feedback commands take time.
+                If False, stream reads return immediately.
+"""
+from LabJackPython import *
+
+import struct, math, time, threading, errno
+
+def defaultSignal(channel, t):
+    """
+    Name: defaultSignal(channel, t)
+    Args: channel, the channel number being read
+          t, the time of the reading in seconds
+    Desc: The signal the emulators read by default. Channel n is a sine
+          wave of (n + 1) Hz around mid-scale. Returns a 16-bit binary
+          reading.
+    """
+    return int(32768 + 16384 * math.sin(2 * math.pi * (channel + 1) * t))
+
+def _doubleToBytes(value):
+    """
+    The inverse of toDouble(): packs value into the 8 byte fixed point
+    format the calibration memory uses.
+    """
+    left = int(math.floor(value))
+    right = int((value - left) * (2**32)) & 0xffffffff
+    return bytearray(struct.pack("<Ii", right, left))
+
+def _calBlock(values, blockSize):
+    """
+    Packs a list of calibration constants into a memory block of blockSize
+    bytes.
+    """
+    block = bytearray(blockSize)
+    for i, value in enumerate(values):
+        block[i*8:(i+1)*8] = _doubleToBytes(value)
+    return block
+
+class EmulatedDevice(Transport):
+    """
+    Name: EmulatedDevice
+    Args: serialNumber, the serial number to report
+          localId, the local ID to report
+          latency, seconds added to every command/response transaction
+          bytesPerSecond, throughput limit, or None for no limit
+          realTime, pace stream data and Wait commands in real time
+          signal, a function(channel, t) returning a 16-bit binary reading
+          streamTimeout, how long a real-time stream read waits for data
+    Desc: The parts of the protocol the U3, U6 and UE9 have in common.
+          Subclasses fill in the device-specific commands.
+    """
+    devType = None
+    deviceName = "LabJack"
+    streamBufferSamples = 1024
+
+    def __init__(self, serialNumber = None, localId = 1, latency = 0.0, bytesPerSecond = None, realTime = False, signal = None, streamTimeout = 1.0):
+        Transport.__init__(self, None)
+        if serialNumber is None:
+            serialNumber = self.defaultSerialNumber
+        self.serialNumber = serialNumber
+        self.localId = localId
+        self.latency = latency
+        self.bytesPerSecond = bytesPerSecond
+        self.realTime = realTime
+        if signal is None:
+            signal = defaultSignal
+        self.signal = signal
+        self.streamTimeout = streamTimeout
+
+        self.lock = threading.Lock()
+        self.responses = []
+        self.modbusResponses = []
+        self.closed = False
+
+        # Digital I/O, outputs and timers/counters
+        self.dioState = 0
+        self.dioDirection = 0
+        self.dac = [0, 0]
+        self.timers = [0] * 6
+        self.timerModes = [0] * 6
+        self.counters = [0, 0]
+        self.ledState = True
+        self.userMemory = {}
+
+        # Stream state
+        self.streamConfigured = False
+        self.streamRunning = False
+        self.streamChannels = []
+        self.streamSamplesPerPacket = 1
+        self.scanRate = 1.0
+        self.streamStartTime = 0
+        self.samplesSent = 0
+        self.packetCounter = 0
+        self.missedScans = 0
+
+        self.registers = {}
+        self._setName("My %s" % self.deviceName)
+
+    # Transport interface
+    def write(self, writeBuffer, modbus = False, modbusPrependZeros = True):
+        if self.closed:
+            raise LabJackException("The emulated %s is closed." % self.deviceName)
+
+        packet = bytearray(writeBuffer)
+        self._transferDelay(len(packet))
+
+        with self.lock:
+            if modbus:
+                response = self._handleModbus(packet)
+                if response is not None:
+                    self.modbusResponses.append(response)
+            else:
+                response = self._handleCommand(packet)
+                if response is not None:
+                    self.responses.append(response)
+
+        return writeBuffer
+
+    def readBytes(self, numBytes, stream = False, modbus = False):
+        if self.closed:
+            raise LabJackException("The emulated %s is closed." % self.deviceName)
+
+        if stream:
+            return self._readStream(numBytes)
+
+        with self.lock:
+            if modbus:
+                queue = self.modbusResponses
+            else:
+                queue = self.responses
+
+            if len(queue) == 0:
+                raise LabJackException(errno.ETIMEDOUT, "The emulated %s had no response to read." % self.deviceName)
+
+            # Like a USB read, anything past numBytes is lost.
+            response = queue.pop(0)[:numBytes]
+
+        if self.latency:
+            time.sleep(self.latency)
+        self._transferDelay(len(response))
+        return response
+
+    def close(self):
+        self.closed = True
+
+    # Helpers
+    def _transferDelay(self, numBytes):
+        if self.bytesPerSecond:
+            time.sleep(float(numBytes) / self.bytesPerSecond)
+
+    def _now(self):
+        return time.time()
+
+    def _readAIN(self, channel):
+        """
+        Returns the 16-bit reading of channel right now.
+        """
+        return self.signal(channel, self._now()) & 0xffff
+
+    def _extendedResponse(self, commandNumber, dataLength, errorcode = 0):
+        """
+        Returns an extended response packet for commandNumber with
+        dataLength bytes after the 6 byte header. The checksums are set
+        by _finish().
+        """
+        response = bytearray(6 + dataLength)
+        response[1] = 0xF8
+        response[2] = dataLength // 2
+        response[3] = commandNumber
+        if dataLength:
+            response[6] = errorcode
+        return response
+
+    def _finish(self, response):
+        return setChecksum(response)
+
+    def _handleCommand(self, packet):
+        if len(packet) < 2:
+            return None
+
+        if (packet[1] & 0x78) >> 3 == 15:
+            if len(packet) < 6 or len(packet) != 6 + 2*packet[2]:
+                return None
+            if not verifyChecksum(bytearray(packet)):
+                return bytearray([0xB8, 0xB8])
+
+            handler = self.extendedCommands.get((packet[1], packet[3]))
+            if handler is None:
+                return self._finish(self._extendedResponse(packet[3], 2, errorcode = 5))
+        else:
+            if len(packet) > 2:
+                total = sum(packet[1:])
+                checksum = (total & 0xff) + ((total >> 8) & 0xff)
+                checksum = (checksum & 0xff) + ((checksum >> 8) & 0xff)
+                if packet[0] != checksum:
+                    return bytearray([0xB8, 0xB8])
+
+            handler = self.normalCommands.get(packet[1])
+            if handler is None:
+                return None
+
+        return handler(self, packet)
+
+    def _readMem(self, packet):
+        """
+        ReadMem and ReadCal. Block sizes come from the response length the
+        device class expects.
+        """
+        blockNum = packet[7]
+        if packet[3] == 0x2D:
+            block = self.calibrationBlocks().get(blockNum)
+        else:
+            block = self.userMemory.get(blockNum, bytearray([0xff]) * self.memoryBlockSize)
+            if blockNum >= self.userMemoryBlocks:
+                block = None
+
+        response = self._extendedResponse(packet[3], 2 + self.memoryBlockSize)
+        if block is None:
+            response[6] = 26 # INVALID_BLOCK
+        else:
+            response[8:] = block
+        return self._finish(response)
+
+    def _writeMem(self, packet):
+        self.userMemory[packet[7]] = bytearray(packet[8:])
+        return self._finish(self._extendedResponse(packet[3], 2))
+
+    def _eraseMem(self, packet):
+        if packet[6] == 0 and packet[7] == 0:
+            self.userMemory.clear()
+        return self._finish(self._extendedResponse(packet[3], 2))
+
+    def _streamStart(self, packet):
+        response = bytearray([0, 0xA9, 0, 0])
+        if not self.streamConfigured:
+            response[2] = 50 # STREAM_CONFIG_INVALID
+        elif self.streamRunning:
+            response[2] = 48 # STREAM_IS_ACTIVE
+        else:
+            self.streamRunning = True
+            self.streamStartTime = self._now()
+            self.samplesSent = 0
+            self.packetCounter = 0
+            self.missedScans = 0
+        return self._finishShort(response)
+
+    def _streamStop(self, packet):
+        response = bytearray([0, 0xB1, 0, 0])
+        if not self.streamRunning:
+            response[2] = 52 # STREAM_NOT_RUNNING
+        self.streamRunning = False
+        return self._finishShort(response)
+
+    def _finishShort(self, response):
+        total = sum(response[1:])
+        response[0] = ((total & 0xff) + ((total >> 8) & 0xff)) & 0xff
+        return response
+
+    def _setStreamClock(self, clockFrequency, divideBy256, scanInterval):
+        if divideBy256:
+            clockFrequency /= 256.0
+        self.scanRate = float(clockFrequency) / max(scanInterval, 1)
+
+    # Stream data
+    def _streamPacketSize(self):
+        return 14 + 2*self.streamSamplesPerPacket
+
+    def _availablePackets(self):
+        """
+        Returns how many packets the device has ready in real-time mode.
+        If the backlog has outgrown the device's stream buffer, the oldest
+        data is thrown away and reported in the next packet (error 60).
+        """
+        numChannels = len(self.streamChannels)
+        acquired = int((self._now() - self.streamStartTime) * self.scanRate) * numChannels
+        backlog = acquired - self.samplesSent
+        if backlog > self.streamBufferSamples:
+            lostPackets = (backlog - self.streamBufferSamples) // self.streamSamplesPerPacket + 1
+            lostSamples = lostPackets * self.streamSamplesPerPacket
+            self.samplesSent += lostSamples
+            self.missedScans += lostSamples // numChannels
+            backlog -= lostSamples
+        return max(backlog, 0) // self.streamSamplesPerPacket
+
+    def _readStream(self, numBytes):
+        packetSize = self._streamPacketSize()
+        wanted = numBytes // packetSize
+
+        if not self.streamRunning or wanted == 0:
+            return bytearray()
+
+        if not self.realTime:
+            result = bytearray(wanted * packetSize)
+            with self.lock:
+                for i in range(wanted):
+                    self._buildStreamPacket(result, i * packetSize)
+            self._transferDelay(len(result))
+            return result
+
+        # Packets move to the host as soon as they are ready, so the
+        # device's buffer only fills up between reads.
+        result = bytearray()
+        got = 0
+        deadline = self._now() + self.streamTimeout
+        while True:
+            with self.lock:
+                count = min(self._availablePackets(), wanted - got)
+                if count > 0:
+                    result += bytearray(count * packetSize)
+                    for i in range(got, got + count):
+                        self._buildStreamPacket(result, i * packetSize)
+                    got += count
+            now = self._now()
+            if got >= wanted or now >= deadline:
+                break
+            samplesNeeded = self.streamSamplesPerPacket - (int((now - self.streamStartTime) * self.scanRate) * len(self.streamChannels) - self.samplesSent)
+            timeNeeded = float(samplesNeeded) / (self.scanRate * len(self.streamChannels))
+            time.sleep(max(min(timeNeeded, deadline - now), 0.0005))
+
+        self._transferDelay(len(result))
+        return result
+
+    def _buildStreamPacket(self, buffer, offset):
+        spp = self.streamSamplesPerPacket
+        numChannels = len(self.streamChannels)
+
+        buffer[offset+1] = 0xF9
+        buffer[offset+2] = self.streamHeaderByte2()
+        buffer[offset+3] = 0xC0
+
+        if self.missedScans:
+            struct.pack_into("<I", buffer, offset+6, self.missedScans)
+            buffer[offset+11] = 60 # STREAM_AUTORECOVER_REPORT
+            self.missedScans = 0
+        buffer[offset+10] = self.packetCounter
+        self.packetCounter = (self.packetCounter + 1) & 0xff
+
+        for i in range(spp):
+            n = self.samplesSent + i
+            channel = self.streamChannels[n % numChannels]
+            t = (n // numChannels) / self.scanRate
+            struct.pack_into("<H", buffer, offset+12+(2*i), self.signal(channel, t) & 0xffff)
+        self.samplesSent += spp
+
+        end = offset + 14 + 2*spp
+        total = sum(buffer[offset+6:end])
+        buffer[offset+4] = total & 0xff
+        buffer[offset+5] = (total >> 8) & 0xff
+        total = sum(buffer[offset+1:offset+6])
+        total = (total & 0xff) + ((total >> 8) & 0xff)
+        buffer[offset] = ((total & 0xff) + ((total >> 8) & 0xff)) & 0xff
+
+    def streamHeaderByte2(self):
+        return 4 + self.streamSamplesPerPacket
+
+    # Modbus
+    def _setName(self, name):
+        data = bytearray(name.encode("UTF-8")) + bytearray(48 - len(name))
+        for i in range(24):
+            self.registers[58000 + i] = (data[2*i] << 8) + data[2*i+1]
+
+    def _codeToVolts(self, code):
+        return code * self.nominalAINSlope + self.nominalAINOffset
+
+    def _readRegister(self, addr):
+        if addr < 1000:
+            # Analog inputs are 2 register floats.
+            volts = self._codeToVolts(self._readAIN(addr // 2))
+            hi, lo = struct.unpack(">HH", struct.pack(">f", volts))
+            return (hi, lo)[addr % 2]
+        elif 6000 <= addr < 6020:
+            return (self.dioState >> (addr - 6000)) & 1
+        elif addr == 65000:
+            return self.devType
+        elif addr in (65001, 65002):
+            hi, lo = struct.unpack(">HH", struct.pack(">I", self.serialNumber))
+            return (hi, lo)[addr - 65001]
+        return self.registers.get(addr, 0)
+
+    def _writeRegister(self, addr, value):
+        if 6000 <= addr < 6020:
+            bit = 1 << (addr - 6000)
+            self.dioDirection |= bit
+            if value:
+                self.dioState |= bit
+            else:
+                self.dioState &= ~bit
+        self.registers[addr] = value & 0xffff
+
+    def _handleModbus(self, packet):
+        packet = str(packet)
+        if len(packet) < 8:
+            return None
+        transId, protoId, length, unitId, function = struct.unpack(">HHHBB", packet[:8])
+        header = lambda length: bytearray(struct.pack(">HHHB", transId, 0, length, unitId))
+
+        if function == 3:
+            addr, numReg = struct.unpack(">HH", packet[8:12])
+            values = [ self._readRegister(a) for a in range(addr, addr + numReg) ]
+            return header(3 + 2*numReg) + bytearray(struct.pack(">BB" + "H"*numReg, 3, 2*numReg, *values))
+        elif function == 6:
+            addr, value = struct.unpack(">HH", packet[8:12])
+            self._writeRegister(addr, value)
+            return header(6) + bytearray(packet[7:12])
+        elif function == 16:
+            addr, numReg = struct.unpack(">HH", packet[8:12])
+            values = struct.unpack(">" + "H"*numReg, packet[13:13+2*numReg])
+            for i, value in enumerate(values):
+                self._writeRegister(addr + i, value)
+            return header(6) + bytearray(struct.pack(">BHH", 16, addr, numReg))
+        else:
+            # Illegal function
+            return header(3) + bytearray([function | 0x80, 1])
+
+class _EmulatedU3U6(EmulatedDevice):
+    """
+    The commands the U3 and U6 share: ConfigTimerClock, Feedback, memory,
+    stream and reset. Config and ConfigIO differ between the two and are
+    in the subclasses.
+    """
+    memoryBlockSize = 32
+    userMemoryBlocks = 8
+
+    def _configTimerClock(self, packet):
+        if packet[8] & 0x80:
+            self.timerClockBase = packet[8] & 7
+            self.timerClockDivisor = packet[9]
+        response = self._extendedResponse(0x0A, 4)
+        response[8] = self.timerClockBase
+        response[9] = self.timerClockDivisor
+        return self._finish(response)
+
+    def _reset(self, packet):
+        self.streamRunning = False
+        return self._finishShort(bytearray([0, 0x99, 0, 0]))
+
+    def _bit(self, state, ioNumber):
+        return (state >> ioNumber) & 1
+
+    def _setBit(self, state, ioNumber, value):
+        if value:
+            return state | (1 << ioNumber)
+        return state & ~(1 << ioNumber)
+
+    def _feedback(self, packet):
+        """
+        Runs each IOType in the packet and builds the response. An unknown
+        IOType stops processing and is reported in the error frame.
+        """
+        data = bytearray()
+        errorcode = errorframe = 0
+        wait = 0.0
+
+        i = 7
+        frame = 0
+        end = len(packet)
+        while i < end:
+            ioType = packet[i]
+            frame += 1
+
+            if ioType == 0 and i == end - 1:
+                # Padding byte
+                break
+            elif ioType == 1 or (ioType in (2, 3) and self.devType == 6):
+                size, result = self._feedbackAIN(ioType, packet[i+1:i+4])
+            elif ioType == 5:
+                size, result = 2, ''
+                wait += packet[i+1] * 128e-6
+            elif ioType == 6:
+                size, result = 2, ''
+                wait += packet[i+1] * 32e-3
+            elif ioType == 9:
+                size, result = 2, ''
+                self.ledState = bool(packet[i+1])
+            elif ioType == 10:
+                size, result = 2, [ self._bit(self.dioState, packet[i+1] % 20) ]
+            elif ioType == 11:
+                size, result = 2, ''
+                self.dioState = self._setBit(self.dioState, packet[i+1] & 0x1f, packet[i+1] & 0x80)
+                self.dioDirection = self._setBit(self.dioDirection, packet[i+1] & 0x1f, 1)
+            elif ioType == 12:
+                size, result = 2, [ self._bit(self.dioDirection, packet[i+1] % 20) ]
+            elif ioType == 13:
+                size, result = 2, ''
+                self.dioDirection = self._setBit(self.dioDirection, packet[i+1] & 0x1f, packet[i+1] & 0x80)
+            elif ioType in (26, 28):
+                size = 1
+                if ioType == 26:
+                    value = self.dioState
+                else:
+                    value = self.dioDirection
+                result = [ value & 0xff, (value >> 8) & 0xff, (value >> 16) & 0xff ]
+            elif ioType in (27, 29):
+                size, result = 7, ''
+                mask = packet[i+1] + (packet[i+2] << 8) + (packet[i+3] << 16)
+                value = packet[i+4] + (packet[i+5] << 8) + (packet[i+6] << 16)
+                if ioType == 27:
+                    self.dioState = (self.dioState & ~mask) | (value & mask)
+                else:
+                    self.dioDirection = (self.dioDirection & ~mask) | (value & mask)
+            elif ioType in (34, 35):
+                size, result = 2, ''
+                self.dac[ioType - 34] = packet[i+1] << 8
+            elif ioType in (38, 39):
+                size, result = 3, ''
+                self.dac[ioType - 38] = packet[i+1] + (packet[i+2] << 8)
+            elif 42 <= ioType <= 53 and ioType % 2 == 0:
+                size = 4
+                timer = (ioType - 42) // 2
+                if packet[i+1]:
+                    self.timers[timer] = packet[i+2] + (packet[i+3] << 8)
+                result = bytearray(struct.pack("<I", self.timers[timer]))
+            elif 43 <= ioType <= 53:
+                size, result = 4, ''
+                timer = (ioType - 43) // 2
+                self.timerModes[timer] = packet[i+1]
+                self.timers[timer] = packet[i+2] + (packet[i+3] << 8)
+            elif ioType in (54, 55):
+                size = 2
+                counter = ioType - 54
+                # Every read sees one more edge.
+                self.counters[counter] += 1
+                result = bytearray(struct.pack("<I", self.counters[counter]))
+                if packet[i+1]:
+                    self.counters[counter] = 0
+            else:
+                errorcode, errorframe = 5, frame # FUNCTION_INVALID
+                break
+
+            data += bytearray(result)
+            i += size
+
+        if wait and self.realTime:
+            time.sleep(wait)
+
+        if len(data) % 2 == 0:
+            data += bytearray(1)
+        response = self._extendedResponse(0x00, 3 + len(data), errorcode = errorcode)
+        response[7] = errorframe
+        response[9:] = data
+        return self._finish(response)
+
+    def _streamConfig(self, packet):
+        numChannels = packet[6]
+        self.streamChannels = [ packet[self.streamChannelOffset + 2*i] for i in range(numChannels) ]
+        self._parseStreamConfig(packet)
+        self.streamConfigured = True
+        return self._finish(self._extendedResponse(0x11, 2))
+
+class EmulatedU3(_EmulatedU3U6):
+    """
+    Name: EmulatedU3(versionInfo = 2, **args)
+    Args: versionInfo, 2 for a U3-LV, 18 for a U3-HV
+          See EmulatedDevice for the rest.
+    Desc: An emulated U3 with hardware version 1.30.
+
+    >>> d = u3.U3(transport = emulator.EmulatedU3(versionInfo = 18))
+    >>> d.deviceName
+    'U3-HV'
+    """
+    devType = 3
+    deviceName = "U3"
+    defaultSerialNumber = 320000001
+    streamBufferSamples = 984
+    streamChannelOffset = 12
+    nominalAINSlope = 0.000037231
+    nominalAINOffset = 0.0
+
+    def __init__(self, versionInfo = 2, **kargs):
+        _EmulatedU3U6.__init__(self, **kargs)
+        self.versionInfo = versionInfo
+        self.fioAnalog = 0x0f
+        self.eioAnalog = 0
+        self.timerCounterConfig = 0x40
+        self.dac1Enable = 0
+        self.timerClockBase = 2
+        self.timerClockDivisor = 0
+        self.compatibilityOptions = 0
+
+    def calibrationBlocks(self):
+        lvSESlope, lvDiffSlope = 0.000037231, 0.000074463
+        return { 0 : _calBlock([lvSESlope, 0.0, lvDiffSlope, -2.44], 32),
+                 1 : _calBlock([51.717, 0.0, 51.717, 0.0], 32),
+                 2 : _calBlock([0.013021, 2.44, 1.5, 3.3], 32),
+                 3 : _calBlock([0.000314] * 4, 32),
+                 4 : _calBlock([-10.3] * 4, 32) }
+
+    def _configU3(self, packet):
+        writeMask = packet[6]
+        if writeMask & 2:
+            self.fioAnalog = packet[10]
+            self.eioAnalog = packet[13]
+        if writeMask & 4:
+            self.dac1Enable = packet[18]
+            self.dac = [packet[19] << 8, packet[20] << 8]
+        if writeMask & 8:
+            self.localId = packet[8]
+        if writeMask & 16:
+            self.timerClockBase = packet[21]
+            self.timerClockDivisor = packet[22]
+        if writeMask & 32:
+            self.compatibilityOptions = packet[23]
+
+        response = self._extendedResponse(0x08, 32)
+        response[9:15] = [46, 1, 27, 0, 30, 1] # FW 1.46, BL 0.27, HW 1.30
+        response[15:19] = struct.pack("<I", self.serialNumber)
+        response[19:21] = struct.pack("<H", self.devType)
+        response[21] = self.localId
+        response[22] = self.timerCounterConfig
+        response[23] = self.fioAnalog
+        response[24] = self.dioDirection & 0xff
+        response[25] = self.dioState & 0xff
+        response[26] = self.eioAnalog
+        response[27] = (self.dioDirection >> 8) & 0xff
+        response[28] = (self.dioState >> 8) & 0xff
+        response[29] = (self.dioDirection >> 16) & 0xff
+        response[30] = (self.dioState >> 16) & 0xff
+        response[31] = self.dac1Enable
+        response[32] = self.dac[0] >> 8
+        response[33] = self.dac[1] >> 8
+        response[34] = self.timerClockBase
+        response[35] = self.timerClockDivisor
+        response[36] = self.compatibilityOptions
+        response[37] = self.versionInfo
+        return self._finish(response)
+
+    def _configIO(self, packet):
+        writeMask = packet[6]
+        if writeMask & 1:
+            self.timerCounterConfig = packet[8]
+            self.dac1Enable = packet[9]
+        if writeMask & 4:
+            self.fioAnalog = packet[10]
+        if writeMask & 8:
+            self.eioAnalog = packet[11]
+
+        response = self._extendedResponse(0x0B, 6)
+        response[8] = self.timerCounterConfig
+        response[9] = self.dac1Enable
+        response[10] = self.fioAnalog
+        response[11] = self.eioAnalog
+        return self._finish(response)
+
+    def _feedbackAIN(self, ioType, args):
+        return 3, bytearray(struct.pack("<H", self._readAIN(args[0] & 0x1f)))
+
+    def _parseStreamConfig(self, packet):
+        self.streamSamplesPerPacket = packet[7]
+        if packet[9] & 0x08:
+            clock = 48000000
+        else:
+            clock = 4000000
+        self._setStreamClock(clock, packet[9] & 0x04, packet[10] + (packet[11] << 8))
+
+    extendedCommands = { (0xF8, 0x08) : _configU3,
+                         (0xF8, 0x0B) : _configIO,
+                         (0xF8, 0x0A) : _EmulatedU3U6._configTimerClock,
+                         (0xF8, 0x00) : _EmulatedU3U6._feedback,
+                         (0xF8, 0x2A) : EmulatedDevice._readMem,
+                         (0xF8, 0x2D) : EmulatedDevice._readMem,
+                         (0xF8, 0x28) : EmulatedDevice._writeMem,
+                         (0xF8, 0x29) : EmulatedDevice._eraseMem,
+                         (0xF8, 0x11) : _EmulatedU3U6._streamConfig }
+    normalCommands = { 0xA8 : EmulatedDevice._streamStart,
+                       0xB0 : EmulatedDevice._streamStop,
+                       0x99 : _EmulatedU3U6._reset }
+
+class EmulatedU6(_EmulatedU3U6):
+    """
+    Name: EmulatedU6(versionInfo = 4, **args)
+    Args: versionInfo, 4 for a U6, 12 for a U6-Pro
+          See EmulatedDevice for the rest.
+    Desc: An emulated U6.
+
+    >>> d = u6.U6(transport = emulator.EmulatedU6())
+    >>> d.getCalibrationData()
+    """
+    devType = 6
+    deviceName = "U6"
+    defaultSerialNumber = 360000001
+    streamBufferSamples = 2048
+    streamChannelOffset = 14
+    nominalAINSlope = 3.1580578 * (10 ** -4)
+    nominalAINOffset = -10.5869565220
+
+    def __init__(self, versionInfo = 4, **kargs):
+        _EmulatedU3U6.__init__(self, **kargs)
+        self.versionInfo = versionInfo
+        self.numberTimersEnabled = 0
+        self.counterEnable = 0
+        self.timerCounterPinOffset = 0
+        self.timerClockBase = 2
+        self.timerClockDivisor = 0
+
+    def calibrationBlocks(self):
+        slopes = [ 3.1580578 * (10 ** -e) for e in (4, 5, 6, 7) ]
+        offsets = [ -10.5869565220, -1.05869565220, -0.105869565220, -0.0105869565220 ]
+        negSlopes = [ -s for s in slopes ]
+        center = 33523.0
+        blocks = { 0 : [slopes[0], offsets[0], slopes[1], offsets[1]],
+                   1 : [slopes[2], offsets[2], slopes[3], offsets[3]],
+                   2 : [negSlopes[0], center, negSlopes[1], center],
+                   3 : [negSlopes[2], center, negSlopes[3], center],
+                   4 : [13200.0, 0.0, 13200.0, 0.0],
+                   5 : [0.0000100000, 0.0002000000, -92.379, 465.129] }
+        # The hi-res ADC blocks carry the same nominal values.
+        for i in range(4):
+            blocks[6+i] = blocks[i]
+        return dict( (n, _calBlock(values, 32)) for n, values in blocks.items() )
+
+    def _configU6(self, packet):
+        if packet[6] & 8:
+            self.localId = packet[8]
+
+        response = self._extendedResponse(0x08, 32)
+        response[9:15] = [43, 1, 15, 6, 0, 2] # FW 1.43, BL 6.15, HW 2.00
+        response[15:19] = struct.pack("<I", self.serialNumber)
+        response[19:21] = struct.pack("<H", self.devType)
+        response[21] = self.localId
+        response[37] = self.versionInfo
+        return self._finish(response)
+
+    def _configIO(self, packet):
+        if packet[6] & 1:
+            self.numberTimersEnabled = packet[7]
+            self.counterEnable = packet[8]
+            self.timerCounterPinOffset = packet[9]
+
+        response = self._extendedResponse(0x0B, 10)
+        response[8] = self.numberTimersEnabled
+        response[9] = self.counterEnable
+        response[10] = self.timerCounterPinOffset
+        return self._finish(response)
+
+    def _feedbackAIN(self, ioType, args):
+        code = self._readAIN(args[0])
+        if ioType == 1:
+            return 3, bytearray(struct.pack("<H", code))
+        elif ioType == 2:
+            return 4, bytearray(struct.pack("<I", code << 8)[:3])
+        else:
+            return 4, bytearray(struct.pack("<I", code << 8)[:3]) + bytearray([args[1], 0])
+
+    def _parseStreamConfig(self, packet):
+        self.streamSamplesPerPacket = packet[8]
+        if packet[11] & 0x08:
+            clock = 48000000
+        else:
+            clock = 4000000
+        self._setStreamClock(clock, packet[11] & 0x02, packet[12] + (packet[13] << 8))
+
+    extendedCommands = { (0xF8, 0x08) : _configU6,
+                         (0xF8, 0x0B) : _configIO,
+                         (0xF8, 0x0A) : _EmulatedU3U6._configTimerClock,
+                         (0xF8, 0x00) : _EmulatedU3U6._feedback,
+                         (0xF8, 0x2A) : EmulatedDevice._readMem,
+                         (0xF8, 0x2D) : EmulatedDevice._readMem,
+                         (0xF8, 0x28) : EmulatedDevice._writeMem,
+                         (0xF8, 0x29) : EmulatedDevice._eraseMem,
+                         (0xF8, 0x11) : _EmulatedU3U6._streamConfig }
+    normalCommands = { 0xA8 : EmulatedDevice._streamStart,
+                       0xB0 : EmulatedDevice._streamStop,
+                       0x99 : _EmulatedU3U6._reset }
+
+class EmulatedUE9(EmulatedDevice):
+    """
+    Name: EmulatedUE9(pro = False, ethernet = False, **args)
+    Args: pro, True to emulate a UE9-Pro
+          ethernet, True to send stream packets the way the UE9 does over
+                    TCP (46 bytes) instead of USB (48 bytes). Match the
+                    ethernet argument given to UE9.open().
+          See EmulatedDevice for the rest.
+    Desc: An emulated UE9.
+
+    >>> d = ue9.UE9(transport = emulator.EmulatedUE9())
+    >>> d.feedback()
+    """
+    devType = 9
+    deviceName = "UE9"
+    defaultSerialNumber = 0x10000001
+    streamBufferSamples = 4096
+    memoryBlockSize = 128
+    userMemoryBlocks = 5
+    nominalAINSlope = 0.000077503
+    nominalAINOffset = -0.012
+
+    def __init__(self, pro = False, ethernet = False, **kargs):
+        EmulatedDevice.__init__(self, **kargs)
+        self.pro = pro
+        self.ethernet = ethernet
+        self.streamSamplesPerPacket = 16
+        self.ipAddress = [192, 168, 1, 209]
+        self.timerClockBase = 1
+        self.timerEnableMask = 0
+        if pro:
+            self.deviceName = "UE9-Pro"
+
+    def calibrationBlocks(self):
+        # The UE9 class reads its calibration with ReadMem.
+        return {}
+
+    def _readMem(self, packet):
+        slopes = [0.000077503, 0.000038736, 0.000019353, 0.0000096764]
+        blocks = { 0 : [slopes[0], -0.012, slopes[1], -0.012, slopes[2], -0.012, slopes[3], -0.012],
+                   1 : [0.00015629, -5.1760],
+                   2 : [842.59, 0.0, 842.59, 0.0, 0.012968],
+                   3 : [slopes[0], -0.012],
+                   4 : [0.00015629, -5.1760] }
+
+        response = self._extendedResponse(0x2A, 2 + self.memoryBlockSize)
+        if packet[7] in blocks:
+            response[8:] = _calBlock(blocks[packet[7]], self.memoryBlockSize)
+        else:
+            response[6] = 26 # INVALID_BLOCK
+        return self._finish(response)
+
+    def _commConfig(self, packet):
+        if packet[6] & 1:
+            self.localId = packet[8]
+        if packet[6] & 4:
+            self.ipAddress = list(reversed(packet[10:14]))
+
+        response = bytearray(38)
+        response[1:4] = [0x78, 0x10, 0x01]
+        response[8] = self.localId
+        response[10:14] = reversed(self.ipAddress)
+        response[14:18] = [1, 1, 168, 192]
+        response[18:22] = [0, 255, 255, 255]
+        response[22:26] = struct.pack("<HH", 52360, 52361)
+        response[27] = self.devType
+        response[28:31] = struct.pack("<I", self.serialNumber)[:3]
+        response[31:34] = [0x50, 0x24, 0x00] # The rest of the MAC
+        response[34:38] = [10, 1, 56, 1] # HW 1.10, Comm FW 1.56
+        return self._finish(response)
+
+    def _controlConfig(self, packet):
+        response = self._extendedResponse(0x08, 18)
+        response[9:13] = [13, 2, 6, 2] # Control FW 2.13, BL 2.06
+        response[13] = int(bool(self.pro))
+        response[14] = self.dioDirection & 0xff
+        response[15] = self.dioState & 0xff
+        response[16] = (self.dioDirection >> 8) & 0xff
+        response[17] = (self.dioState >> 8) & 0xff
+        response[18] = (((self.dioDirection >> 16) & 0xf) << 4) + ((self.dioState >> 16) & 0xf)
+        response[20:22] = struct.pack("<H", self.dac[0] & 0xfff)
+        response[22:24] = struct.pack("<H", self.dac[1] & 0xfff)
+        return self._finish(response)
+
+    def _feedback(self, packet):
+        for port, shift in ((6, 0), (9, 8)):
+            mask = packet[port] << shift
+            self.dioDirection = (self.dioDirection & ~mask) | ((packet[port+1] << shift) & mask)
+            self.dioState = (self.dioState & ~mask) | ((packet[port+2] << shift) & mask)
+        for dac in range(2):
+            if packet[17 + 2*dac] & 0x40:
+                self.dac[dac] = packet[16 + 2*dac] + ((packet[17 + 2*dac] & 0xf) << 8)
+
+        response = self._extendedResponse(0x00, 58)
+        response[6] = self.dioDirection & 0xff
+        response[7] = self.dioState & 0xff
+        response[8] = (self.dioDirection >> 8) & 0xff
+        response[9] = (self.dioState >> 8) & 0xff
+        response[10] = (((self.dioDirection >> 16) & 0xf) << 4) + ((self.dioState >> 16) & 0xf)
+
+        ainMask = packet[20] + (packet[21] << 8)
+        for i in range(16):
+            if ainMask & (1 << i):
+                channel = i
+                if i == 14:
+                    channel = packet[22]
+                elif i == 15:
+                    channel = packet[23]
+                struct.pack_into("<H", response, 12 + 2*i, self._readAIN(channel))
+
+        for i in range(2):
+            self.counters[i] += 1
+            struct.pack_into("<I", response, 44 + 4*i, self.counters[i])
+        return self._finish(response)
+
+    def _singleIO(self, packet):
+        ioType, channel = packet[2], packet[3]
+        response = bytearray(8)
+        response[1:4] = [0xA3, ioType, channel]
+
+        if ioType in (0, 1):
+            if ioType == 1:
+                bit = 1 << channel
+                self.dioDirection = (self.dioDirection & ~bit) | (bit if packet[4] else 0)
+                self.dioState = (self.dioState & ~bit) | (bit if packet[5] else 0)
+            response[4] = (self.dioDirection >> channel) & 1
+            response[5] = (self.dioState >> channel) & 1
+        elif ioType in (2, 3):
+            shift = 8 * channel
+            if ioType == 3:
+                self.dioDirection = (self.dioDirection & ~(0xff << shift)) | (packet[4] << shift)
+                self.dioState = (self.dioState & ~(0xff << shift)) | (packet[5] << shift)
+            response[4] = (self.dioDirection >> shift) & 0xff
+            response[5] = (self.dioState >> shift) & 0xff
+        elif ioType == 4:
+            response[4:7] = struct.pack("<I", self._readAIN(channel) << 8)[:3]
+        elif ioType == 5:
+            self.dac[channel & 1] = packet[4] + ((packet[5] & 0xf) << 8)
+            response[4:7] = struct.pack("<I", self.dac[channel & 1])[:3]
+
+        return self._finishShort(response)
+
+    def _timerCounter(self, packet):
+        if packet[7] & 0x80:
+            numTimers = packet[7] & 0x7
+            self.timerEnableMask = (1 << numTimers) - 1
+            self.timerEnableMask |= ((packet[7] >> 3) & 3) << 6
+            for i in range(numTimers):
+                self.timerModes[i] = packet[10 + 3*i]
+                self.timers[i] = packet[11 + 3*i] + (packet[12 + 3*i] << 8)
+        for i in range(2):
+            if packet[9] & (64 << i):
+                self.counters[i] = 0
+
+        response = self._extendedResponse(0x18, 34)
+        response[7] = self.timerEnableMask
+        for i in range(6):
+            struct.pack_into("<I", response, 8 + 4*i, self.timers[i])
+        for i in range(2):
+            struct.pack_into("<I", response, 32 + 4*i, self.counters[i])
+        return self._finish(response)
+
+    def _streamConfig(self, packet):
+        numChannels = packet[6]
+        self.streamChannels = [ packet[12 + 2*i] for i in range(numChannels) ]
+        clock = [4000000, 48000000, 750000, 24000000][(packet[9] >> 3) & 3]
+        self._setStreamClock(clock, packet[9] & 0x02, packet[10] + (packet[11] << 8))
+        self.streamConfigured = True
+        return self._finish(self._extendedResponse(0x11, 2))
+
+    def _flushBuffer(self, packet):
+        self.samplesSent = 0
+        self.streamStartTime = self._now()
+        return bytearray([0x08, 0x08])
+
+    def _ping(self, packet):
+        return bytearray([0x70, 0x70])
+
+    def _streamPacketSize(self):
+        if self.ethernet:
+            return 46
+        # USB stream packets have 2 extra zero bytes on the end.
+        return 48
+
+    def streamHeaderByte2(self):
+        return 0x14
+
+    extendedCommands = { (0x78, 0x01) : _commConfig,
+                         (0xF8, 0x08) : _controlConfig,
+                         (0xF8, 0x00) : _feedback,
+                         (0xF8, 0x18) : _timerCounter,
+                         (0xF8, 0x2A) : _readMem,
+                         (0xF8, 0x28) : EmulatedDevice._writeMem,
+                         (0xF8, 0x29) : EmulatedDevice._eraseMem,
+                         (0xF8, 0x11) : _streamConfig }
+    normalCommands = { 0xA3 : _singleIO,
+                       0xA8 : EmulatedDevice._streamStart,
+                       0xB0 : EmulatedDevice._streamStop,
+                       0x08 : _flushBuffer,
+                       0x70 : _ping }
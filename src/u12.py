@@ -512,11 +512,13 @@ class U12(object):
                 raise U12Exception("The U12's handle is None. Please open a U12 with open()")
             
             if self.debug: print "Writing:", hexWithoutQuotes(writeBuffer)
-            newA = (ctypes.c_byte*len(writeBuffer))(0) 
-            for i in range(len(writeBuffer)):
-                newA[i] = ctypes.c_byte(writeBuffer[i])
+            if isinstance(writeBuffer, str):
+                newA = writeBuffer
+            else:
+                newA = asBytearray(writeBuffer)
+                newA = (ctypes.c_ubyte*len(newA)).from_buffer(newA)
             
-            writeBytes = staticLib.LJUSB_Write(self.handle, ctypes.byref(newA), len(writeBuffer))
+            writeBytes = staticLib.LJUSB_Write(self.handle, newA, len(writeBuffer))
             
             if(writeBytes != len(writeBuffer)):
                 raise U12Exception( "Could only write %s of %s bytes." % (writeBytes, len(writeBuffer) ) )
@@ -529,12 +531,31 @@ class U12(object):
         else:
             if self.handle is None:
                 raise U12Exception("The U12's handle is None. Please open a U12 with open()")
-            newA = (ctypes.c_byte*numBytes)()
-            readBytes = staticLib.LJUSB_Read(self.handle, ctypes.byref(newA), numBytes)
             # return a list of integers in command/response mode
-            result = [(newA[i] & 0xff) for i in range(readBytes)]
+            result = list(self.readBytes(numBytes))
             if self.debug: print "Received:", hexWithoutQuotes(result)
             return result
+    
+    def readBytes(self, numBytes = 8):
+        """
+        Name: U12.readBytes(numBytes = 8)
+        Args: numBytes, the number of bytes to read
+        Desc: Like read(), but returns the bytearray the Exodriver wrote the
+              response into instead of a list of integers. Raw reads go
+              through the Exodriver, so this raises a U12Exception on
+              Windows.
+        """
+        if ON_WINDOWS:
+            raise U12Exception("readBytes() needs the Exodriver and isn't available on Windows.")
+        else:
+            if self.handle is None:
+                raise U12Exception("The U12's handle is None. Please open a U12 with open()")
+            result = bytearray(numBytes)
+            newA = (ctypes.c_ubyte*numBytes).from_buffer(result)
+            readBytes = staticLib.LJUSB_Read(self.handle, newA, numBytes)
+            del newA
+            del result[readBytes:]
+            return result
 
 
     # Low-level helpers
@@ -2979,4 +3000,24 @@ def hexWithoutQuotes(l):
     [0x0, 0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0x7, 0x8, 0x9]
 
     """
+    if isinstance(l, (str, memoryview)):
+        l = bytearray(l)
     return str([hex (i) for i in l]).replace("'", "")
+
+# u12.py stands on its own and doesn't import LabJackPython (the same
+# goes for hexWithoutQuotes() above), so this is a copy of
+# LabJackPython.asBytearray(). Keep the two in step.
+def asBytearray(buffer):
+    """
+    Name: asBytearray(buffer)
+    Args: buffer, a list of bytes, str, bytearray or memoryview
+    Desc: Returns buffer as a bytearray, converting it in a single pass in C
+          if it isn't one already. Values outside of 0-255 are wrapped to a
+          byte, the same as ctypes.c_byte does.
+    """
+    if isinstance(buffer, bytearray):
+        return buffer
+    try:
+        return bytearray(buffer)
+    except ValueError:
+        return bytearray([ b & 0xff for b in buffer ])
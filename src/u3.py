@@ -19,6 +19,11 @@ Section Number Mapping:
 from LabJackPython import *
 import struct, ConfigParser
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 FIO0, FIO1, FIO2, FIO3, FIO4, FIO5, FIO6, FIO7, \
 EIO0, EIO1, EIO2, EIO3, EIO4, EIO5, EIO6, EIO7, \
 CIO0, CIO1, CIO2, CIO3 = range(20)
@@ -76,15 +81,17 @@ class U3(Device):
         self.debug = debug
         self.calData = None
         self.ledState = True
+        self.streamCalibration = None
+        self.streamCalibrationScanList = None
         
         if autoOpen:
             self.open(**kargs)
     __init__.section = 1 
         
-    def open(self, firstFound = True, serial = None, localId = None, devNumber = None, handleOnly = False, LJSocket = None):
+    def open(self, firstFound = True, serial = None, localId = None, devNumber = None, handleOnly = False, LJSocket = None, transport = None):
         """
         Name: U3.open(firstFound = True, localId = None, devNumber = None,
-                      handleOnly = False, LJSocket = None)
+                      handleOnly = False, LJSocket = None, transport = None)
         
         Args: firstFound, If True, use the first found U3
               serial, open a U3 with the given serial number
@@ -92,6 +99,8 @@ class U3(Device):
               devNumber, open a U3 with the given devNumber
               handleOnly, if True, LabJackPython will only open a handle
               LJSocket, set to "<ip>:<port>" to connect to LJSocket
+              transport, a Transport to talk through instead of opening
+                         hardware, such as emulator.EmulatedU3()
         
         Desc: Use to open a U3. If handleOnly is false, it will call configU3
               and save the resulting information to the object. This allows the
@@ -112,8 +121,13 @@ class U3(Device):
         >>> import u3
         >>> d = u3.U3(autoOpen = False)
         >>> d.open(LJSocket = "localhost:6000")
+        
+        Using the emulator:
+        >>> import u3, emulator
+        >>> d = u3.U3(autoOpen = False)
+        >>> d.open(transport = emulator.EmulatedU3())
         """
-        Device.open(self, 3, firstFound = firstFound, serial = serial, localId = localId, devNumber = devNumber, handleOnly = handleOnly, LJSocket = LJSocket )
+        Device.open(self, 3, firstFound = firstFound, serial = serial, localId = localId, devNumber = devNumber, handleOnly = handleOnly, LJSocket = LJSocket, transport = transport )
     open.section = 1
     
     def configU3(self, LocalID = None, TimerCounterConfig = None, FIOAnalog = None, FIODirection = None, FIOState = None, EIOAnalog = None, EIODirection = None, EIOState = None, CIODirection = None, CIOState = None, DAC1Enable = None, DAC0 = None, DAC1 = None, TimerClockConfig = None, TimerClockDivisor = None, CompatibilityOptions = None ):
@@ -558,14 +572,24 @@ class U3(Device):
         >>> print d.getAIN( 0 )
         0.0501680038869
         """
+        sentNegChannel, lvChannel, singleEnded, isSpecial = self._ainSettings(posChannel, negChannel)
+        
+        bits = self.getFeedback(AIN(posChannel, sentNegChannel, longSettle, quickSample))[0]
+        
+        return self.binaryToCalibratedAnalogVoltage(bits, isLowVoltage = lvChannel, isSingleEnded = singleEnded, isSpecialSetting = isSpecial, channelNumber = posChannel)
+    getAIN.section = 3
+
+    def _ainSettings(self, posChannel, negChannel):
+        """
+        Returns the negative channel to send for an AIN read, and whether
+        the reading is low-voltage, single-ended and the special range.
+        """
         isSpecial = False
         
         if negChannel == 32:
             isSpecial = True
             negChannel = 30
         
-        bits = self.getFeedback(AIN(posChannel, negChannel, longSettle, quickSample))[0]
-        
         singleEnded = True
         if negChannel != 31:
             singleEnded = False
@@ -578,11 +602,33 @@ class U3(Device):
         except AttributeError:
             pass
         
-        if isSpecial:
-            negChannel = 32
+        return negChannel, lvChannel, singleEnded, isSpecial
+    _ainSettings.section = 3
+    
+    def prepareAIN(self, posChannel, negChannel = 31, longSettle = False, quickSample = False):
+        """
+        Name: U3.prepareAIN(posChannel, negChannel = 31, longSettle = False,
+                            quickSample = False)
+        Args: The same as getAIN()
+        Desc: Returns a PreparedRead whose read() does what getAIN() does,
+              but with the packet built and the calibration constants
+              looked up ahead of time. Prepare again after
+              getCalibrationData() to pick up new constants.
         
-        return self.binaryToCalibratedAnalogVoltage(bits, isLowVoltage = lvChannel, isSingleEnded = singleEnded, isSpecialSetting = isSpecial, channelNumber = posChannel)
-    getAIN.section = 3
+        >>> reader = d.prepareAIN(0)
+        >>> print reader.read()
+        0.0501680038869
+        """
+        sentNegChannel, lvChannel, singleEnded, isSpecial = self._ainSettings(posChannel, negChannel)
+        convert = self._ainConverter(lvChannel, singleEnded, isSpecial, posChannel)
+        program = self.compileFeedback(AIN(posChannel, sentNegChannel, longSettle, quickSample))
+        
+        def decode(rcvBuffer):
+            program._checkResponse(rcvBuffer, 0)
+            return convert((rcvBuffer[10] << 8) + rcvBuffer[9])
+        
+        return PreparedRead(self, program.packet(), program.packets[0][1], decode)
+    prepareAIN.section = 3
 
     def configAnalog(self, *args):
         """
@@ -673,7 +719,7 @@ class U3(Device):
         """
         for cmd in commandlist:
             if isinstance(cmd, FeedbackCommand):
-                sendBuffer += cmd.cmdBytes
+                sendBuffer += cmd._cmdBytes
                 readLen += cmd.readLen
             elif isinstance(cmd, list):
                 sendBuffer, readLen = self._buildBuffer(sendBuffer, readLen, cmd)
@@ -684,22 +730,25 @@ class U3(Device):
         """
         Builds the result list from the results of getFeedback
         """
-        for cmd in commandlist:
-            if isinstance(cmd, FeedbackCommand):
-                results.append(cmd.handle(rcvBuffer[i:i+cmd.readLen]))
-                i += cmd.readLen
-            elif isinstance(cmd, list):
-                self._buildFeedbackResults(rcvBuffer, cmd, results, i)
+        # Flattened first, so the offset carries on through nested lists.
+        for cmd in self._flattenCommands(commandlist, []):
+            results.append(cmd.handle(rcvBuffer[i:i+cmd.readLen]))
+            i += cmd.readLen
         return results
     _buildFeedbackResults.section = 4
 
-    def getFeedback(self, *commandlist):
+    def getFeedback(self, *commandlist, **kargs):
         """
-        Name: U3.getFeedback(commandlist)
+        Name: U3.getFeedback(commandlist, split = False)
         
         Args: the FeedbackCommands to run
+              split, set to True to send commands that don't fit in one
+                     packet in as few packets as they need, instead of
+                     raising an exception
         
         Desc: Forms the commandlist into a packet, sends it to the U3, and reads the response.
+              With split, the packets are sent back-to-back and the results
+              come back as one list in the original order.
         
         Examples:
         >>> myU3 = u3.U3()
@@ -719,6 +768,9 @@ class U3(Device):
         
         """
         
+        if self._splitArgument('getFeedback', kargs):
+            return self.compileFeedback(split = True, *commandlist).run()
+        
         sendBuffer = [0] * 7
         sendBuffer[1] = 0xF8
         readLen = 9
@@ -759,6 +811,53 @@ class U3(Device):
         return self._buildFeedbackResults(rcvBuffer, commandlist, results, i)
     getFeedback.section = 2    
     
+    def _flattenCommands(self, commandlist, flat):
+        """
+        Appends the FeedbackCommands in commandlist, and in any lists in
+        it, to flat.
+        """
+        for cmd in commandlist:
+            if isinstance(cmd, FeedbackCommand):
+                flat.append(cmd)
+            elif isinstance(cmd, list):
+                self._flattenCommands(cmd, flat)
+        return flat
+    _flattenCommands.section = 4
+
+    def _splitArgument(self, name, kargs):
+        """
+        Returns the split keyword argument of getFeedback() or
+        compileFeedback().
+        """
+        split = kargs.pop('split', False)
+        if kargs:
+            raise TypeError("%s() got an unexpected keyword argument '%s'" % (name, kargs.keys()[0]))
+        return split
+    _splitArgument.section = 4
+
+    def compileFeedback(self, *commandlist, **kargs):
+        """
+        Name: U3.compileFeedback(commandlist, split = False)
+        
+        Args: the FeedbackCommands to run, and split, the same as
+              getFeedback()
+        
+        Desc: Returns a FeedbackProgram that sends the commands each time
+              its run() is called. The packet and the layout of the
+              response are worked out once here instead of on every call,
+              for loops that send the same commands over and over.
+        
+        Example:
+        >>> program = myU3.compileFeedback(u3.AIN(0, 31), u3.DAC0_16(0))
+        >>> program.run()
+        [9376, None]
+        >>> program[1] = u3.DAC0_16(32768)
+        >>> program.run()
+        """
+        split = self._splitArgument('compileFeedback', kargs)
+        return FeedbackProgram(self, self._flattenCommands(commandlist, []), split)
+    compileFeedback.section = 2
+    
     def readMem(self, blockNum, readCal=False):
         """
         Name: U3.readMem(blockNum, readCal=False)
@@ -1030,6 +1129,7 @@ class U3(Device):
         self.streamSamplesPerPacket = SamplesPerPacket
         self.streamChannelNumbers = PChannels
         self.streamNegChannels = NChannels
+        self._updateStreamCalibration()
         
         self.streamConfiged = True
         if InternalStreamClockFrequency == 1:
@@ -1065,44 +1165,122 @@ class U3(Device):
         if numBytes is None:
             numBytes = 14 + (self.streamSamplesPerPacket * 2)
         
-        returnDict = collections.defaultdict(list)
+        if numpy is not None:
+            return self._streamArraysToLists(self.processStreamDataArrays(result, numBytes))
         
-        for packet in self.breakupPackets(result, numBytes):
-            for sample in self.samplesFromPacket(packet):
-                if self.streamPacketOffset >= len(self.streamChannelNumbers):
-                    self.streamPacketOffset = 0
-                
-                if self.streamChannelNumbers[self.streamPacketOffset] in (193, 194):
-                    value = struct.unpack('<BB', sample )
-                elif self.streamChannelNumbers[self.streamPacketOffset] >= 200:
-                    value = struct.unpack('<H', sample )[0]
-                else:  
-                    if self.streamNegChannels[self.streamPacketOffset] == 31:
-                        # do unsigned
-                        value = struct.unpack('<H', sample )[0]
-                        singleEnded = True
-                    else:
-                        # do signed
-                        value = struct.unpack('<H', sample )[0]
-                        singleEnded = False
-                    
-                    lvChannel = True
-                    if self.deviceName.lower().endswith('hv') and self.streamChannelNumbers[self.streamPacketOffset] < 4:
-                        lvChannel = False
-                    
-                    isSpecial = False
-                    if self.streamNegChannels[self.streamPacketOffset] == 32:
-                        isSpecial = True
-
-                    value = self.binaryToCalibratedAnalogVoltage(value, isLowVoltage = lvChannel, isSingleEnded = singleEnded, channelNumber = self.streamChannelNumbers[self.streamPacketOffset], isSpecialSetting = isSpecial)
-                
-                returnDict["AIN%s" % self.streamChannelNumbers[self.streamPacketOffset]].append(value)
-            
-                self.streamPacketOffset += 1
-
-        return returnDict
+        if self.streamCalibrationScanList != (list(self.streamChannelNumbers), list(self.streamNegChannels)):
+            # The scan list was set some other way than streamConfig().
+            self._updateStreamCalibration()
+        
+        return self._dealStreamSampleLists(self._unpackStreamSamples(result, numBytes), self._convertStreamSampleList)
     processStreamData.section = 3
     
+    def processStreamDataArrays(self, result, numBytes = None):
+        """
+        Name: U3.processStreamDataArrays(result, numBytes = None)
+        Args: result, the string returned from streamData()
+              numBytes, the number of bytes per packet.
+        Desc: Does what processStreamData() does, but with NumPy, and
+              returns an array for each channel instead of a list. The
+              conversion for each position of the scan list is worked
+              out by streamConfig(), and converting a channel is looking its
+              codes up in the table made from them. The readings are the
+              same as processStreamData()'s, bit for bit.
+              
+              Analog readings are float64 arrays. Channels 200 and up are
+              uint16 arrays, and channels 193 and 194 have a row of two
+              bytes per reading.
+        
+        >>> reading = d.streamData(convert = False).next()
+        >>> d.processStreamDataArrays(reading['result'])
+        {'AIN0' : array([ 3.123, 3.231, 3.232, ...])}
+        """
+        if numpy is None:
+            raise LabJackException("processStreamDataArrays() needs NumPy.")
+        
+        if numBytes is None:
+            numBytes = 14 + (self.streamSamplesPerPacket * 2)
+        
+        if self.streamCalibrationScanList != (list(self.streamChannelNumbers), list(self.streamNegChannels)):
+            # The scan list was set some other way than streamConfig().
+            self._updateStreamCalibration()
+        
+        return self._dealStreamSamples(self._streamSampleArray(result, numBytes), self._convertStreamSamples)
+    processStreamDataArrays.section = 3
+    
+    def _updateStreamCalibration(self):
+        """
+        Sets streamCalibration to the _ainConverter() function for each
+        position of the scan list, None for the digital and timer channels,
+        or the exception binaryToCalibratedAnalogVoltage() would raise for
+        the position.
+        """
+        isHV = self.deviceName.lower().endswith('hv')
+        
+        calibration = []
+        for channel, negChannel in zip(self.streamChannelNumbers, self.streamNegChannels):
+            if channel in (193, 194) or channel >= 200:
+                calibration.append(None)
+                continue
+            
+            lvChannel = not (isHV and channel < 4)
+            try:
+                calibration.append(self._ainConverter(lvChannel, negChannel == 31, negChannel == 32, channel))
+            except Exception, e:
+                calibration.append(e)
+        
+        self.streamCalibration = calibration
+        self.streamCalibrationTables = dict()
+        self.streamCalibrationScanList = (list(self.streamChannelNumbers), list(self.streamNegChannels))
+    _updateStreamCalibration.section = 3
+    
+    def _convertStreamSamples(self, j, values):
+        """
+        Converts the samples from position j of the scan list.
+        """
+        channel = self.streamChannelNumbers[j]
+        if channel in (193, 194):
+            return values.view(numpy.uint8).reshape(-1, 2)
+        elif channel >= 200:
+            return values
+        
+        return self._streamCalibrationTable(j)[values]
+    _convertStreamSamples.section = 3
+    
+    def _convertStreamSampleList(self, j, values):
+        """
+        Converts the samples from position j of the scan list, a sequence
+        of ints, to a list without NumPy.
+        """
+        channel = self.streamChannelNumbers[j]
+        if channel in (193, 194):
+            return [ (value & 0xff, value >> 8) for value in values ]
+        elif channel >= 200:
+            return list(values)
+        
+        return map(self._streamCalibrationTable(j).__getitem__, values)
+    _convertStreamSampleList.section = 3
+    
+    def _streamCalibrationKey(self, j):
+        """
+        Returns what the calibration of position j of the scan list
+        depends on, its positive and negative channels.
+        """
+        return self.streamChannelNumbers[j], self.streamNegChannels[j]
+    _streamCalibrationKey.section = 3
+    
+    def _calibrateStreamSamples(self, j, values):
+        """
+        Calibrates ints read from analog position j of the scan list one
+        at a time, with the function in streamCalibration.
+        """
+        convert = self.streamCalibration[j]
+        if isinstance(convert, Exception):
+            raise convert
+        
+        return map(convert, values)
+    _calibrateStreamSamples.section = 3
+    
     def watchdog(self, ResetOnTimeout = False, SetDIOStateOnTimeout = False, TimeoutPeriod = 60, DIOState = 0, DIONumber = 0, onlyRead=False):
         """
         Name: U3.watchdog(ResetOnTimeout = False, SetDIOStateOnTimeout = False,
@@ -1596,6 +1774,59 @@ class U3(Device):
             else:
                 raise Exception, "Can't do differential on high voltage channels"
     binaryToCalibratedAnalogVoltage.section = 3
+
+    def _ainConverter(self, isLowVoltage, isSingleEnded, isSpecialSetting, channelNumber):
+        """
+        Returns a function that converts readings with these settings the
+        way binaryToCalibratedAnalogVoltage() does. The calibration
+        constants are looked up now, but each range keeps its own formula,
+        so the readings are the same as binaryToCalibratedAnalogVoltage()'s,
+        bit for bit. prepareAIN() and stream conversion make one up front;
+        a single conversion is cheaper done inline.
+        """
+        hasCal = self.calData is not None
+        if isLowVoltage:
+            if isSingleEnded and not isSpecialSetting:
+                if hasCal:
+                    slope, offset = self.calData['lvSESlope'], self.calData['lvSEOffset']
+                    return lambda bits: ( bits * slope ) + offset
+                else:
+                    return lambda bits: ( bits * 0.000037231 ) + 0
+            elif isSpecialSetting:
+                if hasCal:
+                    slope, offset, vRef = self.calData['lvDiffSlope'], self.calData['lvDiffOffset'], self.calData['vRefAtCAl']
+                    return lambda bits: ( bits * slope ) + offset + vRef
+                else:
+                    return lambda bits: (bits * 0.000074463)
+            else:
+                if hasCal:
+                    slope, offset = self.calData['lvDiffSlope'], self.calData['lvDiffOffset']
+                    return lambda bits: ( bits * slope ) + offset
+                else:
+                    return lambda bits: (bits * 0.000074463) - 2.44
+        else:
+            if isSingleEnded and not isSpecialSetting:
+                if hasCal:
+                    slope, offset = self.calData['hvAIN%sSlope' % channelNumber], self.calData['hvAIN%sOffset' % channelNumber]
+                    return lambda bits: ( bits * slope ) + offset
+                else:
+                    return lambda bits: ( bits * 0.000314 ) + -10.3
+            elif isSpecialSetting:
+                if hasCal:
+                    hvSlope = self.calData['hvAIN%sSlope' % channelNumber]
+                    hvOffset = self.calData['hvAIN%sOffset' % channelNumber]
+                    slope, offset, vRef = self.calData['lvDiffSlope'], self.calData['lvDiffOffset'], self.calData['vRefAtCAl']
+                    lvSESlope = self.calData['lvSESlope']
+                    
+                    def convert(bits):
+                        diffR = ( bits * slope ) + offset + vRef
+                        return diffR * hvSlope / lvSESlope + hvOffset
+                    return convert
+                else:
+                    return lambda bits: (bits * 0.000074463) * (0.000314 / 0.000037231) + -10.3
+            else:
+                raise Exception, "Can't do differential on high voltage channels"
+    _ainConverter.section = 3
     
     def binaryToCalibratedAnalogTemperature(self, bytesTemperature):
         hasCal = self.calData is not None
@@ -1627,6 +1858,13 @@ class U3(Device):
         return int(bits)
     voltageToDACBits.section = 3
     
+    def _dac16Command(self, dacNumber, bits):
+        """
+        The DAC16 command for WaveformPlayer to build its packets with.
+        """
+        return DAC16(dacNumber, bits)
+    _dac16Command.section = 3
+    
     def getCalibrationData(self):
         """
         Name: U3.getCalibrationData()
@@ -1681,6 +1919,9 @@ class U3(Device):
                 #not an invalid block error, so do not disregard
                 raise ex
 
+        if self.streamCalibration is not None:
+            self._updateStreamCalibration()
+
         return self.calData
     getCalibrationData.section = 3
     
@@ -1935,10 +2176,15 @@ class U3(Device):
                 self.getFeedback( Timer1Config(mode, value) )
     loadConfig.section = 3      
 
-class FeedbackCommand(object):
+class FeedbackCommand(FeedbackCommandBase):
     """
     The FeedbackCommand class is the base for all the Feedback commands.
+    
+    Commands made with the same arguments are the same shared instance
+    (see FeedbackCommandType), so they are immutable: setting an attribute
+    raises AttributeError, and cmdBytes returns a new list every time.
     """
+    __slots__ = ()
     readLen = 0
     def handle(self, input):
         return None
@@ -1961,6 +2207,7 @@ class AIN(FeedbackCommand):
     Response:  [0xab, 0xf8, 0x3, 0x0, 0xaf, 0x0, 0x0, 0x0, 0x0, 0x20, 0x8f, 0x0]
     [36640]
     '''
+    __slots__ = ( 'positiveChannel', 'negativeChannel', 'longSettling', 'quickSample' )
     def __init__(self, PositiveChannel, NegativeChannel=31, 
             LongSettling=False, QuickSample=False):
         self.positiveChannel = PositiveChannel
@@ -1976,7 +2223,7 @@ class AIN(FeedbackCommand):
         b = PositiveChannel 
         b |= (int(bool(LongSettling)) << 6)
         b |= (int(bool(QuickSample)) << 7)
-        self.cmdBytes = [ 0x01, b, NegativeChannel ]
+        self.cmdBytes = ( 0x01, b, NegativeChannel )
 
     readLen =  2
     
@@ -2001,9 +2248,10 @@ class WaitShort(FeedbackCommand):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     '''
+    __slots__ = ( 'time', )
     def __init__(self, Time):
         self.time = Time % 256
-        self.cmdBytes = [ 5, Time % 256 ]
+        self.cmdBytes = ( 5, Time % 256 )
 
     def __repr__(self):
         return "<u3.WaitShort( Time = %s )>" % self.time
@@ -2022,9 +2270,10 @@ class WaitLong(FeedbackCommand):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     '''
+    __slots__ = ( 'time', )
     def __init__(self, Time):
         self.time = Time % 256
-        self.cmdBytes = [ 6, Time % 256 ]
+        self.cmdBytes = ( 6, Time % 256 )
         
     def __repr__(self):
         return "<u3.WaitLong( Time = %s )>" % self.time
@@ -2049,9 +2298,10 @@ class LED(FeedbackCommand):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     '''
+    __slots__ = ( 'state', )
     def __init__(self, State):
         self.state = State
-        self.cmdBytes = [ 9, int(bool(State)) ]
+        self.cmdBytes = ( 9, int(bool(State)) )
         
     def __repr__(self):
         return "<u3.LED( State = %s )>" % self.state
@@ -2074,9 +2324,10 @@ class BitStateRead(FeedbackCommand):
     Response:  [0xfb, 0xf8, 0x2, 0x0, 0x1, 0x0, 0x0, 0x0, 0x0, 0x1]
     [1]
     '''
+    __slots__ = ( 'ioNumber', )
     def __init__(self, IONumber):
         self.ioNumber = IONumber
-        self.cmdBytes = [ 10, IONumber % 20 ]
+        self.cmdBytes = ( 10, IONumber % 20 )
 
     readLen = 1
 
@@ -2104,10 +2355,11 @@ class BitStateWrite(FeedbackCommand):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     '''
+    __slots__ = ( 'ioNumber', 'state' )
     def __init__(self, IONumber, State):
         self.ioNumber = IONumber
         self.state = State
-        self.cmdBytes = [ 11, (IONumber % 20) + (int(bool(State)) << 7) ]
+        self.cmdBytes = ( 11, (IONumber % 20) + (int(bool(State)) << 7) )
         
     def __repr__(self):
         return "<u3.BitStateWrite( IONumber = %s, State = %s )>" % (self.ioNumber, self.state)
@@ -2127,9 +2379,10 @@ class BitDirRead(FeedbackCommand):
     Response:  [0xfb, 0xf8, 0x2, 0x0, 0x1, 0x0, 0x0, 0x0, 0x0, 0x1]
     [1]
     '''
+    __slots__ = ( 'ioNumber', )
     def __init__(self, IONumber):
         self.ioNumber = IONumber
-        self.cmdBytes = [ 12, IONumber % 20 ]
+        self.cmdBytes = ( 12, IONumber % 20 )
 
     readLen = 1
 
@@ -2156,10 +2409,11 @@ class BitDirWrite(FeedbackCommand):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     '''
+    __slots__ = ( 'ioNumber', 'direction' )
     def __init__(self, IONumber, Direction):
         self.ioNumber = IONumber
         self.direction = Direction
-        self.cmdBytes = [ 13, (IONumber % 20) + (int(bool(Direction)) << 7) ]
+        self.cmdBytes = ( 13, (IONumber % 20) + (int(bool(Direction)) << 7) )
         
     def __repr__(self):
         return "<u3.BitDirWrite( IONumber = %s, Direction = %s )>" % (self.ioNumber, self.direction)
@@ -2177,8 +2431,9 @@ class PortStateRead(FeedbackCommand):
     Response:  [0xeb, 0xf8, 0x3, 0x0, 0xee, 0x1, 0x0, 0x0, 0x0, 0xe0, 0xff, 0xf]
     [{'CIO': 15, 'FIO': 224, 'EIO': 255}]
     """
+    __slots__ = ()
     def __init__(self):
-        self.cmdBytes = [ 26 ]
+        self.cmdBytes = ( 26, )
         
     readLen = 3
     
@@ -2204,10 +2459,11 @@ class PortStateWrite(FeedbackCommand):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     """
+    __slots__ = ( 'state', 'writeMask' )
     def __init__(self, State, WriteMask = [0xff, 0xff, 0xff]):
         self.state = State
         self.writeMask = WriteMask 
-        self.cmdBytes = [ 27 ] + WriteMask + State
+        self.cmdBytes = ( 27, ) + tuple(WriteMask) + tuple(State)
         
     def __repr__(self):
         return "<u3.PortStateWrite( State = %s, WriteMask = %s )>" % (self.state, self.writeMask)
@@ -2225,8 +2481,9 @@ class PortDirRead(FeedbackCommand):
     Response:  [0xfb, 0xf8, 0x3, 0x0, 0xfe, 0x1, 0x0, 0x0, 0x0, 0xf0, 0xff, 0xf]
     [{'CIO': 15, 'FIO': 240, 'EIO': 255}]
     """
+    __slots__ = ()
     def __init__(self):
-        self.cmdBytes = [ 28 ]
+        self.cmdBytes = ( 28, )
         
     readLen = 3
     
@@ -2252,10 +2509,11 @@ class PortDirWrite(FeedbackCommand):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     """
+    __slots__ = ( 'direction', 'writeMask' )
     def __init__(self, Direction, WriteMask = [ 0xff, 0xff, 0xff]):
         self.direction = Direction
         self.writeMask = WriteMask
-        self.cmdBytes = [ 29 ] + WriteMask + Direction
+        self.cmdBytes = ( 29, ) + tuple(WriteMask) + tuple(Direction)
 
     def __repr__(self):
         return "<u3.PortDirWrite( Direction = %s, WriteMask = %s )>" % (self.direction, self.writeMask)
@@ -2277,10 +2535,11 @@ class DAC8(FeedbackCommand):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     '''
+    __slots__ = ( 'dac', 'value' )
     def __init__(self, Dac, Value):
         self.dac = Dac
         self.value = Value % 256 
-        self.cmdBytes = [ 34 + (Dac % 2), Value % 256 ]
+        self.cmdBytes = ( 34 + (Dac % 2), Value % 256 )
     
     def __repr__(self):
         return "<u3.DAC8( Dac = %s, Value = %s )>" % (self.dac, self.value)
@@ -2301,6 +2560,7 @@ class DAC0_8(DAC8):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     """
+    __slots__ = ()
     def __init__(self, Value):
         DAC8.__init__(self, 0, Value)
         
@@ -2323,6 +2583,7 @@ class DAC1_8(DAC8):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     """
+    __slots__ = ()
     def __init__(self, Value):
         DAC8.__init__(self, 1, Value)
         
@@ -2346,10 +2607,11 @@ class DAC16(FeedbackCommand):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     '''
+    __slots__ = ( 'dac', 'value' )
     def __init__(self, Dac, Value):
         self.dac = Dac
         self.value = Value
-        self.cmdBytes = [ 38 + (Dac % 2), Value % 256, Value >> 8 ]
+        self.cmdBytes = ( 38 + (Dac % 2), Value % 256, Value >> 8 )
         
     def __repr__(self):
         return "<u3.DAC16( Dac = %s, Value = %s )>" % (self.dac, self.value)
@@ -2370,6 +2632,7 @@ class DAC0_16(DAC16):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     """
+    __slots__ = ()
     def __init__(self, Value):
         DAC16.__init__(self, 0, Value)
         
@@ -2392,6 +2655,7 @@ class DAC1_16(DAC16):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     """
+    __slots__ = ()
     def __init__(self, Value):
         DAC16.__init__(self, 1, Value)
     
@@ -2430,6 +2694,7 @@ class Timer(FeedbackCommand):
     Response:  [0xfc, 0xf8, 0x4, 0x0, 0xfe, 0x1, 0x0, 0x0, 0x0, 0x63, 0xdd, 0x4c, 0x72, 0x0]
     [1917640035]
     """
+    __slots__ = ( 'timer', 'updateReset', 'value', 'mode' )
     def __init__(self, timer, UpdateReset = False, Value=0, Mode = None):
         self.timer = timer
         self.updateReset = UpdateReset
@@ -2441,7 +2706,7 @@ class Timer(FeedbackCommand):
             raise LabJackException("UpdateReset set but no value.")
             
         
-        self.cmdBytes = [ (42 + (2*timer)), UpdateReset, Value % 256, Value >> 8 ]
+        self.cmdBytes = ( (42 + (2*timer)), UpdateReset, Value % 256, Value >> 8 )
     
     readLen = 4
     
@@ -2484,6 +2749,7 @@ class Timer0(Timer):
     Response:  [0x51, 0xf8, 0x4, 0x0, 0x52, 0x2, 0x0, 0x0, 0x0, 0xf6, 0x90, 0x46, 0x86, 0x0]
     [2252771574]
     """
+    __slots__ = ()
     def __init__(self, UpdateReset = False, Value = 0, Mode = None):
         Timer.__init__(self, 0, UpdateReset, Value, Mode)
         
@@ -2516,6 +2782,7 @@ class Timer1(Timer):
     Response:  [0x8d, 0xf8, 0x4, 0x0, 0x8e, 0x2, 0x0, 0x0, 0x0, 0xf3, 0x31, 0xd0, 0x9a, 0x0]
     [2597335539]
     """
+    __slots__ = ()
     def __init__(self, UpdateReset = False, Value = 0, Mode = None):
         Timer.__init__(self, 1, UpdateReset, Value, Mode)
         
@@ -2558,6 +2825,7 @@ class QuadratureInputTimer(Timer):
     Response:  [0x9, 0xf8, 0x4, 0x0, 0xc, 0x0, 0x0, 0x0, 0x0, 0xc, 0x0, 0x0, 0x0, 0x0]
     [12]
     """
+    __slots__ = ()
     def __init__(self, UpdateReset = False, Value = 0):
         Timer.__init__(self, 0, UpdateReset, Value, Mode = 8)
         
@@ -2595,6 +2863,7 @@ class TimerStopInput1(Timer1):
     Response:  [0x1b, 0xf8, 0x4, 0x0, 0x1e, 0x0, 0x0, 0x0, 0x0, 0x1e, 0x0, 0x0, 0x0, 0x0]
     [(0, 0)]
     """
+    __slots__ = ()
     def __init__(self, UpdateReset = False, Value = 0):
         Timer.__init__(self, 1, UpdateReset, Value, Mode = 9)
 
@@ -2627,6 +2896,7 @@ class TimerConfig(FeedbackCommand):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     """
+    __slots__ = ( 'timer', 'timerMode', 'value' )
     def __init__(self, timer, TimerMode, Value=0):
         '''Creates command bytes for configureing a Timer'''
         #Conditions come from pages 33-34 of user's guide
@@ -2640,7 +2910,7 @@ class TimerConfig(FeedbackCommand):
         self.timerMode = TimerMode
         self.value = Value
         
-        self.cmdBytes = [43 + (timer * 2), TimerMode, Value % 256, Value >> 8]
+        self.cmdBytes = ( 43 + (timer * 2), TimerMode, Value % 256, Value >> 8 )
         
     def __repr__(self):
         return "<u3.TimerConfig( timer = %s, TimerMode = %s, Value = %s )>" % (self.timer, self.timerMode, self.value)
@@ -2669,6 +2939,7 @@ class Timer0Config(TimerConfig):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     """
+    __slots__ = ()
     def __init__(self, TimerMode, Value = 0):
         TimerConfig.__init__(self, 0, TimerMode, Value)
         
@@ -2695,6 +2966,7 @@ class Timer1Config(TimerConfig):
     Response:  [0xfa, 0xf8, 0x2, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
     [None]
     """
+    __slots__ = ()
     def __init__(self, TimerMode, Value = 0):
         TimerConfig.__init__(self, 1, TimerMode, Value)
     
@@ -2729,10 +3001,11 @@ class Counter(FeedbackCommand):
     Response:  [0xe9, 0xf8, 0x4, 0x0, 0xec, 0x0, 0x0, 0x0, 0x0, 0xe8, 0x4, 0x0, 0x0, 0x0]
     [1256]
     '''
+    __slots__ = ( 'counter', 'reset' )
     def __init__(self, counter, Reset = False):
         self.counter = counter
         self.reset = Reset
-        self.cmdBytes = [ 54 + (counter % 2), int(bool(Reset))]
+        self.cmdBytes = ( 54 + (counter % 2), int(bool(Reset)) )
 
     readLen = 4
 
@@ -2777,6 +3050,7 @@ class Counter0(Counter):
     [4363]
 
     '''
+    __slots__ = ()
     def __init__(self, Reset = False):
         Counter.__init__(self, 0, Reset)
         
@@ -2816,6 +3090,7 @@ class Counter1(Counter):
     Response:  [0xb4, 0xf8, 0x4, 0x0, 0xb7, 0x0, 0x0, 0x0, 0x0, 0x6b, 0x2b, 0x21, 0x0, 0x0]
     [2173803]
     '''
+    __slots__ = ()
     def __init__(self, Reset = False):
         Counter.__init__(self, 1, Reset)
         
@@ -14,6 +14,11 @@ from LabJackPython import *
 
 import struct, ConfigParser
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 def openAllU6():
     """
     A helpful function which will open all the connected U6s. Returns a 
@@ -195,22 +200,24 @@ class U6(Device):
         if autoOpen:
             self.open(**kargs)
 
-    def open(self, localId = None, firstFound = True, serial = None, devNumber = None, handleOnly = False, LJSocket = None):
+    def open(self, localId = None, firstFound = True, serial = None, devNumber = None, handleOnly = False, LJSocket = None, transport = None):
         """
         Name: U6.open(localId = None, firstFound = True, devNumber = None,
-                      handleOnly = False, LJSocket = None)
+                      handleOnly = False, LJSocket = None, transport = None)
         Args: firstFound, If True, use the first found U6
               serial, open a U6 with the given serial number
               localId, open a U6 with the given local id.
               devNumber, open a U6 with the given devNumber
               handleOnly, if True, LabJackPython will only open a handle
               LJSocket, set to "<ip>:<port>" to connect to LJSocket
+              transport, a Transport to talk through instead of opening
+                         hardware, such as emulator.EmulatedU6()
         Desc: Opens a U6 for reading and writing.
         
         >>> myU6 = u6.U6(autoOpen = False)
         >>> myU6.open()
         """
-        Device.open(self, 6, firstFound = firstFound, serial = serial, localId = localId, devNumber = devNumber, handleOnly = handleOnly, LJSocket = LJSocket )
+        Device.open(self, 6, firstFound = firstFound, serial = serial, localId = localId, devNumber = devNumber, handleOnly = handleOnly, LJSocket = LJSocket, transport = transport )
 
     def configU6(self, LocalID = None):
         """
@@ -367,27 +374,29 @@ class U6(Device):
     def _buildBuffer(self, sendBuffer, readLen, commandlist):
         for cmd in commandlist:
             if isinstance(cmd, FeedbackCommand):
-                sendBuffer += cmd.cmdBytes
+                sendBuffer += cmd._cmdBytes
                 readLen += cmd.readLen
             elif isinstance(cmd, list):
                 sendBuffer, readLen = self._buildBuffer(sendBuffer, readLen, cmd)
         return (sendBuffer, readLen)
                 
     def _buildFeedbackResults(self, rcvBuffer, commandlist, results, i):
-        for cmd in commandlist:
-            if isinstance(cmd, FeedbackCommand):
-                results.append(cmd.handle(rcvBuffer[i:i+cmd.readLen]))
-                i += cmd.readLen
-            elif isinstance(cmd, list):
-                self._buildFeedbackResults(rcvBuffer, cmd, results, i)
+        # Flattened first, so the offset carries on through nested lists.
+        for cmd in self._flattenCommands(commandlist, []):
+            results.append(cmd.handle(rcvBuffer[i:i+cmd.readLen]))
+            i += cmd.readLen
         return results
 
-    def getFeedback(self, *commandlist):
+    def getFeedback(self, *commandlist, **kargs):
         """
-        Name: U6.getFeedback(commandlist)
+        Name: U6.getFeedback(commandlist, split = False)
         Args: the FeedbackCommands to run
+              split, set to True to send commands that don't fit in one
+                     packet in as few packets as they need, instead of
+                     raising an exception
         Desc: Forms the commandlist into a packet, sends it to the U6, and reads
-              the response.
+              the response. With split, the packets are sent back-to-back
+              and the results come back as one list in the original order.
         
         >>> myU6 = U6()
         >>> ledCommand = u6.LED(False)
@@ -404,6 +413,9 @@ class U6(Device):
         >>> myU6.getFeedback(commandList)
         [None, 23200]
         """
+        if self._splitArgument('getFeedback', kargs):
+            return self.compileFeedback(split = True, *commandlist).run()
+        
         sendBuffer = [0] * 7
         sendBuffer[1] = 0xF8
         readLen = 9
@@ -442,6 +454,50 @@ class U6(Device):
         i = 9
         return self._buildFeedbackResults(rcvBuffer, commandlist, results, i)
 
+    def _flattenCommands(self, commandlist, flat):
+        """
+        Appends the FeedbackCommands in commandlist, and in any lists in
+        it, to flat.
+        """
+        for cmd in commandlist:
+            if isinstance(cmd, FeedbackCommand):
+                flat.append(cmd)
+            elif isinstance(cmd, list):
+                self._flattenCommands(cmd, flat)
+        return flat
+
+    def _splitArgument(self, name, kargs):
+        """
+        Returns the split keyword argument of getFeedback() or
+        compileFeedback().
+        """
+        split = kargs.pop('split', False)
+        if kargs:
+            raise TypeError("%s() got an unexpected keyword argument '%s'" % (name, kargs.keys()[0]))
+        return split
+
+    def compileFeedback(self, *commandlist, **kargs):
+        """
+        Name: U6.compileFeedback(commandlist, split = False)
+        
+        Args: the FeedbackCommands to run, and split, the same as
+              getFeedback()
+        
+        Desc: Returns a FeedbackProgram that sends the commands each time
+              its run() is called. The packet and the layout of the
+              response are worked out once here instead of on every call,
+              for loops that send the same commands over and over.
+        
+        Example:
+        >>> program = myU6.compileFeedback(u6.AIN24(0), u6.DAC0_16(0))
+        >>> program.run()
+        [8388608, None]
+        >>> program[1] = u6.DAC0_16(32768)
+        >>> program.run()
+        """
+        split = self._splitArgument('compileFeedback', kargs)
+        return FeedbackProgram(self, self._flattenCommands(commandlist, []), split)
+
     def readMem(self, BlockNum, ReadCal=False):
         """
         Name: U6.readMem(BlockNum, ReadCal=False)
@@ -652,6 +708,7 @@ class U6(Device):
         self.streamSamplesPerPacket = SamplesPerPacket
         self.streamChannelNumbers = ChannelNumbers
         self.streamChannelOptions = ChannelOptions
+        self.streamCalibrationTables = dict()
         self.streamConfiged = True
         
         if InternalStreamClockFrequency == 1:
@@ -686,36 +743,79 @@ class U6(Device):
         if numBytes is None:
             numBytes = 14 + (self.streamSamplesPerPacket * 2)
         
-        returnDict = collections.defaultdict(list)
+        if numpy is not None:
+            return self._streamArraysToLists(self.processStreamDataArrays(result, numBytes))
         
-        j = self.streamPacketOffset
-        for packet in self.breakupPackets(result, numBytes):
-            for sample in self.samplesFromPacket(packet):
-                if j >= len(self.streamChannelNumbers):
-                    j = 0
-                
-                if self.streamChannelNumbers[j] in (193, 194):
-                    value = struct.unpack('<BB', sample )
-                elif self.streamChannelNumbers[j] >= 200:
-                    value = struct.unpack('<H', sample )[0]
-                else:
-                    if (self.streamChannelOptions[j] >> 7) == 1:
-                        # do signed
-                        value = struct.unpack('<H', sample )[0]
-                    else:
-                        # do unsigned
-                        value = struct.unpack('<H', sample )[0]
-                    
-                    gainIndex = (self.streamChannelOptions[j] >> 4) & 0x3
-                    value = self.binaryToCalibratedAnalogVoltage(gainIndex, value, is16Bits = True, resolutionIndex = 0)
-                
-                returnDict["AIN%s" % self.streamChannelNumbers[j]].append(value)
-                
-                j += 1
-            
-            self.streamPacketOffset = j
-
-        return returnDict
+        return self._dealStreamSampleLists(self._unpackStreamSamples(result, numBytes), self._convertStreamSampleList)
+    
+    def processStreamDataArrays(self, result, numBytes = None):
+        """
+        Name: U6.processStreamDataArrays(result, numBytes = None)
+        Args: result, the string returned from streamData()
+              numBytes, the number of bytes per packet
+        Desc: Does what processStreamData() does, but with NumPy, and
+              returns an array for each channel instead of a list. The
+              block is viewed as a row per packet, the headers and footers
+              are sliced off, and the samples are dealt out to the channels
+              by slicing too. Each channel is calibrated by looking its codes
+              up in the table for its gain. The readings are the same as
+              processStreamData()'s, bit for bit.
+              
+              Analog readings are float64 arrays. Channels 200 and up are
+              uint16 arrays, and channels 193 and 194 have a row of two
+              bytes per reading.
+        
+        >>> reading = d.streamData(convert = False).next()
+        >>> d.processStreamDataArrays(reading['result'])
+        {'AIN0' : array([ 3.123, 3.231, 3.232, ...])}
+        """
+        if numpy is None:
+            raise LabJackException("processStreamDataArrays() needs NumPy.")
+        
+        if numBytes is None:
+            numBytes = 14 + (self.streamSamplesPerPacket * 2)
+        
+        return self._dealStreamSamples(self._streamSampleArray(result, numBytes), self._convertStreamSamples)
+    
+    def _convertStreamSamples(self, j, values):
+        """
+        Converts the samples from position j of the scan list.
+        """
+        channel = self.streamChannelNumbers[j]
+        if channel in (193, 194):
+            return values.view(numpy.uint8).reshape(-1, 2)
+        elif channel >= 200:
+            return values
+        
+        return self._streamCalibrationTable(j)[values]
+    
+    def _convertStreamSampleList(self, j, values):
+        """
+        Converts the samples from position j of the scan list, a sequence
+        of ints, to a list without NumPy.
+        """
+        channel = self.streamChannelNumbers[j]
+        if channel in (193, 194):
+            return [ (value & 0xff, value >> 8) for value in values ]
+        elif channel >= 200:
+            return list(values)
+        
+        return map(self._streamCalibrationTable(j).__getitem__, values)
+    
+    def _streamCalibrationKey(self, j):
+        """
+        Returns what the calibration of position j of the scan list
+        depends on, its gain index.
+        """
+        return (self.streamChannelOptions[j] >> 4) & 0x3
+    
+    def _calibrateStreamSamples(self, j, values):
+        """
+        Calibrates ints read from analog position j of the scan list one
+        at a time, like binaryToCalibratedAnalogVoltage() does.
+        """
+        center, negSlope, posSlope = self._ainCalibration(self._streamCalibrationKey(j), 0)
+        return [ (center - value) * negSlope if value < center else (value - center) * posSlope for value in values ]
         
     def watchdog(self, Write = False, ResetOnTimeout = False, SetDIOStateOnTimeout = False, TimeoutPeriod = 60, DIOState = 0, DIONumber = 0):
         """
@@ -1186,6 +1286,8 @@ class U6(Device):
             
             self.calInfo.proAinNegSlope = [self.calInfo.proAin10vNegSlope, self.calInfo.proAin1vNegSlope, self.calInfo.proAin100mvNegSlope, self.calInfo.proAin10mvNegSlope]
             self.calInfo.proAinCenter = [self.calInfo.proAin10vCenter, self.calInfo.proAin1vCenter, self.calInfo.proAin100mvCenter, self.calInfo.proAin10mvCenter]
+        
+        self.streamCalibrationTables = dict()
 
     def binaryToCalibratedAnalogVoltage(self, gainIndex, bytesVoltage, is16Bits=False, resolutionIndex=0):
         """
@@ -1203,22 +1305,83 @@ class U6(Device):
         else:
             bits = float(bytesVoltage)
 
-        if self.deviceName.endswith("Pro") and (resolutionIndex > 8 or resolutionIndex == 0):
-            #Use hi-res calibration constants
-            center = self.calInfo.proAinCenter[gainIndex]
-            negSlope = self.calInfo.proAinNegSlope[gainIndex]
-            posSlope = self.calInfo.proAinSlope[gainIndex]
-        else:
-            #Use normal calibration constants
-            center = self.calInfo.ainCenter[gainIndex]
-            negSlope = self.calInfo.ainNegSlope[gainIndex]
-            posSlope = self.calInfo.ainSlope[gainIndex]
+        center, negSlope, posSlope = self._ainCalibration(gainIndex, resolutionIndex)
 
         if bits < center:
             return (center - bits) * negSlope
         else:
             return (bits - center) * posSlope
 
+    def binaryToCalibratedAnalogVoltages(self, bytesVoltages, gainIndexes=0, resolutionIndexes=0, is16Bits=False):
+        """
+        Name: U6.binaryToCalibratedAnalogVoltages(bytesVoltages,
+                                                  gainIndexes = 0,
+                                                  resolutionIndexes = 0,
+                                                  is16Bits = False)
+        Args: bytesVoltages, a sequence or array of readings from the U6
+              gainIndexes, the gain index of each reading, or one gain
+                           index for all of them
+              resolutionIndexes, the resolution index of each reading, or
+                                 one for all of them
+              is16Bits, set to True if the readings are 16 bits (not 24)
+        Desc: Converts many binary voltages to analog values at once, the
+              same as binaryToCalibratedAnalogVoltage() does one at a time,
+              hi-res constants on a U6-Pro included. With NumPy, the
+              readings are converted in one vectorized pass and an array
+              is returned. Without it, a list is returned.
+        
+        >>> results = myU6.getFeedback(*[ u6.AIN24AR(i, GainIndex = 15) for i in range(14) ])
+        >>> myU6.binaryToCalibratedAnalogVoltages([ r['AIN'] for r in results ], [ r['GainIndex'] for r in results ])
+        array([ 0.0216..., 1.5102..., ... ])
+        """
+        # Row 0 has the normal constants, and row 1 the ones for resolution
+        # index 0 and 9-12, which are the hi-res ones on a U6-Pro.
+        tables = [ [ self._ainCalibration(gain, resolution) for gain in range(len(self.calInfo.ainSlope)) ] for resolution in (1, 0) ]
+        
+        if numpy is None:
+            numReadings = len(bytesVoltages)
+            if isinstance(gainIndexes, (int, long)):
+                gainIndexes = [ gainIndexes ] * numReadings
+            if isinstance(resolutionIndexes, (int, long)):
+                resolutionIndexes = [ resolutionIndexes ] * numReadings
+            
+            voltages = []
+            for bytesVoltage, gainIndex, resolutionIndex in zip(bytesVoltages, gainIndexes, resolutionIndexes):
+                if not is16Bits:
+                    bits = float(bytesVoltage)/256
+                else:
+                    bits = float(bytesVoltage)
+                
+                center, negSlope, posSlope = tables[resolutionIndex > 8 or resolutionIndex == 0][gainIndex]
+                if bits < center:
+                    voltages.append((center - bits) * negSlope)
+                else:
+                    voltages.append((bits - center) * posSlope)
+            return voltages
+        
+        bits = numpy.asarray(bytesVoltages, dtype = numpy.float64)
+        if not is16Bits:
+            bits = bits/256
+        bits, gainIndexes, resolutionIndexes = numpy.broadcast_arrays(bits, numpy.asarray(gainIndexes, dtype = numpy.intp), numpy.asarray(resolutionIndexes))
+        
+        hiRes = ((resolutionIndexes > 8) | (resolutionIndexes == 0)).astype(numpy.intp)
+        constants = numpy.array(tables)[hiRes, gainIndexes]
+        center = constants[..., 0]
+        
+        return numpy.where(bits < center, (center - bits) * constants[..., 1], (bits - center) * constants[..., 2])
+
+    def _ainCalibration(self, gainIndex, resolutionIndex):
+        """
+        Returns the (center, negSlope, posSlope) calibration constants for
+        a reading at gainIndex and resolutionIndex.
+        """
+        if self.deviceName.endswith("Pro") and (resolutionIndex > 8 or resolutionIndex == 0):
+            #Use hi-res calibration constants
+            return self.calInfo.proAinCenter[gainIndex], self.calInfo.proAinNegSlope[gainIndex], self.calInfo.proAinSlope[gainIndex]
+        else:
+            #Use normal calibration constants
+            return self.calInfo.ainCenter[gainIndex], self.calInfo.ainNegSlope[gainIndex], self.calInfo.ainSlope[gainIndex]
+
     def binaryToCalibratedAnalogTemperature(self, bytesTemperature, is16Bits=False):
         """
         Name: U6.binaryToCalibratedAnalogTemperature(bytesTemperature, is16Bits = False)
@@ -1244,6 +1407,12 @@ class U6(Device):
         
         return int(bits)
 
+    def _dac16Command(self, dacNumber, bits):
+        """
+        The DAC16 command for WaveformPlayer to build its packets with.
+        """
+        return DAC16(dacNumber, bits)
+
     def softReset(self):
         """
         Name: U6.softReset()
@@ -1391,6 +1560,35 @@ class U6(Device):
         
         return self.binaryToCalibratedAnalogVoltage(result[0]['GainIndex'], result[0]['AIN'], resolutionIndex = resolutionIndex)
 
+    def prepareAIN(self, positiveChannel, resolutionIndex=0, gainIndex=0, settlingFactor=0, differential=False):
+        """
+        Name: U6.prepareAIN(positiveChannel, resolutionIndex = 0,
+                            gainIndex = 0, settlingFactor = 0,
+                            differential = False)
+        Args: The same as getAIN()
+        Desc: Returns a PreparedRead whose read() does what getAIN() does,
+              but with the packet built and the calibration constants for
+              every gain looked up ahead of time. Prepare again after
+              getCalibrationData() to pick up new constants.
+        
+        >>> reader = myU6.prepareAIN(14)
+        >>> reader.read()
+        299.87723471224308
+        """
+        program = self.compileFeedback(AIN24AR(positiveChannel, resolutionIndex, gainIndex, settlingFactor, differential))
+        constants = [ self._ainCalibration(gain, resolutionIndex) for gain in range(len(self.calInfo.ainSlope)) ]
+        
+        def decode(rcvBuffer):
+            program._checkResponse(rcvBuffer, 0)
+            bits = float((rcvBuffer[11] << 16) + (rcvBuffer[10] << 8) + rcvBuffer[9])/256
+            center, negSlope, posSlope = constants[(rcvBuffer[12] >> 4) & 0xf]
+            if bits < center:
+                return (center - bits) * negSlope
+            else:
+                return (bits - center) * posSlope
+        
+        return PreparedRead(self, program.packet(), program.packets[0][1], decode)
+
     def readDefaultsConfig(self):
         """
         Name: U6.readDefaultsConfig()
@@ -1615,13 +1813,18 @@ class U6(Device):
                     
                     self.getFeedback( TimerConfig(i, mode, value) )
 
-class FeedbackCommand(object):
+class FeedbackCommand(FeedbackCommandBase):
     '''
     The base FeedbackCommand class
     
     Used to make Feedback easy. Make a list of these
     and call getFeedback.
+    
+    Commands made with the same arguments are the same shared instance
+    (see FeedbackCommandType), so they are immutable: setting an attribute
+    raises AttributeError, and cmdBytes returns a new list every time.
     '''
+    __slots__ = ()
     readLen = 0
     def handle(self, input):
         return None
@@ -1643,12 +1846,13 @@ class AIN(FeedbackCommand):
     >>> d.getFeedback( u6.AIN( PositiveChannel ) )
     [ 19238 ]
     '''
+    __slots__ = ( 'positiveChannel', )
     def __init__(self, PositiveChannel):
         if PositiveChannel not in validChannels:
             raise LabJackException("Invalid Positive Channel specified")
         
         self.positiveChannel = PositiveChannel
-        self.cmdBytes = [ 0x01, PositiveChannel, 0 ]
+        self.cmdBytes = ( 0x01, PositiveChannel, 0 )
 
     readLen =  2
     
@@ -1687,6 +1891,7 @@ class AIN24(FeedbackCommand):
                                 Differential = False ) )
     [ 193847 ]
     '''
+    __slots__ = ( 'positiveChannel', 'resolutionIndex', 'gainIndex', 'settlingFactor', 'differential' )
     def __init__(self, PositiveChannel, ResolutionIndex = 0, GainIndex = 0, SettlingFactor = 0, Differential = False):
         if PositiveChannel not in validChannels:
             raise LabJackException("Invalid Positive Channel specified")
@@ -1701,7 +1906,7 @@ class AIN24(FeedbackCommand):
         byte2 = ( ( GainIndex & 0xf ) << 4 ) + byte2
         
         byte3 = (int(Differential) << 7) + SettlingFactor
-        self.cmdBytes = [ 0x02, PositiveChannel, byte2, byte3 ]
+        self.cmdBytes = ( 0x02, PositiveChannel, byte2, byte3 )
 
     def __repr__(self):
         return "<u6.AIN24( PositiveChannel = %s, ResolutionIndex = %s, GainIndex = %s, SettlingFactor = %s, Differential = %s )>" % (self.positiveChannel, self.resolutionIndex, self.gainIndex, self.settlingFactor, self.differential)
@@ -1744,6 +1949,7 @@ class AIN24AR(FeedbackCommand):
                                    Differential = False ) )
     { 'AIN' : 193847, 'ResolutionIndex' : 0, 'GainIndex' : 0, 'Status' : 0 }
     '''
+    __slots__ = ( 'positiveChannel', 'resolutionIndex', 'gainIndex', 'settlingFactor', 'differential' )
     def __init__(self, PositiveChannel, ResolutionIndex = 0, GainIndex = 0, SettlingFactor = 0, Differential = False):
         if PositiveChannel not in validChannels:
             raise LabJackException("Invalid Positive Channel specified")
@@ -1758,7 +1964,7 @@ class AIN24AR(FeedbackCommand):
         byte2 = ( ( GainIndex & 0xf ) << 4 ) + byte2
         
         byte3 = (int(Differential) << 7) + SettlingFactor
-        self.cmdBytes = [ 0x03, PositiveChannel, byte2, byte3 ]
+        self.cmdBytes = ( 0x03, PositiveChannel, byte2, byte3 )
 
     def __repr__(self):
         return "<u6.AIN24AR( PositiveChannel = %s, ResolutionIndex = %s, GainIndex = %s, SettlingFactor = %s, Differential = %s )>" % (self.positiveChannel, self.resolutionIndex, self.gainIndex, self.settlingFactor, self.differential)
@@ -1783,9 +1989,10 @@ class WaitShort(FeedbackCommand):
     >>> d.getFeedback( u6.WaitShort( Time ) )
     [ None ]
     '''
+    __slots__ = ( 'time', )
     def __init__(self, Time):
         self.time = Time % 256
-        self.cmdBytes = [ 5, Time % 256 ]
+        self.cmdBytes = ( 5, Time % 256 )
         
     def __repr__(self):
         return "<u6.WaitShort( Time = %s )>" % self.time
@@ -1799,9 +2006,10 @@ class WaitLong(FeedbackCommand):
     >>> d.getFeedback( u6.WaitLog( Time ) )
     [ None ]
     '''
+    __slots__ = ( 'time', )
     def __init__(self, Time):
         self.time = Time
-        self.cmdBytes = [ 6, Time % 256 ]
+        self.cmdBytes = ( 6, Time % 256 )
 
     def __repr__(self):
         return "<u6.WaitLog( Time = %s )>" % self.time
@@ -1817,9 +2025,10 @@ class LED(FeedbackCommand):
     >>> d.getFeedback( u6.LED( State ) )
     [ None ]
     '''
+    __slots__ = ( 'state', )
     def __init__(self, State):
         self.state = State
-        self.cmdBytes = [ 9, int(bool(State)) ]
+        self.cmdBytes = ( 9, int(bool(State)) )
         
     def __repr__(self):
         return "<u6.LED( State = %s )>" % self.state
@@ -1837,9 +2046,10 @@ class BitStateRead(FeedbackCommand):
     >>> d.getFeedback( u6.BitStateRead( IONumber ) )
     [ 1 ]
     '''
+    __slots__ = ( 'ioNumber', )
     def __init__(self, IONumber):
         self.ioNumber = IONumber
-        self.cmdBytes = [ 10, IONumber % 20 ]
+        self.cmdBytes = ( 10, IONumber % 20 )
 
     def __repr__(self):
         return "<u6.BitStateRead( IONumber = %s )>" % self.ioNumber
@@ -1862,10 +2072,11 @@ class BitStateWrite(FeedbackCommand):
     >>> d.getFeedback( u6.BitStateWrite( IONumber, State ) )
     [ None ]
     '''
+    __slots__ = ( 'ioNumber', 'state' )
     def __init__(self, IONumber, State):
         self.ioNumber = IONumber
         self.state = State
-        self.cmdBytes = [ 11, (IONumber % 20) + (int(bool(State)) << 7) ]
+        self.cmdBytes = ( 11, (IONumber % 20) + (int(bool(State)) << 7) )
     
     def __repr__(self):
         return "<u6.BitStateWrite( IONumber = %s, State = %s )>" % self.ioNumber
@@ -1880,9 +2091,10 @@ class BitDirRead(FeedbackCommand):
     >>> d.getFeedback( u6.BitDirRead( IONumber ) )
     [ 1 ]
     '''
+    __slots__ = ( 'ioNumber', )
     def __init__(self, IONumber):
         self.ioNumber = IONumber
-        self.cmdBytes = [ 12, IONumber % 20 ]
+        self.cmdBytes = ( 12, IONumber % 20 )
 
     def __repr__(self):
         return "<u6.BitDirRead( IONumber = %s )>" % self.ioNumber
@@ -1904,10 +2116,11 @@ class BitDirWrite(FeedbackCommand):
     >>> d.getFeedback( u6.BitDirWrite( IONumber, Direction ) )
     [ None ] 
     '''
+    __slots__ = ( 'ioNumber', 'direction' )
     def __init__(self, IONumber, Direction):
         self.ioNumber = IONumber
         self.direction = Direction
-        self.cmdBytes = [ 13, (IONumber % 20) + (int(bool(Direction)) << 7) ]
+        self.cmdBytes = ( 13, (IONumber % 20) + (int(bool(Direction)) << 7) )
         
     def __repr__(self):
         return "<u6.BitDirWrite( IONumber = %s, Direction = %s )>" % (self.ioNumber, self.direction)
@@ -1921,8 +2134,9 @@ class PortStateRead(FeedbackCommand):
     >>> d.getFeedback( u6.PortStateRead() )
     [ { 'FIO' : 10, 'EIO' : 0, 'CIO' : 0 } ]
     """
+    __slots__ = ()
     def __init__(self):
-        self.cmdBytes = [ 26 ]
+        self.cmdBytes = ( 26, )
         
     def __repr__(self):
         return "<u6.PortStateRead()>"
@@ -1944,10 +2158,11 @@ class PortStateWrite(FeedbackCommand):
                                           WriteMask = [ 0xff, 0xff, 0xff] ) )
     [ None ]
     """
+    __slots__ = ( 'state', 'writeMask' )
     def __init__(self, State, WriteMask = [ 0xff, 0xff, 0xff]):
         self.state = State
         self.writeMask = WriteMask
-        self.cmdBytes = [ 27 ] + WriteMask + State
+        self.cmdBytes = ( 27, ) + tuple(WriteMask) + tuple(State)
         
     def __repr__(self):
         return "<u6.PortStateWrite( State = %s, WriteMask = %s )>" % (self.state, self.writeMask)
@@ -1960,8 +2175,9 @@ class PortDirRead(FeedbackCommand):
     >>> d.getFeedback( u6.PortDirRead() )
     [ { 'FIO' : 10, 'EIO' : 0, 'CIO' : 0 } ]
     """
+    __slots__ = ()
     def __init__(self):
-        self.cmdBytes = [ 28 ]
+        self.cmdBytes = ( 28, )
     
     def __repr__(self):
         return "<u6.PortDirRead()>"
@@ -1982,10 +2198,11 @@ class PortDirWrite(FeedbackCommand):
                                         WriteMask = [ 0xff, 0xff, 0xff] ) )
     [ None ]
     """
+    __slots__ = ( 'direction', 'writeMask' )
     def __init__(self, Direction, WriteMask = [ 0xff, 0xff, 0xff]):
         self.direction = Direction
         self.writeMask = WriteMask
-        self.cmdBytes = [ 29 ] + WriteMask + Direction
+        self.cmdBytes = ( 29, ) + tuple(WriteMask) + tuple(Direction)
         
     def __repr__(self):
         return "<u6.PortDirWrite( Direction = %s, WriteMask = %s )>" % (self.direction, self.writeMask)
@@ -2002,10 +2219,11 @@ class DAC8(FeedbackCommand):
     >>> d.getFeedback( u6.DAC8( Dac, Value ) )
     [ None ]
     '''
+    __slots__ = ( 'dac', 'value' )
     def __init__(self, Dac, Value):
         self.dac = Dac
         self.value = Value % 256
-        self.cmdBytes = [ 34 + (Dac % 2), Value % 256 ]
+        self.cmdBytes = ( 34 + (Dac % 2), Value % 256 )
     
     def __repr__(self):
         return "<u6.DAC8( Dac = %s, Value = %s )>" % (self.dac, self.value)
@@ -2021,6 +2239,7 @@ class DAC0_8(DAC8):
     >>> d.getFeedback( u6.DAC0_8( Value ) )
     [ None ]
     """
+    __slots__ = ()
     def __init__(self, Value):
         DAC8.__init__(self, 0, Value)
 
@@ -2038,6 +2257,7 @@ class DAC1_8(DAC8):
     >>> d.getFeedback( u6.DAC1_8( Value ) )
     [ None ]
     """
+    __slots__ = ()
     def __init__(self, Value):
         DAC8.__init__(self, 1, Value)
     
@@ -2056,10 +2276,11 @@ class DAC16(FeedbackCommand):
     >>> d.getFeedback( u6.DAC16( Dac, Value ) )
     [ None ]
     '''
+    __slots__ = ( 'dac', 'value' )
     def __init__(self, Dac, Value):
         self.dac = Dac
         self.value = Value
-        self.cmdBytes = [ 38 + (Dac % 2), Value % 256, Value >> 8 ]
+        self.cmdBytes = ( 38 + (Dac % 2), Value % 256, Value >> 8 )
     
     def __repr__(self):
         return "<u6.DAC8( Dac = %s, Value = %s )>" % (self.dac, self.value)
@@ -2075,6 +2296,7 @@ class DAC0_16(DAC16):
     >>> d.getFeedback( u6.DAC0_16( Value ) )
     [ None ]
     """
+    __slots__ = ()
     def __init__(self, Value):
         DAC16.__init__(self, 0, Value)
     
@@ -2092,6 +2314,7 @@ class DAC1_16(DAC16):
     >>> d.getFeedback( u6.DAC1_16( Value ) )
     [ None ]
     """
+    __slots__ = ()
     def __init__(self, Value):
         DAC16.__init__(self, 1, Value)
         
@@ -2122,6 +2345,7 @@ class Timer(FeedbackCommand):
     ... , Mode = None ) )
     [ 12314 ]
     """
+    __slots__ = ( 'timer', 'updateReset', 'value', 'mode' )
     def __init__(self, timer, UpdateReset = False, Value=0, Mode = None):
         if timer not in range(4):
             raise LabJackException("Timer should be 0-3.")
@@ -2133,7 +2357,7 @@ class Timer(FeedbackCommand):
         self.value = Value
         self.mode = Mode
         
-        self.cmdBytes = [ (42 + (2*timer)), UpdateReset, Value % 256, Value >> 8 ]
+        self.cmdBytes = ( (42 + (2*timer)), UpdateReset, Value % 256, Value >> 8 )
     
     readLen = 4
     
@@ -2168,6 +2392,7 @@ class Timer0(Timer):
     ... Mode = None ) )
     [ 12314 ]
     """
+    __slots__ = ()
     def __init__(self, UpdateReset = False, Value = 0, Mode = None):
         Timer.__init__(self, 0, UpdateReset, Value, Mode)
         
@@ -2192,6 +2417,7 @@ class Timer1(Timer):
     ... Mode = None ) )
     [ 12314 ]
     """
+    __slots__ = ()
     def __init__(self, UpdateReset = False, Value = 0, Mode = None):
         Timer.__init__(self, 1, UpdateReset, Value, Mode)
     
@@ -2216,6 +2442,7 @@ class Timer2(Timer):
     ... Mode = None ) )
     [ 12314 ]
     """
+    __slots__ = ()
     def __init__(self, UpdateReset = False, Value = 0, Mode = None):
         Timer.__init__(self, 2, UpdateReset, Value, Mode)
     
@@ -2240,6 +2467,7 @@ class Timer3(Timer):
     ... Mode = None ) )
     [ 12314 ]
     """
+    __slots__ = ()
     def __init__(self, UpdateReset = False, Value = 0, Mode = None):
         Timer.__init__(self, 3, UpdateReset, Value, Mode)
     
@@ -2266,6 +2494,7 @@ class QuadratureInputTimer(Timer):
     >>> d.getFeedback( u6.QuadratureInputTimer() )
     [-21]
     """
+    __slots__ = ()
     def __init__(self, UpdateReset = False, Value = 0):
         Timer.__init__(self, 0, UpdateReset, Value, Mode = 8)
         
@@ -2293,6 +2522,7 @@ class TimerStopInput1(Timer1):
     >>> d.getFeedback( u6.TimerStopInput1() )
     [(0, 30)]
     """
+    __slots__ = ()
     def __init__(self, UpdateReset = False, Value = 0):
         Timer.__init__(self, 1, UpdateReset, Value, Mode = 9)
     
@@ -2312,6 +2542,7 @@ class TimerConfig(FeedbackCommand):
     >>> d.getFeedback( u6.TimerConfig( timer, TimerMode, Value = 0 ) )
     [ None ]
     """
+    __slots__ = ( 'timer', 'timerMode', 'value' )
     def __init__(self, timer, TimerMode, Value=0):
         '''Creates command bytes for configuring a Timer'''
         if timer not in range(4):
@@ -2324,7 +2555,7 @@ class TimerConfig(FeedbackCommand):
         self.timerMode = TimerMode
         self.value = Value
         
-        self.cmdBytes = [43 + (timer * 2), TimerMode, Value % 256, Value >> 8]
+        self.cmdBytes = ( 43 + (timer * 2), TimerMode, Value % 256, Value >> 8 )
     
     def __repr__(self):
         return "<u6.TimerConfig( timer = %s, TimerMode = %s, Value = %s )>" % (self.timer, self.timerMode, self.value)
@@ -2340,6 +2571,7 @@ class Timer0Config(TimerConfig):
     >>> d.getFeedback( u6.Timer0Config( TimerMode, Value = 0 ) )
     [ None ]
     """
+    __slots__ = ()
     def __init__(self, TimerMode, Value = 0):
         TimerConfig.__init__(self, 0, TimerMode, Value)
     
@@ -2357,6 +2589,7 @@ class Timer1Config(TimerConfig):
     >>> d.getFeedback( u6.Timer1Config( TimerMode, Value = 0 ) )
     [ None ]
     """
+    __slots__ = ()
     def __init__(self, TimerMode, Value = 0):
         TimerConfig.__init__(self, 1, TimerMode, Value)
     
@@ -2374,6 +2607,7 @@ class Timer2Config(TimerConfig):
     >>> d.getFeedback( u6.Timer2Config( TimerMode, Value = 0 ) )
     [ None ]
     """
+    __slots__ = ()
     def __init__(self, TimerMode, Value = 0):
         TimerConfig.__init__(self, 2, TimerMode, Value)
     
@@ -2391,6 +2625,7 @@ class Timer3Config(TimerConfig):
     >>> d.getFeedback( u6.Timer3Config( TimerMode, Value = 0 ) )
     [ None ]
     """
+    __slots__ = ()
     def __init__(self, TimerMode, Value = 0):
         TimerConfig.__init__(self, 3, TimerMode, Value)
     
@@ -2412,10 +2647,11 @@ class Counter(FeedbackCommand):
     >>> d.getFeedback( u6.Counter( counter, Reset = False ) )
     [ 2183 ]
     '''
+    __slots__ = ( 'counter', 'reset' )
     def __init__(self, counter, Reset):
         self.counter = counter
         self.reset = Reset
-        self.cmdBytes = [ 54 + (counter % 2), int(bool(Reset))]
+        self.cmdBytes = ( 54 + (counter % 2), int(bool(Reset)) )
 
     def __repr__(self):
         return "<u6.Counter( counter = %s, Reset = %s )>" % (self.counter, self.reset)
@@ -2440,6 +2676,7 @@ class Counter0(Counter):
     >>> d.getFeedback( u6.Counter0( Reset = False ) )
     [ 2183 ]
     '''
+    __slots__ = ()
     def __init__(self, Reset = False):
         Counter.__init__(self, 0, Reset)
     
@@ -2460,6 +2697,7 @@ class Counter1(Counter):
     >>> d.getFeedback( u6.Counter1( Reset = False ) )
     [ 2183 ]
     '''
+    __slots__ = ()
     def __init__(self, Reset = False):
         Counter.__init__(self, 1, Reset)
     
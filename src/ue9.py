@@ -11,8 +11,12 @@ http://labjack.com/support/ue9/users-guide/5.2
 """
 from LabJackPython import *
 
-import struct, socket, select, ConfigParser
-from datetime import datetime
+import struct, socket, select, time, ConfigParser
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 def openAllUE9():
     """
@@ -67,9 +71,9 @@ class UE9(Device):
         if autoOpen:
             self.open(**kargs)
     
-    def open(self, firstFound = True, serial = None, ipAddress = None, localId = None, devNumber = None, ethernet=False, handleOnly = False, LJSocket = None):
+    def open(self, firstFound = True, serial = None, ipAddress = None, localId = None, devNumber = None, ethernet=False, handleOnly = False, LJSocket = None, transport = None):
         """
-        Name: UE9.open(firstFound = True, ipAddress = None, localId = None, devNumber = None, ethernet=False)
+        Name: UE9.open(firstFound = True, ipAddress = None, localId = None, devNumber = None, ethernet=False, transport = None)
         Args: firstFound, Open the first found UE9
               serial, open a UE9 with the given serial number.
               ipAddress, Specify the IP Address of the UE9 you want to open
@@ -78,13 +82,15 @@ class UE9(Device):
               ethernet, set to true to connect over ethernet.
               handleOnly, if True, LabJackPython will only open a handle
               LJSocket, set to "<ip>:<port>" to connect to LJSocket
+              transport, a Transport to talk through instead of opening
+                         hardware, such as emulator.EmulatedUE9()
         Desc: Opens the UE9.
         
         >>> myUe9 = ue9.UE9(autoOpen = False)
         >>> myUe9.open()
         """
         self.ethernet = ethernet
-        Device.open(self, 9, Ethernet = ethernet, firstFound = firstFound, serial = serial, localId = localId, devNumber = devNumber, ipAddress = ipAddress, handleOnly = handleOnly, LJSocket = LJSocket)
+        Device.open(self, 9, Ethernet = ethernet, firstFound = firstFound, serial = serial, localId = localId, devNumber = devNumber, ipAddress = ipAddress, handleOnly = handleOnly, LJSocket = LJSocket, transport = transport)
         
     def commConfig(self, LocalID = None, IPAddress = None, Gateway = None, Subnet = None, PortA = None, PortB = None, DHCPEnabled = None):
         """
@@ -371,6 +377,13 @@ class UE9(Device):
          'PowerLevel': 0,
          'ResetSource': 119}
         """
+        command = self._buildControlConfigCommand(PowerLevel, FIODir, FIOState, EIODir, EIOState, CIODirection, CIOState, MIODirection, MIOState, DoNotLoadDigitalIODefaults, DAC0Enable, DAC0, DAC1Enable, DAC1)
+        
+        result = self._writeRead(command, 24, [ 0xF8, 0x09, 0x08 ])
+        
+        return self._parseControlConfigResult(result)
+    
+    def _buildControlConfigCommand(self, PowerLevel = None, FIODir = None, FIOState = None, EIODir = None, EIOState = None, CIODirection = None, CIOState = None, MIODirection = None, MIOState = None, DoNotLoadDigitalIODefaults = None, DAC0Enable = None, DAC0 = None, DAC1Enable = None, DAC1 = None):
         command = [ 0 ] * 18
         
         #command[0] = Checksum8
@@ -442,8 +455,9 @@ class UE9(Device):
             command[16] = DAC1 & 0xff
             command[17] |= (DAC1 >> 8 ) & 0xf
         
-        result = self._writeRead(command, 24, [ 0xF8, 0x09, 0x08 ])
-        
+        return command
+    
+    def _parseControlConfigResult(self, result):
         self.powerLevel = result[7]
         self.controlFWVersion = "%s.%02d" % (result[10], result[9])
         self.firmwareVersion = [self.controlFWVersion, self.commFWVersion]
@@ -455,7 +469,7 @@ class UE9(Device):
             self.deviceName = 'UE9-Pro'
         
         return { 'PowerLevel' : self.powerLevel, 'ResetSource' : result[8], 'ControlFWVersion' : self.controlFWVersion, 'ControlBLVersion' : self.controlBLVersion, 'HiRes Flag' : self.hiRes, 'FIODir' : result[14], 'FIOState' : result[15], 'EIODir' : result[16], 'EIOState' : result[17], 'CIODirection' : (result[18] >> 4) & 0xf, 'CIOState' : result[18] & 0xf, 'MIODirection' : (result[19] >> 4) & 7, 'MIOState' : result[19] & 7, 'DAC0 Enabled' : bool(result[21] >> 7 & 1), 'DAC0' : (result[21] & 0xf) + result[20], 'DAC1 Enabled' : bool(result[23] >> 7 & 1), 'DAC1' : (result[23] & 0xf) + result[22], 'DeviceName' : self.deviceName }
-        
+
     def feedback(self, FIOMask = 0, FIODir = 0, FIOState = 0, EIOMask = 0, EIODir = 0, EIOState = 0, CIOMask = 0, CIODirection = 0, CIOState = 0, MIOMask = 0, MIODirection = 0, MIOState = 0, DAC0Update = False, DAC0Enabled = False, DAC0 = 0, DAC1Update = False, DAC1Enabled = False, DAC1 = 0, AINMask = 0, AIN14ChannelNumber = 0, AIN15ChannelNumber = 0, Resolution = 0, SettlingTime = 0, AIN1_0_BipGain = 0, AIN3_2_BipGain = 0, AIN5_4_BipGain  = 0, AIN7_6_BipGain = 0, AIN9_8_BipGain = 0, AIN11_10_BipGain = 0, AIN13_12_BipGain = 0, AIN15_14_BipGain = 0):
         """
         Name: UE9.feedback(FIOMask = 0, FIODir = 0, FIOState = 0,
@@ -478,6 +492,13 @@ class UE9(Device):
          'TimerB': 0,
          'TimerC': 0}
         """
+        command = self._buildFeedbackCommand(FIOMask, FIODir, FIOState, EIOMask, EIODir, EIOState, CIOMask, CIODirection, CIOState, MIOMask, MIODirection, MIOState, DAC0Update, DAC0Enabled, DAC0, DAC1Update, DAC1Enabled, DAC1, AINMask, AIN14ChannelNumber, AIN15ChannelNumber, Resolution, SettlingTime, AIN1_0_BipGain, AIN3_2_BipGain, AIN5_4_BipGain, AIN7_6_BipGain, AIN9_8_BipGain, AIN11_10_BipGain, AIN13_12_BipGain, AIN15_14_BipGain)
+        
+        result = self._writeRead(command, 64, [ 0xF8, 0x1D, 0x00], checkBytes = False)
+        
+        return self._parseFeedbackResult(result, command)
+    
+    def _buildFeedbackCommand(self, FIOMask = 0, FIODir = 0, FIOState = 0, EIOMask = 0, EIODir = 0, EIOState = 0, CIOMask = 0, CIODirection = 0, CIOState = 0, MIOMask = 0, MIODirection = 0, MIOState = 0, DAC0Update = False, DAC0Enabled = False, DAC0 = 0, DAC1Update = False, DAC1Enabled = False, DAC1 = 0, AINMask = 0, AIN14ChannelNumber = 0, AIN15ChannelNumber = 0, Resolution = 0, SettlingTime = 0, AIN1_0_BipGain = 0, AIN3_2_BipGain = 0, AIN5_4_BipGain  = 0, AIN7_6_BipGain = 0, AIN9_8_BipGain = 0, AIN11_10_BipGain = 0, AIN13_12_BipGain = 0, AIN15_14_BipGain = 0):
         command = [ 0 ] * 34
         
         #command[0] = Checksum8
@@ -530,8 +551,9 @@ class UE9(Device):
         command[32] = AIN13_12_BipGain
         command[33] = AIN15_14_BipGain
         
-        result = self._writeRead(command, 64, [ 0xF8, 0x1D, 0x00], checkBytes = False)
-        
+        return command
+    
+    def _parseFeedbackResult(self, result, command):
         returnDict = { 'FIODir' : result[6], 'FIOState' : result[7], 'EIODir' : result[8], 'EIOState' : result[9], 'CIODir' : (result[10] >> 4) & 0xf, 'CIOState' : result[10] & 0xf, 'MIODir' : (result[11] >> 4) & 7, 'MIOState' : result[11] & 7, 'Counter0' : unpackInt(result[44:48]), 'Counter1' : unpackInt(result[48:52]), 'TimerA' : unpackInt(result[52:56]), 'TimerB' : unpackInt(result[56:60]), 'TimerC' : unpackInt(result[60:]) }
         
         """
@@ -564,6 +586,13 @@ class UE9(Device):
         >>> myUe9.singleIO(1, 0, Dir = 1, State = 0)
         {'FIO0 Direction': 1, 'FIO0 State': 0}
         """
+        command = self._buildSingleIOCommand(IOType, Channel, Dir, BipGain, State, Resolution, DAC, SettlingTime)
+        
+        result = self._writeRead(command, 8, [ 0xA3 ], checkBytes = False)
+        
+        return self._parseSingleIOResult(result)
+    
+    def _buildSingleIOCommand(self, IOType, Channel, Dir = None, BipGain = None, State = None, Resolution = None, DAC = 0, SettlingTime = 0):
         command = [ 0 ] * 8
         
         #command[0] = Checksum8
@@ -603,8 +632,9 @@ class UE9(Device):
             command[4] = DAC & 0xff
             command[5] = (DAC >> 8) & 0xf
         
-        result = self._writeRead(command, 8, [ 0xA3 ], checkBytes = False)
-        
+        return command
+    
+    def _parseSingleIOResult(self, result):
         if result[2] == 0:
             #Digital Bit Read
             return { "FIO%s State" % result[3] : result[5], "FIO%s Direction" % result[3] : result[4] }
@@ -671,6 +701,13 @@ class UE9(Device):
         >>> dev.timerCounter()
         {'Counter0Enabled': False, 'Timer5Enabled': False, 'Timer0Enabled': False, 'Timer1': 0, 'Timer4': 0, 'Timer3Enabled': False, 'Timer4Enabled': False, 'Timer5': 0, 'Counter1Enabled': False, 'Timer3': 0, 'Timer2': 0, 'Timer1Enabled': False, 'Timer0': 0, 'Timer2Enabled': False}
         """
+        command = self._buildTimerCounterCommand(TimerClockDivisor, UpdateConfig, NumTimersEnabled, Counter0Enabled, Counter1Enabled, TimerClockBase, ResetTimer0, ResetTimer1, ResetTimer2, ResetTimer3, ResetTimer4, ResetTimer5, ResetCounter0, ResetCounter1, Timer0Mode, Timer0Value, Timer1Mode, Timer1Value, Timer2Mode, Timer2Value, Timer3Mode, Timer3Value, Timer4Mode, Timer4Value, Timer5Mode, Timer5Value)
+        
+        result = self._writeRead(command, 40, [ 0xF8, 0x11, 0x18 ])
+        
+        return self._parseTimerCounterResult(result)
+    
+    def _buildTimerCounterCommand(self, TimerClockDivisor=0, UpdateConfig=False, NumTimersEnabled=0, Counter0Enabled=False, Counter1Enabled=False, TimerClockBase=LJ_tcSYS, ResetTimer0=False, ResetTimer1=False, ResetTimer2=False, ResetTimer3=False, ResetTimer4=False, ResetTimer5=False, ResetCounter0=False, ResetCounter1=False, Timer0Mode=None, Timer0Value=None, Timer1Mode=None, Timer1Value=None, Timer2Mode=None, Timer2Value=None, Timer3Mode=None, Timer3Value=None, Timer4Mode=None, Timer4Value=None, Timer5Mode=None, Timer5Value=None):
         command = [ 0 ] * 30
 
         #command[0] = Checksum8
@@ -742,9 +779,10 @@ class UE9(Device):
             if NumTimersEnabled > 7: raise LabJackException("Only a maximum of 5 timers can be enabled")
             command[28] = 0#command[28] = Counter0Mode
             command[29] = 0#command[29] = Counter1Mode
-
-        result = self._writeRead(command, 40, [ 0xF8, 0x11, 0x18 ])
-
+        
+        return command
+    
+    def _parseTimerCounterResult(self, result):
         # Parse the results
         returnValue = {}
         for i in range(0,6):
@@ -775,6 +813,13 @@ class UE9(Device):
         
         NOTE: Do not call this function while streaming.
         """
+        command = self._buildReadMemCommand(BlockNum)
+        
+        result = self._writeRead(command, 136, [ 0xF8, 0x41, 0x2A ])
+        
+        return self._parseReadMemResult(result)
+    
+    def _buildReadMemCommand(self, BlockNum):
         command = [ 0 ] * 8
         
         #command[0] = Checksum8
@@ -786,9 +831,73 @@ class UE9(Device):
         command[6] = 0x00
         command[7] = BlockNum
         
-        result = self._writeRead(command, 136, [ 0xF8, 0x41, 0x2A ])
-        
+        return command
+    
+    def _parseReadMemResult(self, result):
         return result[8:]
+    
+    def pipeline(self, depth = 8):
+        """
+        Name: UE9.pipeline(depth = 8)
+        Args: depth, how many commands to have written to the UE9 before
+                     waiting for a response
+        Desc: Returns a UE9Pipeline, which writes feedback, singleIO,
+              timerCounter, controlConfig and readMem commands back-to-back
+              instead of waiting out a round trip for each one. Over
+              Ethernet, where the round trip dominates, this gets several
+              times as many commands through.
+        
+        >>> myUE9 = UE9(ethernet = True, ipAddress = "192.168.1.209")
+        >>> with myUE9.pipeline() as p:
+        ...     results = [ p.feedback(AINMask = 1) for i in range(100) ]
+        >>> results[0].result()
+        {'AIN0': 1.4223..., ...}
+        
+        NOTE: Do not call this function while streaming.
+        """
+        return UE9Pipeline(self, depth)
+    
+    def controlLoop(self, inputs, outputs, callback, period):
+        """
+        Name: UE9.controlLoop(inputs, outputs, callback, period)
+        Args: inputs, a dictionary of the feedback() arguments that choose
+                      what to read
+              outputs, a dictionary of the feedback() arguments that set
+                       the outputs
+              callback, called each cycle with the dictionary feedback()
+                        returns. It returns a dictionary of outputs to
+                        change for the next cycle, or None.
+              period, seconds between cycles
+        Desc: Returns a UE9ControlLoop, which sets the outputs and reads the
+              inputs with one Feedback command each cycle.
+        
+        >>> def control(results):
+        ...     return dict(DAC0 = pid.update(results['AIN0']))
+        >>> loop = myUE9.controlLoop(dict(AINMask = 1), dict(DAC0Update = True, DAC0Enabled = True, DAC0 = 0), control, 0.002)
+        >>> loop.run(cycles = 5000)
+        >>> print loop.statistics
+        """
+        return UE9ControlLoop(self, [ inputs ], [ outputs ], callback, period)
+    
+    def waveformPlayer(self, rate, samples = None, function = None, duration = None, dacNumber = 0):
+        """
+        Name: UE9.waveformPlayer(rate, samples = None, function = None,
+                                 duration = None, dacNumber = 0)
+        Args: rate, DAC updates a second
+              samples, the voltages to play, one per update
+              function, instead of samples, a function of the time in
+                        seconds that returns the voltage
+              duration, with function, the length of the waveform in
+                        seconds
+              dacNumber, 0 or 1
+        Desc: Returns a UE9WaveformPlayer, which has a prebuilt Feedback
+              packet for every sample and plays them on a fixed schedule.
+        
+        >>> player = myUE9.waveformPlayer(200, samples = [ 0, 1, 2, 3, 4 ])
+        >>> player.play(cycles = 100)
+        >>> print player
+        """
+        return UE9WaveformPlayer(self, rate, samples, function, duration, dacNumber)
 
     def writeMem(self, BlockNum, Data):
         """
@@ -924,6 +1033,13 @@ class UE9(Device):
         
         Desc: Configures streaming on the UE9.
         """
+        command = self._buildStreamConfigCommand(NumChannels, Resolution, SettlingTime, InternalStreamClockFrequency, DivideClockBy256, EnableExternalScanTrigger, EnableScanPulseOutput, ScanInterval, ChannelNumbers, ChannelOptions, SampleFrequency, ScanFrequency)
+        
+        self._writeRead(command, 8, [0xF8, 0x01, 0x11])
+        
+        self.streamConfiged = True
+    
+    def _buildStreamConfigCommand(self, NumChannels = 1, Resolution = 12, SettlingTime = 0, InternalStreamClockFrequency = 0, DivideClockBy256 = False, EnableExternalScanTrigger = False, EnableScanPulseOutput = False, ScanInterval = 1, ChannelNumbers = [0], ChannelOptions = [0], SampleFrequency = None, ScanFrequency = None):
         if NumChannels != len(ChannelNumbers) or NumChannels != len(ChannelOptions):
             raise LabJackException("NumChannels must match length of ChannelNumbers and ChannelOptions")
         if len(ChannelNumbers) != len(ChannelOptions):
@@ -993,13 +1109,11 @@ class UE9(Device):
             command[12+(i*2)] = ChannelNumbers[i]
             command[13+(i*2)] = ChannelOptions[i]
         
-        self._writeRead(command, 8, [0xF8, 0x01, 0x11])
-        
         # Set up the variables for future use.
         self.streamSamplesPerPacket = SamplesPerPacket
         self.streamChannelNumbers = ChannelNumbers
         self.streamChannelOptions = ChannelOptions
-        self.streamConfiged = True
+        self.streamCalibrationTables = dict()
         
         if InternalStreamClockFrequency == 1:
             freq = float(48000000)
@@ -1027,6 +1141,8 @@ class UE9(Device):
         else:
             #USB stream packets have an additonal 2 bytes [0, 0] appended to the end
             self.streamPacketSize = 48
+        
+        return command
 
     def streamStart(self, clearData=False):
         """
@@ -1040,12 +1156,15 @@ class UE9(Device):
             self.streamClearData()
         Device.streamStart(self)
 
-    def streamData(self, convert=True):
+    def streamData(self, convert=True, validateChecksums=False):
         """
-        Name: UE9.streamData(convert=True)
+        Name: UE9.streamData(convert=True, validateChecksums=False)
         Args: convert, should the packets be converted as they are read.
                        set to False to get much faster speeds, but you will 
                        have to process the results later.
+              validateChecksums, check the checksums of every packet. The
+                       readings from packets that fail are NaN, and their
+                       indices are listed under badPackets.
         Desc: Reads stream data from a UE9. See our stream example to get an
               idea of how this function should be called. The return value of
               streamData is a dictionary with the following keys:
@@ -1060,90 +1179,55 @@ class UE9(Device):
               * AINi, where i is an entry in the passed in PChannels. If called
                         with convert = True, this is a list of all the readings
                         in this block.
+              * badPackets: The indices of the packets in this block with
+                            bad checksums. Only there with
+                            validateChecksums = True.
         Note: You must start the stream by calling streamStart() before calling
               this function.
         """
         if not self.streamStarted:
             raise LabJackException("Please start streaming before reading.")
         
-        missed = 0 #Not available on UE9
-        errors = 0
-        newTimeLoop = True #Ethernet only
-        resultBuffer = "" #Ethernet only
         numBytes = self.streamPacketSize
+        blockSize = numBytes * self.packetsPerRequest
+        packets = StreamReassembler(numBytes, blockSize * 4)
+        startTime = None #Ethernet only
         
         while True:
-            if self.ethernet and newTimeLoop == True:
-                newTimeLoop = False
-                startTime = datetime.now()
-            
-            result = self.read(numBytes * self.packetsPerRequest, stream = True)
-            numPackets = len(result) // numBytes
+            if self.ethernet and startTime is None:
+                startTime = time.time()
             
-            i = 0
-            while i < numPackets:
-                offset = (i*numBytes)
-                #Check for empty data
-                if ord(result[1+offset]) == 0:
-                    if all([ ord(b) == 0 for b in result[offset:(offset+numBytes)]]):
-                        if i+1 >= numPackets:
-                            result = result[0:offset]
-                        else:
-                            result = result[0:offset] + result[offset+numBytes:]
-                        numPackets = numPackets - 1
-                        continue
-                
-                e = ord(result[11+offset])
-                if e != 0:
-                    errors += 1
-                    if self.debug: print e
-                i+=1
+            if packets.packetsReady() < self.packetsPerRequest:
+                packets.readFrom(self, blockSize)
+            available = packets.packetsReady()
             
-            if len(result) == 0  and self.ethernet == False:
-                #No data over USB:
-                yield None
+            if not self.ethernet:
+                if available == 0:
+                    #No data over USB:
+                    yield None
+                    continue
+                numPackets = min(available, self.packetsPerRequest)
+            elif available >= self.packetsPerRequest:
+                #We're done reading data
+                startTime = None
+                numPackets = self.packetsPerRequest
+            elif time.time() - startTime > 1.10:
+                startTime = None
+                if available < 4:
+                    #Group(s) of 4 packets not available
+                    yield None
+                    continue
+                #Return packets in multiples of 4 like over USB
+                numPackets = (available // 4) * 4
+            else:
                 continue
             
-            if self.ethernet:
-                #Buffer new data
-                resultBuffer += result
-                packetsInBuffer = len(resultBuffer) // numBytes
-                
-                if packetsInBuffer >= self.packetsPerRequest:
-                    #We're done reading data
-                    newTimeLoop = True
-                    numPackets = self.packetsPerRequest
-                    result = resultBuffer[:(numBytes * self.packetsPerRequest)]
-                    
-                    #Adjust buffered data
-                    resultBuffer = resultBuffer[(numBytes * self.packetsPerRequest):]
-                else:
-                    curTime = datetime.now()
-                    timeElapsed = (curTime-startTime).seconds + float((curTime-startTime).microseconds)/1000000
-                    if timeElapsed > 1.10:
-                        newTimeLoop = True
-                        if packetsInBuffer < 4:
-                            #Group(s) of 4 packets not available
-                            yield None
-                            continue
-                        else:
-                            #Return packets in multiples of 4 like over USB
-                            numPackets = (packetsInBuffer // 4) * 4
-                            result = retResult[:(numBytes * numPackets)]
-                            firstPacket = ord(result[10])
-                            
-                            #Adjust buffered data
-                            resultBuffer = resultBuffer[(numBytes * numPackets):]
-                    else:
-                        continue
+            result = packets.take(numPackets)
             
-            firstPacket = ord(result[10])
-            
-            returnDict = dict(numPackets = numPackets, result = result, errors = errors, missed = missed, firstPacket = firstPacket)
+            #Missed readings aren't reported by the UE9
+            returnDict = self._streamBlockInfo(result, numBytes, validateChecksums)
             if convert:
-                returnDict.update(self.processStreamData(result, numBytes = numBytes))
-            
-            errors = 0  #reset error count
+                returnDict.update(self._processStreamBlock(result, numBytes, returnDict.get('badPackets')))
             
             yield returnDict
 
@@ -1173,30 +1257,89 @@ class UE9(Device):
         if numBytes is None:
             numBytes = self.streamPacketSize
 
-        returnDict = collections.defaultdict(list)
+        if numpy is not None:
+            return self._streamArraysToLists(self.processStreamDataArrays(result, numBytes))
 
-        j = self.streamPacketOffset
-        for packet in self.breakupPackets(result, numBytes):
-            if self.ethernet == False:
-                packet = packet[:-2] #remove the extra bytes
-            for sample in self.samplesFromPacket(packet):
-                if j >= len(self.streamChannelNumbers):
-                    j = 0
+        if self.ethernet:
+            footerSize = 2
+        else:
+            footerSize = 4
 
-                if self.streamChannelNumbers[j] in (193, 194):
-                    value = struct.unpack('<BB', sample )
-                elif self.streamChannelNumbers[j] >= 200:
-                    value = struct.unpack('<H', sample )[0]
-                else:
-                    value = struct.unpack('<H', sample )[0]
-                    gain = self.streamChannelOptions[j] & 0x0F
-                    value = self.binaryToCalibratedAnalogVoltage(value, gain)
+        return self._dealStreamSampleLists(self._unpackStreamSamples(result, numBytes, footerSize), self._convertStreamSampleList)
+
+    def processStreamDataArrays(self, result, numBytes=None):
+        """
+        Name: UE9.processStreamDataArrays(result, numBytes = None)
+        Args: result, the string returned from streamData()
+              numBytes, the number of bytes per packet
+        Desc: Does what processStreamData() does, but with NumPy, and
+              returns an array for each channel instead of a list. The
+              block is viewed as a row per packet, and the header, footer
+              and (over USB) the 2 extra bytes are sliced off. Each channel
+              is calibrated by looking its codes up in the table for its
+              gain. The readings are the
+              same as processStreamData()'s, bit for bit.
+              
+              Analog readings are float64 arrays. Channels 200 and up are
+              uint16 arrays, and channels 193 and 194 have a row of two
+              bytes per reading.
+        
+        >>> reading = d.streamData(convert = False).next()
+        >>> d.processStreamDataArrays(reading['result'])
+        {'AIN0' : array([ 3.123, 3.231, 3.232, ...])}
+        """
+        if numpy is None:
+            raise LabJackException("processStreamDataArrays() needs NumPy.")
+        
+        if numBytes is None:
+            numBytes = self.streamPacketSize
+        
+        if self.ethernet:
+            footerSize = 2
+        else:
+            footerSize = 4
+        
+        return self._dealStreamSamples(self._streamSampleArray(result, numBytes, footerSize), self._convertStreamSamples)
+    
+    def _convertStreamSamples(self, j, values):
+        """
+        Converts the samples from position j of the scan list.
+        """
+        channel = self.streamChannelNumbers[j]
+        if channel in (193, 194):
+            return values.view(numpy.uint8).reshape(-1, 2)
+        elif channel >= 200:
+            return values
+        
+        return self._streamCalibrationTable(j)[values]
 
-                returnDict["AIN%s" % self.streamChannelNumbers[j]].append(value)
-                j += 1
+    def _convertStreamSampleList(self, j, values):
+        """
+        Converts the samples from position j of the scan list, a sequence
+        of ints, to a list without NumPy.
+        """
+        channel = self.streamChannelNumbers[j]
+        if channel in (193, 194):
+            return [ (value & 0xff, value >> 8) for value in values ]
+        elif channel >= 200:
+            return list(values)
 
-            self.streamPacketOffset = j
-        return returnDict
+        return map(self._streamCalibrationTable(j).__getitem__, values)
+
+    def _streamCalibrationKey(self, j):
+        """
+        Returns what the calibration of position j of the scan list
+        depends on, its gain.
+        """
+        return self.streamChannelOptions[j] & 0x0F
+
+    def _calibrateStreamSamples(self, j, values):
+        """
+        Calibrates ints read from analog position j of the scan list one
+        at a time, like binaryToCalibratedAnalogVoltage() does.
+        """
+        slope, offset = self._ainCalibration(self._streamCalibrationKey(j), 0)
+        return [ (value * slope) + offset for value in values ]
 
     def watchdogConfig(self, ResetCommonTimeout = False, ResetControlonTimeout = False, UpdateDigitalIOB = False, UpdateDigitalIOA = False, UpdateDAC1onTimeout = False, UpdateDAC0onTimeout = False, TimeoutPeriod = 60, DIOConfigA = 0, DIOConfigB = 0, DAC0Enabled = False, DAC0 = 0, DAC1Enabled = False, DAC1 = 0):
         """
@@ -1569,6 +1712,29 @@ class UE9(Device):
         bits = self.singleIO(4, channel, BipGain = BipGain, Resolution = Resolution, SettlingTime = SettlingTime )
         return self.binaryToCalibratedAnalogVoltage(bits["AIN%s"%channel], BipGain, Resolution)
 
+    def prepareAIN(self, channel, BipGain = 0x00, Resolution = 12, SettlingTime = 0):
+        """
+        Name: UE9.prepareAIN(channel, BipGain = 0x00, Resolution = 12,
+                             SettlingTime = 0)
+        Args: The same as getAIN()
+        Desc: Returns a PreparedRead whose read() does what getAIN() does,
+              but with the SingleIO packet built and the calibration
+              constants looked up ahead of time. Prepare again after
+              getCalibrationData() to pick up new constants.
+        
+        >>> reader = myUE9.prepareAIN(1, BipGain = 0x01)
+        >>> print reader.read()
+        2.52598272
+        """
+        command = self._buildSingleIOCommand(4, channel, BipGain = BipGain, Resolution = Resolution, SettlingTime = SettlingTime)
+        slope, offset = self._ainCalibration(BipGain, Resolution)
+        
+        def decode(result):
+            bits = float((result[6] << 16) + (result[5] << 8) + result[4]) / 256
+            return (bits * slope) + offset
+        
+        return PreparedRead(self, command, 8, decode)
+
     def getTemperature(self):
         """
         Name: UE9.getTemperature()
@@ -1595,19 +1761,21 @@ class UE9(Device):
         >>> print d.binaryToCalibratedAnalogVoltage(65520.0, 0x01, 12)
         2.52598272
         """
+        slope, offset = self._ainCalibration(gain, resolution)
+        return (bits * slope) + offset
+    
+    def _ainCalibration(self, gain, resolution):
+        """
+        Returns the (slope, offset) for a reading at gain and resolution.
+        """
         if self.calData is not None:
             if self.deviceName.endswith("Pro") and resolution > 17:
-                slope = self.calData['ProAINSlopes'][str(gain)]
-                offset = self.calData['ProAINOffsets'][str(gain)]
+                return self.calData['ProAINSlopes'][str(gain)], self.calData['ProAINOffsets'][str(gain)]
             else:
-                slope = self.calData['AINSlopes'][str(gain)]
-                offset = self.calData['AINOffsets'][str(gain)]
+                return self.calData['AINSlopes'][str(gain)], self.calData['AINOffsets'][str(gain)]
         else:
             #Nornal and hi-res nominal calibration values are the same.
-            slope = DEFAULT_CAL_CONSTANTS['AINSlopes'][str(gain)]
-            offset = DEFAULT_CAL_CONSTANTS['AINOffsets'][str(gain)]
-        
-        return (bits * slope) + offset
+            return DEFAULT_CAL_CONSTANTS['AINSlopes'][str(gain)], DEFAULT_CAL_CONSTANTS['AINOffsets'][str(gain)]
 
     def binaryToCalibratedAnalogTemperature(self, bits):
         if self.calData is not None:
@@ -1646,6 +1814,18 @@ class UE9(Device):
         # Insure that we know if we are dealing with a Pro or not.
         self.controlConfig()
         
+        memBlocks = dict()
+        for blockNum in self._calibrationBlockNumbers():
+            memBlocks[blockNum] = self.readMem(blockNum)
+        
+        return self._parseCalibrationData(memBlocks)
+    
+    def _calibrationBlockNumbers(self):
+        if self.deviceName.endswith("Pro"):
+            return range(5)
+        return range(3)
+    
+    def _parseCalibrationData(self, memBlocks):
         results = dict()
         
         ainslopes = { '0' : None, '1' : None, '2' : None, '3' : None, '8' : None }
@@ -1657,7 +1837,7 @@ class UE9(Device):
         
         tempslope = None
         
-        memBlock = self.readMem(0)
+        memBlock = memBlocks[0]
         ainslopes['0'] = toDouble(memBlock[:8])
         ainoffsets['0'] = toDouble(memBlock[8:16])
         
@@ -1670,12 +1850,12 @@ class UE9(Device):
         ainslopes['3'] = toDouble(memBlock[48:56])
         ainoffsets['3'] = toDouble(memBlock[56:])
         
-        memBlock = self.readMem(1)
+        memBlock = memBlocks[1]
         ainslopes['8'] = toDouble(memBlock[:8])
         ainoffsets['8'] = toDouble(memBlock[8:16])
         
         # Read DAC and Temperature slopes
-        memBlock = self.readMem(2)
+        memBlock = memBlocks[2]
         dacslopes['0'] = toDouble(memBlock[:8])
         dacoffsets['0'] = toDouble(memBlock[8:16])
         
@@ -1685,15 +1865,16 @@ class UE9(Device):
         tempslope = toDouble(memBlock[32:40])
         
         if self.deviceName.endswith("Pro"):
-            memBlock = self.readMem(3)
+            memBlock = memBlocks[3]
             proainslopes['0'] = toDouble(memBlock[:8])
             proainoffsets['0'] = toDouble(memBlock[8:16])
             
-            memBlock = self.readMem(4)
+            memBlock = memBlocks[4]
             proainslopes['8'] = toDouble(memBlock[:8])
             proainoffsets['8'] = toDouble(memBlock[8:16])
         
         self.calData = { "AINSlopes" : ainslopes, "AINOffsets" : ainoffsets, "ProAINSlopes" : proainslopes, "ProAINOffsets" : proainoffsets, 'TempSlope' : tempslope, "DACSlopes" : dacslopes, "DACOffsets" : dacoffsets }
+        self.streamCalibrationTables = dict()
         
         return self.calData
     
@@ -2000,3 +2181,362 @@ class UE9(Device):
                         value = parser.getint(section, "timer%s mode")
                     
                     self.writeRegister(7100 + (i*2), [mode, value])
+
+class UE9ControlLoop(ControlLoop):
+    """
+    Name: UE9ControlLoop(device, inputs, outputs, callback, period)
+    Args: inputs, the UE9.feedback() arguments that choose what to read,
+                  such as AINMask and Resolution
+          outputs, the UE9.feedback() arguments that set the outputs, such
+                   as DAC0Update, DAC0Enabled, DAC0 and the IO masks
+          callback, called each cycle with the dictionary feedback()
+                    returns. It returns a dictionary of the outputs to
+                    change for the next cycle, or None.
+    Desc: A ControlLoop for the UE9, whose Feedback command reads and
+          writes all its IO in one packet. Use UE9.controlLoop() to make
+          one.
+    """
+    def _compile(self):
+        self.arguments = dict()
+        for arguments in self.inputs + self.outputs:
+            self.arguments.update(arguments)
+    
+    def _transact(self):
+        command = self.device._buildFeedbackCommand(**self.arguments)
+        result = self.device._writeRead(command, 64, [ 0xF8, 0x1D, 0x00], checkBytes = False)
+        return self.device._parseFeedbackResult(result, command)
+    
+    def setOutputs(self, outputs):
+        self.arguments.update(outputs)
+
+class UE9WaveformPlayer(WaveformPlayer):
+    """
+    Name: UE9WaveformPlayer(device, rate, samples = None, function = None,
+                            duration = None, dacNumber = 0)
+    Desc: A WaveformPlayer for the UE9, whose 12-bit DACs are set with the
+          Feedback command. Each sample's packet is a Feedback command that
+          only updates the DAC. Use UE9.waveformPlayer() to make one.
+    """
+    def _toBits(self, volts):
+        bits = self.device.voltageToDACBits(volts, dacNumber = self.dacNumber)
+        return max(0, min(bits, 0xfff))
+    
+    def _buildPackets(self):
+        dac = "DAC%s" % self.dacNumber
+        packets = []
+        for bits in self.bits:
+            arguments = { dac + "Update" : True, dac + "Enabled" : True, dac : bits }
+            packets.append(setChecksum(bytearray(self.device._buildFeedbackCommand(**arguments))))
+        return packets
+    
+    def _transact(self, packet):
+        self.device._writeRead(packet, 64, [ 0xF8, 0x1D, 0x00 ], checkBytes = False, checksum = False)
+
+class _UE9Requests(object):
+    """
+    The UE9 commands for classes that queue them with _request() and
+    return Futures, instead of blocking in _writeRead(). self.device is
+    the UE9 that builds and parses the packets.
+    """
+    def controlConfig(self, *args, **kargs):
+        command = self.device._buildControlConfigCommand(*args, **kargs)
+        return self._request(command, 24, [ 0xF8, 0x09, 0x08 ], self.device._parseControlConfigResult)
+    
+    def feedback(self, *args, **kargs):
+        command = self.device._buildFeedbackCommand(*args, **kargs)
+        return self._request(command, 64, [ 0xF8, 0x1D, 0x00 ], lambda result: self.device._parseFeedbackResult(result, command), checkBytes = False)
+    
+    def singleIO(self, IOType, Channel, *args, **kargs):
+        command = self.device._buildSingleIOCommand(IOType, Channel, *args, **kargs)
+        return self._request(command, 8, [ 0xA3 ], self.device._parseSingleIOResult, checkBytes = False)
+    
+    def timerCounter(self, *args, **kargs):
+        command = self.device._buildTimerCounterCommand(*args, **kargs)
+        return self._request(command, 40, [ 0xF8, 0x11, 0x18 ], self.device._parseTimerCounterResult)
+    
+    def readMem(self, BlockNum):
+        command = self.device._buildReadMemCommand(BlockNum)
+        return self._request(command, 136, [ 0xF8, 0x41, 0x2A ], self.device._parseReadMemResult)
+
+class PipelineFuture(Future):
+    """
+    A Future from a UE9Pipeline. Asking for its result flushes the pipeline
+    first, so it never waits on a command that hasn't been written.
+    """
+    def __init__(self, pipeline):
+        Future.__init__(self)
+        self.pipeline = pipeline
+    
+    def result(self, timeout = None):
+        if not self.done():
+            self.pipeline.flush()
+        return Future.result(self, timeout)
+
+class UE9Pipeline(_UE9Requests):
+    """
+    Name: UE9Pipeline(device, depth = 8)
+    Args: device, the UE9 to send commands to
+          depth, how many commands to have written to the UE9 before
+                 waiting for a response
+    Desc: Queues low-level commands for a UE9 and sends them in one go.
+          feedback, singleIO, timerCounter, controlConfig and readMem take
+          the same arguments as the UE9 methods, but only queue the command
+          and return a PipelineFuture for its result.
+          
+          flush() writes the queue to the UE9 back-to-back, keeping up to
+          depth commands in flight, and matches the responses to their
+          commands in order. The device lock is held for the whole flush,
+          as _writeRead() holds it for one command. Leaving a with block or
+          asking a PipelineFuture for its result also flushes.
+          
+          A command that fails sets its future's exception and the rest
+          carry on. If the connection fails, every command still waiting
+          gets the exception.
+    
+    >>> p = ue9.UE9Pipeline(myUE9)
+    >>> ain0, fio = p.singleIO(4, 0), p.singleIO(1, 0)
+    >>> p.flush()
+    >>> ain0.result(), fio.result()
+    """
+    def __init__(self, device, depth = 8):
+        self.device = device
+        self.depth = max(1, depth)
+        self.queued = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.flush()
+    
+    def _request(self, command, readLen, commandBytes, parse, checkBytes = True, checksum = True):
+        if checksum:
+            command = setChecksum(command)
+        future = PipelineFuture(self)
+        self.queued.append((command, readLen, commandBytes, checkBytes, parse, future))
+        return future
+    
+    def flush(self):
+        """
+        Name: UE9Pipeline.flush()
+        Args: None
+        Desc: Sends every queued command and waits for all the responses.
+        """
+        device = self.device
+        with device.deviceLock:
+            queued, self.queued = self.queued, []
+            received = bytearray()
+            sent = 0
+            try:
+                for i, (command, readLen, commandBytes, checkBytes, parse, future) in enumerate(queued):
+                    while sent < len(queued) and sent - i < self.depth:
+                        device.write(queued[sent][0], checksum = False)
+                        sent += 1
+                    
+                    # A response's length comes from its own header where it
+                    # has one, so a short error reply can't throw off the
+                    # responses after it.
+                    length = expectedPacketLength(received, readLen)
+                    while length is None or len(received) < length:
+                        chunk = device.readBytes(max(1, (length or readLen) - len(received)))
+                        if len(chunk) == 0:
+                            raise LabJackException("Got a zero length packet.")
+                        received += chunk
+                        length = expectedPacketLength(received, readLen)
+                    
+                    result = list(received[:length])
+                    del received[:length]
+                    if device.debug: print "Response: ", hexWithoutQuotes(result)
+                    
+                    try:
+                        if checkBytes:
+                            device._checkCommandBytes(result, commandBytes)
+                        future.setResult(parse(result))
+                    except Exception, e:
+                        future.setException(e)
+            except Exception, e:
+                for command, readLen, commandBytes, checkBytes, parse, future in queued:
+                    future.setException(e)
+                raise
+
+def _deviceAttribute(name):
+    """
+    A property that reads and writes an attribute of self.device.
+    """
+    def get(self):
+        return getattr(self.device, name)
+    
+    def set(self, value):
+        setattr(self.device, name, value)
+    
+    return property(get, set)
+
+class AsyncUE9(_UE9Requests):
+    """
+    Name: AsyncUE9(ipAddress, map = None, timeout = SOCKET_TIMEOUT,
+                   debug = False)
+    Args: ipAddress, the IP address of the UE9
+          map, the asyncore map to put the UE9's connections on. None uses
+               asyncore's global map.
+          timeout, seconds to wait for a response before failing
+          debug, True for debug information
+    Desc: A UE9 over Ethernet that never blocks. The data, stream and Modbus
+          ports are non-blocking sockets run by asyncore, and commands
+          return a Future instead of their result. Commands are written as
+          soon as they're made, so several can be in flight at once.
+          
+          Any number of AsyncUE9s can share a map and be driven from one
+          thread, either with runUntilComplete() or by running
+          asyncore.loop(map = map) in a thread of its own.
+          
+          feedback, singleIO, timerCounter, controlConfig, readMem,
+          getCalibrationData, readRegister, writeRegister, streamConfig,
+          streamStart and streamStop take the same arguments as the UE9
+          methods and return Futures. streamData calls a callback with
+          each block of stream data.
+          
+          The packets are built and parsed by an unopened UE9, device,
+          which also keeps the calibration and stream settings. Only the
+          commands above are available; the blocking UE9 methods that are
+          built on them, like getAIN(), are not.
+    
+    >>> import ue9
+    >>> ue9s = [ ue9.AsyncUE9(ip) for ip in ipAddresses ]
+    >>> runUntilComplete([ d.getCalibrationData() for d in ue9s ])
+    >>> runUntilComplete([ d.feedback(AINMask = 1) for d in ue9s ])
+    [{'AIN0': 1.4223..., ...}, {'AIN0': 0.2103..., ...}, ...]
+    """
+    def __init__(self, ipAddress, map = None, timeout = SOCKET_TIMEOUT, debug = False):
+        self.device = UE9(debug = debug, autoOpen = False)
+        self.device.ethernet = True
+        self.device.ipAddress = ipAddress
+        
+        self.ipAddress = ipAddress
+        self.map = map
+        
+        self.data = AsyncChannel((ipAddress, 52360), map, timeout)
+        self.stream = AsyncChannel((ipAddress, 52361), map, timeout)
+        self.modbus = AsyncChannel((ipAddress, 502), map, timeout, frameLength = Modbus.getPacketLength)
+    
+    debug = _deviceAttribute('debug')
+    calData = _deviceAttribute('calData')
+    streamConfiged = _deviceAttribute('streamConfiged')
+    streamStarted = _deviceAttribute('streamStarted')
+    
+    def _request(self, command, readLen, commandBytes, parse, checkBytes = True, checksum = True):
+        """
+        The async version of _writeRead(). Returns a Future for
+        parse(result).
+        """
+        if checksum:
+            command = setChecksum(command)
+        if self.debug: print "Sent: ", hexWithoutQuotes(command)
+        
+        def check(result):
+            result = list(result)
+            if self.debug: print "Response: ", hexWithoutQuotes(result)
+            if checkBytes:
+                self.device._checkCommandBytes(result, commandBytes)
+            return parse(result)
+        
+        return self.data.request(command, readLen, check)
+    
+    def getCalibrationData(self):
+        # Responses come back in order, so controlConfig has set
+        # deviceName by the time the blocks are parsed.
+        futures = [ self.controlConfig() ]
+        futures += [ self.readMem(i) for i in range(5) ]
+        
+        return chainFuture(gatherFutures(futures), lambda results: self.device._parseCalibrationData(dict(enumerate(results[1:]))))
+    
+    def readRegister(self, addr, numReg = None, format = None, unitId = None):
+        pkt, numBytes = self.device._buildReadRegisterPacket(addr, numReg, unitId)
+        return self.modbus.request(pkt, numBytes, lambda response: self.device._parseReadRegisterResponse(response, numBytes, addr, format, numReg))
+    
+    def writeRegister(self, addr, value, unitId = None):
+        pkt, numBytes = self.device._buildWriteRegisterPacket(addr, value, unitId)
+        return self.modbus.request(pkt, numBytes, lambda response: self.device._parseWriteRegisterResponse(response, pkt, value))
+    
+    def streamConfig(self, *args, **kargs):
+        command = self.device._buildStreamConfigCommand(*args, **kargs)
+        
+        def configured(result):
+            self.streamConfiged = True
+        
+        return self._request(command, 8, [ 0xF8, 0x01, 0x11 ], configured)
+    
+    def streamStart(self):
+        if not self.streamConfiged:
+            raise LabJackException("Stream must be configured before it can be started.")
+        
+        if self.streamStarted: 
+            raise LabJackException("Stream already started.")
+        
+        def started(results):
+            if results[2] != 0:
+                raise LowlevelErrorException(results[2], "StreamStart returned an error:\n    %s" % lowlevelErrorToString(results[2]) )
+            self.streamStarted = True
+        
+        # Flush the stream buffer first, the same as UE9.streamStart()
+        self._request([ 0x08, 0x08 ], 2, [], lambda results: None, checkBytes = False, checksum = False)
+        return self._request([ 0xA8, 0xA8 ], 4, [], started, checkBytes = False, checksum = False)
+    
+    def streamStop(self):
+        def stopped(results):
+            if results[2] != 0:
+                raise LowlevelErrorException(results[2], "StreamStop returned an error:\n    %s" % lowlevelErrorToString(results[2]) )
+            self.streamStarted = False
+            self.stream.listener = None
+            del self.stream.received[:]
+        
+        future = self._request([ 0xB0, 0xB0 ], 4, [], stopped, checkBytes = False, checksum = False)
+        self._request([ 0x08, 0x08 ], 2, [], lambda results: None, checkBytes = False, checksum = False)
+        return future
+    
+    def streamData(self, callback, convert = True, validateChecksums = False):
+        """
+        Name: AsyncUE9.streamData(callback, convert = True,
+                                  validateChecksums = False)
+        Args: callback, a function to call with each block of stream data,
+                        or None to stop calling it
+              convert, should the packets be converted as they are read.
+              validateChecksums, check the checksums of every packet, as
+                        UE9.streamData() does.
+        Desc: Calls callback from the asyncore loop each time
+              packetsPerRequest packets have arrived on the stream port. The
+              empty packets the UE9 pads its stream with are dropped first.
+              The dictionary it's called with has the same keys as the ones
+              UE9.streamData() yields.
+        Note: You must call streamConfig() before calling this function.
+        """
+        if not self.streamConfiged and callback is not None:
+            raise LabJackException("Stream must be configured before it can be read.")
+        
+        if callback is None:
+            self.stream.listener = None
+            return
+        
+        device = self.device
+        numBytes = device.streamPacketSize
+        packets = StreamReassembler(numBytes, numBytes * device.packetsPerRequest * 4)
+        
+        def listener(received):
+            packets.feed(received)
+            del received[:]
+            
+            while packets.packetsReady() >= device.packetsPerRequest:
+                result = packets.take(device.packetsPerRequest)
+                
+                returnDict = device._streamBlockInfo(result, numBytes, validateChecksums)
+                if convert:
+                    returnDict.update(device._processStreamBlock(result, numBytes, returnDict.get('badPackets')))
+                callback(returnDict)
+        
+        self.stream.listener = listener
+        listener(self.stream.received)
+    
+    def close(self):
+        for channel in (self.data, self.stream, self.modbus):
+            channel.close()
+        self.streamStarted = False
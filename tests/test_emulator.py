@@ -0,0 +1,81 @@
+"""
+Name: test_emulator.py
+Desc: Smoke tests that open a U3, U6 and UE9 against the emulators in
+      emulator.py and talk to them. Run the tests from the top of the
+      tree with:
+
+      python -m unittest discover -s tests
+"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import unittest
+
+import u3, u6, ue9, emulator
+
+def constantSignal(channel, t):
+    return 40000 + channel * 100
+
+class TestEmulatedU3(unittest.TestCase):
+    def setUp(self):
+        self.d = u3.U3(transport = emulator.EmulatedU3(signal = constantSignal))
+
+    def tearDown(self):
+        self.d.close()
+
+    def test_open(self):
+        self.assertEqual(self.d.deviceName, "U3-LV")
+        self.assertEqual(self.d.serialNumber, emulator.EmulatedU3.defaultSerialNumber)
+
+    def test_feedback(self):
+        self.assertEqual(self.d.getFeedback(u3.AIN(0), u3.AIN(1)), [ 40000, 40100 ])
+
+    def test_docstring_example(self):
+        d = u3.U3(transport = emulator.EmulatedU3(signal = lambda channel, t: 32768))
+        self.assertEqual(d.getFeedback(u3.AIN(0)), [ 32768 ])
+
+    def test_digital_io(self):
+        self.d.getFeedback(u3.BitDirWrite(4, 1), u3.BitStateWrite(4, 1))
+        self.assertEqual(self.d.getFeedback(u3.BitStateRead(4)), [ 1 ])
+
+    def test_calibrated_reading(self):
+        self.d.getCalibrationData()
+        self.assertEqual(self.d.getAIN(0), self.d.binaryToCalibratedAnalogVoltage(40000))
+
+class TestEmulatedU6(unittest.TestCase):
+    def setUp(self):
+        self.d = u6.U6(transport = emulator.EmulatedU6(signal = constantSignal))
+
+    def tearDown(self):
+        self.d.close()
+
+    def test_open(self):
+        self.assertEqual(self.d.deviceName, "U6")
+        self.assertEqual(self.d.serialNumber, emulator.EmulatedU6.defaultSerialNumber)
+
+    def test_feedback(self):
+        self.assertEqual(self.d.getFeedback(u6.AIN24(0)), [ 40000 << 8 ])
+
+    def test_calibrated_reading(self):
+        self.d.getCalibrationData()
+        self.assertAlmostEqual(self.d.getAIN(0), self.d.readRegister(0), places = 3)
+
+class TestEmulatedUE9(unittest.TestCase):
+    def setUp(self):
+        self.d = ue9.UE9(transport = emulator.EmulatedUE9(signal = constantSignal))
+
+    def tearDown(self):
+        self.d.close()
+
+    def test_open(self):
+        # The UE9 learns its name from ControlConfig.
+        self.d.controlConfig()
+        self.assertEqual(self.d.deviceName, "UE9")
+        self.assertEqual(self.d.serialNumber, emulator.EmulatedUE9.defaultSerialNumber)
+
+    def test_calibrated_reading(self):
+        self.d.getCalibrationData()
+        self.assertAlmostEqual(self.d.getAIN(0), self.d.readRegister(0), places = 3)
+
+if __name__ == '__main__':
+    unittest.main()
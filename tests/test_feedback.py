@@ -0,0 +1,170 @@
+"""
+Name: test_feedback.py
+Desc: Tests of compiled Feedback programs, shared FeedbackCommands,
+      prepared reads, ControlLoop, PollScheduler, WaveformPlayer and
+      UE9Pipeline against the emulators.
+"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pickle
+import unittest
+
+import u3, u6, ue9, emulator
+from LabJackPython import LabJackException, PollScheduler
+
+def constantSignal(channel, t):
+    return 40000 + channel * 100
+
+class TestFeedbackCommands(unittest.TestCase):
+    def test_same_arguments_share_an_instance(self):
+        self.assertTrue(u6.AIN24(0) is u6.AIN24(0))
+        self.assertTrue(u6.AIN24(0, 8) is u6.AIN24(0, ResolutionIndex = 8))
+        self.assertTrue(u6.AIN24(0) is u6.AIN24(0, 0, 0))
+
+    def test_argument_types_are_kept_apart(self):
+        self.assertFalse(u6.BitStateWrite(0, 1) is u6.BitStateWrite(0, True))
+        self.assertEqual(u6.BitStateWrite(0, True).state, True)
+        self.assertRaises(TypeError, u6.AIN24, 0, 8.0)
+
+    def test_cmdBytes_is_a_list(self):
+        command = u6.AIN24(0)
+        self.assertEqual(command.cmdBytes + [ 1 ], [ 2, 0, 0, 0, 1 ])
+        command.cmdBytes.append(9)
+        self.assertEqual(command.cmdBytes, [ 2, 0, 0, 0 ])
+
+    def test_commands_are_immutable(self):
+        self.assertRaises(AttributeError, setattr, u6.AIN24(0), 'readLen', 5)
+
+    def test_pickle(self):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            self.assertTrue(pickle.loads(pickle.dumps(u6.AIN24(3), protocol)) is u6.AIN24(3))
+            command = pickle.loads(pickle.dumps(u3.PortStateWrite([ 1, 2, 3 ]), protocol))
+            self.assertEqual(command.cmdBytes, u3.PortStateWrite([ 1, 2, 3 ]).cmdBytes)
+
+class TestFeedbackProgram(unittest.TestCase):
+    def setUp(self):
+        self.transport = emulator.EmulatedU6(signal = constantSignal)
+        self.d = u6.U6(transport = self.transport)
+
+    def test_run_matches_getFeedback(self):
+        commands = [ u6.AIN24(0), u6.AIN24(1), u6.BitStateRead(2) ]
+        program = self.d.compileFeedback(*commands)
+        self.assertEqual(program.run(), self.d.getFeedback(*commands))
+
+    def test_patch(self):
+        program = self.d.compileFeedback(u6.DAC0_16(0), u6.AIN24(0))
+        program[0] = u6.DAC0_16(1000)
+        program.run()
+        self.assertEqual(self.transport.dac[0], 1000)
+        self.assertRaises(LabJackException, program.patch, 0, u6.DAC0_8(10))
+
+    def test_split(self):
+        commands = [ u6.AIN24(i % 14) for i in range(40) ]
+        self.assertRaises(LabJackException, self.d.compileFeedback, *commands)
+        program = self.d.compileFeedback(split = True, *commands)
+        self.assertTrue(len(program.packets) > 1)
+        self.assertEqual(program.run(), [ (40000 + (i % 14) * 100) << 8 for i in range(40) ])
+        self.assertEqual(self.d.getFeedback(split = True, *commands), program.run())
+
+class TestPreparedReads(unittest.TestCase):
+    def test_u3(self):
+        d = u3.U3(transport = emulator.EmulatedU3(signal = constantSignal))
+        d.getCalibrationData()
+        self.assertEqual(d.prepareAIN(1).read(), d.getAIN(1))
+
+    def test_u6(self):
+        d = u6.U6(transport = emulator.EmulatedU6(signal = constantSignal))
+        d.getCalibrationData()
+        self.assertEqual(d.prepareAIN(1).read(), d.getAIN(1))
+
+    def test_ue9(self):
+        d = ue9.UE9(transport = emulator.EmulatedUE9(signal = constantSignal))
+        d.getCalibrationData()
+        self.assertEqual(d.prepareAIN(1).read(), d.getAIN(1))
+
+class TestControlLoop(unittest.TestCase):
+    def test_u6(self):
+        transport = emulator.EmulatedU6(signal = constantSignal)
+        d = u6.U6(transport = transport)
+        seen = []
+
+        def control(results):
+            seen.append(results)
+            return [ u6.DAC0_16(len(seen)) ]
+
+        loop = d.controlLoop([ u6.AIN24(0) ], [ u6.DAC0_16(0) ], control, 0.001)
+        loop.run(cycles = 5)
+        self.assertEqual(loop.cycles, 5)
+        self.assertEqual(seen, [ [ 40000 << 8 ] ] * 5)
+        # The last cycle wrote the outputs the fourth callback returned.
+        self.assertEqual(transport.dac[0], 4)
+
+    def test_ue9(self):
+        d = ue9.UE9(transport = emulator.EmulatedUE9(signal = constantSignal))
+        seen = []
+
+        def control(results):
+            seen.append(results['AIN0'])
+
+        loop = d.controlLoop(dict(AINMask = 1), dict(), control, 0.001)
+        loop.run(cycles = 3)
+        self.assertEqual(len(seen), 3)
+
+class TestPollScheduler(unittest.TestCase):
+    def test_reads_share_packets(self):
+        d = u6.U6(transport = emulator.EmulatedU6(signal = constantSignal))
+        scheduler = PollScheduler()
+        seen = []
+        tasks = [ scheduler.add(d, u6.AIN24(i), 100, callback = lambda task, value, timestamp: seen.append(value)) for i in range(3) ]
+
+        scheduler.tick()
+        self.assertEqual([ task.value for task in tasks ], [ 40000 << 8, 40100 << 8, 40200 << 8 ])
+        self.assertEqual(len(seen), 3)
+        self.assertEqual(len(scheduler.programs), 1)
+
+        scheduler.run(duration = 0.05)
+        self.assertTrue(all(task.timestamp is not None and task.exception is None for task in tasks))
+
+        scheduler.remove(tasks[0])
+        self.assertEqual(len(scheduler.tasks), 2)
+
+    def test_needs_compileFeedback(self):
+        d = ue9.UE9(transport = emulator.EmulatedUE9())
+        self.assertRaises(LabJackException, PollScheduler().add, d, None, 10)
+
+class TestWaveformPlayer(unittest.TestCase):
+    def test_u6(self):
+        transport = emulator.EmulatedU6()
+        d = u6.U6(transport = transport)
+        player = d.waveformPlayer(1000, samples = [ 0, 1, 2, 3 ])
+        self.assertEqual(len(player), 4)
+
+        player.play(cycles = 1)
+        self.assertEqual(player.updates + player.statistics.misses, 4)
+        self.assertEqual(transport.dac[0], player.bits[-1])
+
+    def test_needs_samples(self):
+        d = u6.U6(transport = emulator.EmulatedU6())
+        self.assertRaises(LabJackException, d.waveformPlayer, 100)
+
+class TestUE9Pipeline(unittest.TestCase):
+    def test_results_in_order(self):
+        d = ue9.UE9(transport = emulator.EmulatedUE9(signal = constantSignal))
+        d.getCalibrationData()
+
+        with d.pipeline(depth = 3) as p:
+            futures = [ p.singleIO(4, i, BipGain = 0, Resolution = 12, SettlingTime = 0) for i in range(6) ]
+            memory = p.readMem(0)
+
+        self.assertEqual([ future.result() for future in futures ], [ d.singleIO(4, i, BipGain = 0, Resolution = 12, SettlingTime = 0) for i in range(6) ])
+        self.assertEqual(memory.result(), d.readMem(0))
+
+    def test_result_flushes(self):
+        d = ue9.UE9(transport = emulator.EmulatedUE9(signal = constantSignal))
+        p = d.pipeline()
+        future = p.feedback(AINMask = 1)
+        self.assertEqual(future.result()['AIN0'], d.feedback(AINMask = 1)['AIN0'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Name: test_stream.py
+Desc: Tests of stream conversion, empty packet filtering, StreamReader
+      and checksums against the emulators. The converted readings are
+      checked, bit for bit, against converting each sample on its own
+      with the device's binaryToCalibratedAnalogVoltage().
+"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import struct
+import unittest
+
+import u3, u6, ue9, emulator, Checksum
+from LabJackPython import StreamReassembler, setChecksum
+
+def rawSamples(result, packetSize, samplesPerPacket):
+    """
+    The sample codes in a block of stream packets, in the order they were
+    taken.
+    """
+    samples = []
+    for start in range(0, len(result), packetSize):
+        samples.extend(struct.unpack('<%sH' % samplesPerPacket, result[start+12:start+12+2*samplesPerPacket]))
+    return samples
+
+def readBlock(d, **kargs):
+    d.streamConfig(**kargs)
+    d.streamStart()
+    try:
+        return d.streamData(convert = False).next()['result']
+    finally:
+        d.streamStop()
+
+class TestU3Stream(unittest.TestCase):
+    def test_conversion(self):
+        d = u3.U3(transport = emulator.EmulatedU3())
+        d.getCalibrationData()
+        channels, negChannels = [ 0, 1, 0, 30 ], [ 31, 32, 31, 31 ]
+        result = readBlock(d, NumChannels = 4, PChannels = channels, NChannels = negChannels, ScanFrequency = 1000)
+
+        samples = rawSamples(result, 14 + d.streamSamplesPerPacket * 2, d.streamSamplesPerPacket)
+        readings = d.processStreamData(result)
+
+        expected = dict()
+        for i, bits in enumerate(samples):
+            j = i % len(channels)
+            voltage = d.binaryToCalibratedAnalogVoltage(bits, isSingleEnded = negChannels[j] == 31, isSpecialSetting = negChannels[j] == 32, channelNumber = channels[j])
+            expected.setdefault("AIN%s" % channels[j], []).append(voltage)
+        self.assertEqual(dict(readings), expected)
+
+class TestU6Stream(unittest.TestCase):
+    def test_conversion(self):
+        d = u6.U6(transport = emulator.EmulatedU6())
+        d.getCalibrationData()
+        channels, options = [ 0, 1, 2 ], [ 0, 0x10, 0 ]
+        result = readBlock(d, NumChannels = 3, ChannelNumbers = channels, ChannelOptions = options, ScanFrequency = 1000)
+
+        samples = rawSamples(result, 14 + d.streamSamplesPerPacket * 2, d.streamSamplesPerPacket)
+        readings = d.processStreamData(result)
+
+        expected = dict()
+        for i, bits in enumerate(samples):
+            j = i % len(channels)
+            gainIndex = (options[j] >> 4) & 0x3
+            expected.setdefault("AIN%s" % channels[j], []).append(d.binaryToCalibratedAnalogVoltage(gainIndex, bits, is16Bits = True))
+        self.assertEqual(dict(readings), expected)
+
+    def test_channel_order_carries_on(self):
+        d = u6.U6(transport = emulator.EmulatedU6())
+        result = readBlock(d, NumChannels = 3, ChannelNumbers = [ 0, 1, 2 ], ChannelOptions = [ 0, 0, 0 ], ScanFrequency = 1000)
+        packetSize = 14 + d.streamSamplesPerPacket * 2
+
+        d.streamPacketOffset = 0
+        whole = d.processStreamData(result)
+        d.streamPacketOffset = 0
+        pieces = dict()
+        for start in range(0, len(result), packetSize):
+            for key, values in d.processStreamData(result[start:start+packetSize]).items():
+                pieces.setdefault(key, []).extend(values)
+        self.assertEqual(dict(whole), pieces)
+
+    def test_bad_checksums(self):
+        d = u6.U6(transport = emulator.EmulatedU6())
+        result = readBlock(d, NumChannels = 1, ChannelNumbers = [ 0 ], ChannelOptions = [ 0 ], ScanFrequency = 1000)
+        packetSize = 14 + d.streamSamplesPerPacket * 2
+        self.assertEqual(Checksum.badStreamPackets(result, packetSize), [])
+
+        broken = bytearray(result)
+        broken[packetSize + 12] ^= 0xff
+        self.assertEqual(Checksum.badStreamPackets(str(broken), packetSize), [ 1 ])
+
+        readings = d._processStreamBlock(str(broken), packetSize, [ 1 ])['AIN0']
+        spp = d.streamSamplesPerPacket
+        self.assertTrue(all(value != value for value in readings[spp:2*spp]))
+        self.assertFalse(any(value != value for value in readings[:spp] + readings[2*spp:]))
+
+class TestUE9Stream(unittest.TestCase):
+    def setUp(self):
+        self.d = ue9.UE9(transport = emulator.EmulatedUE9(ethernet = True))
+        self.d.ethernet = True
+        self.d.getCalibrationData()
+
+    def test_conversion(self):
+        d = self.d
+        result = readBlock(d, NumChannels = 2, ChannelNumbers = [ 0, 1 ], ChannelOptions = [ 0, 0 ], ScanFrequency = 1000)
+
+        samples = rawSamples(result, d.streamPacketSize, 16)
+        readings = d.processStreamData(result)
+
+        expected = dict()
+        for i, bits in enumerate(samples):
+            expected.setdefault("AIN%s" % (i % 2), []).append(d.binaryToCalibratedAnalogVoltage(bits, 0, 12))
+        self.assertEqual(dict(readings), expected)
+
+    def test_empty_packets_are_dropped(self):
+        d = self.d
+        result = readBlock(d, NumChannels = 2, ChannelNumbers = [ 0, 1 ], ChannelOptions = [ 0, 0 ], ScanFrequency = 1000)
+        n = d.streamPacketSize
+
+        padded = bytearray()
+        for i, start in enumerate(range(0, len(result), n)):
+            padded += result[start:start+n]
+            if i % 3 == 0:
+                padded += bytearray(n)
+
+        packets = StreamReassembler(n, 64)
+        for start in range(0, len(padded), 17):
+            packets.feed(padded[start:start+17])
+        self.assertEqual(packets.take(packets.packetsReady()), result)
+
+class TestStreamReader(unittest.TestCase):
+    def test_blocks_match_streamData(self):
+        d = u6.U6(transport = emulator.EmulatedU6(signal = lambda channel, t: 30000 + channel))
+        d.streamConfig(NumChannels = 2, ChannelNumbers = [ 0, 1 ], ChannelOptions = [ 0, 0 ], ScanFrequency = 1000)
+        reader = d.startStreamReader(numBlocks = 4)
+        try:
+            data = reader.getData(timeout = 5)
+        finally:
+            reader.stop()
+
+        self.assertEqual(data['errors'], 0)
+        self.assertEqual(data['numPackets'], d.packetsPerRequest)
+        self.assertEqual(set(data['AIN0']), set([ d.binaryToCalibratedAnalogVoltage(0, 30000, is16Bits = True) ]))
+        self.assertEqual(set(data['AIN1']), set([ d.binaryToCalibratedAnalogVoltage(0, 30001, is16Bits = True) ]))
+
+class TestChecksum(unittest.TestCase):
+    def test_matches_setChecksum(self):
+        packet = [ 0, 0xF8, 0x02, 0x00, 0, 0, 1, 2, 3, 4 ]
+        self.assertTrue(Checksum.verify(setChecksum(list(packet))))
+
+    def test_bytes_are_masked(self):
+        # Values outside of 0-255 count as the byte the device sees.
+        self.assertEqual(setChecksum([ 0, 0xF8, 1, -2, 0, 0, 0x1ff, 3 ]), [ 251, 0xF8, 1, -2, 2, 1, 0x1ff, 3 ])
+        self.assertEqual(setChecksum([ 0, 1, -2, 0x1ff, 300, -1 ]), [ 44, 1, -2, 0x1ff, 300, -1 ])
+
+    def test_template(self):
+        packet = [ 0, 0xF8, 0x02, 0x00, 0, 0, 1, 2, 3, 4 ]
+        template = Checksum.ChecksumTemplate(packet)
+        template.update(6, [ 9, 8 ])
+        self.assertEqual(list(template.packet()), setChecksum([ 0, 0xF8, 0x02, 0x00, 0, 0, 9, 8, 3, 4 ]))
+
+if __name__ == '__main__':
+    unittest.main()